@@ -10,10 +10,20 @@ from routes.car_browser import car_browser_page
 from routes.ai_insights import ai_insights_page
 from routes.fine_print_analyzer import fine_print_analyzer_page
 from routes.guide import guide_page
+from routes.admin_metrics import admin_metrics_page
 from utils.session_state import initialize_session_state
+from utils.ai import warm_client
+from utils.insights import start_refresher
+from utils.jobs import cancel_jobs
 
 load_dotenv()
 
+# Open the shared Groq connection pool before the first page needs it
+warm_client()
+
+# Keep the shared AI Insights market analysis up to date in the background
+start_refresher()
+
 # Configure the page with a wide layout and custom theme
 st.set_page_config(
     page_title="Use AI to Buy",
@@ -25,6 +35,16 @@ st.set_page_config(
 # Initialize session state
 initialize_session_state()
 
+# Hidden admin route: ?admin=metrics&token=<ADMIN_TOKEN>. The parameters are
+# consumed once, so the page's navigation still works and the token leaves the URL
+if (
+    os.getenv("ADMIN_TOKEN")
+    and st.query_params.get("admin") == "metrics"
+    and st.query_params.get("token") == os.getenv("ADMIN_TOKEN")
+):
+    st.session_state.user_choice = "admin_metrics"
+    st.query_params.clear()
+
 # Custom CSS for dark theme and modern card/button styling
 st.markdown("""
     <style>
@@ -151,6 +171,12 @@ st.markdown("""
 # Remove sidebar navigation; use only main content area
 st.markdown('<div class="header"></div>', unsafe_allow_html=True)
 
+# Stop background AI jobs for pages the user has navigated away from
+visible_pages = {st.session_state.user_choice}
+if st.session_state.get('show_ai_chat', False):
+    visible_pages.add("ai_assistant")
+cancel_jobs(keep=visible_pages)
+
 # Route handling
 if st.session_state.user_choice == "policy_scanner":
     policy_scanner_page()
@@ -172,6 +198,8 @@ elif st.session_state.user_choice == "fine_print_analyzer":
     fine_print_analyzer_page()
 elif st.session_state.user_choice == "guide":
     guide_page()
+elif st.session_state.user_choice == "admin_metrics":
+    admin_metrics_page()
 else:
     # Top headline and subheadline
     st.markdown("""
@@ -0,0 +1,98 @@
+"""Time Car Browser filtering on the local catalog.
+
+``python -m benchmarks.catalog --rows 2000000``
+
+Builds a synthetic catalog and its bitmap indexes, then reports per-query
+times for typical filter combinations: filter evaluation (bitmap AND/OR),
+counting the matches, picking the top ``k`` in sort order, and the
+per-option facet counts shown next to every filter. Then pages through
+one result set, times search type-ahead keystroke by keystroke, and
+finishes with incremental index maintenance: adding and removing listings.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.catalog import Catalog, synthetic_listings
+
+QUERIES = [
+    {},
+    {"price_range": (500000, 1200000), "year_range": (2021, 2024), "body_type": ["SUV", "Hatchback"],
+     "fuel_type": ["Petrol"], "transmission": ["Automatic"], "seating_capacity": ["5"]},
+    {"price_range": (0, 800000), "make": ["Maruti Suzuki", "Tata", "Others"]},
+    {"price_range": (2000000, 5000000), "seating_capacity": ["7", "8+"], "fuel_type": ["Diesel"]},
+    {"year_range": (2015, 2018), "transmission": ["Manual"]},
+    # Bounds off the slider steps are answered from the sorted index alone
+    {"price_range": (450000, 650000), "body_type": ["Convertible"]},
+    {"price_range": (500000, 2000000), "query": "creta sx"},
+]
+# Searches typed into the Car Browser, one keystroke at a time
+TYPED = ["creta sx o", "hyrider", "maruti swft zxi"]
+SORTS = ["price_low_to_high", "price_high_to_low", "year_new_to_old", "year_old_to_new"]
+
+
+def _ms(times, pct):
+    return np.percentile(times, pct) * 1000
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--batch", type=int, default=1000, help="Listings per add/remove batch")
+    args = parser.parse_args()
+
+    frame, generated = _timed(lambda: synthetic_listings(args.rows))
+    catalog, indexed = _timed(lambda: Catalog.from_frame(frame))
+    print(f"{args.rows:,} rows: generated in {generated:.2f}s, encoded and indexed in {indexed:.2f}s")
+
+    print(f"{'query':>5} {'matches':>10} {'filter p50':>11} {'p95':>7} {'count p50':>10} {'top-k p50':>10} {'facets p50':>11}  (ms)")
+    for i, filters in enumerate(QUERIES):
+        filtering, counting, ranking, faceting = [], [], [], []
+        for r in range(args.repeat):
+            matches, elapsed = _timed(lambda: catalog.match(filters))
+            filtering.append(elapsed)
+            count, elapsed = _timed(matches.count)
+            counting.append(elapsed)
+            sort_by = SORTS[r % len(SORTS)]
+            bounds = filters.get(f"{sort_by.split('_')[0]}_range")
+            _, elapsed = _timed(lambda: catalog.top_k(matches, sort_by, args.k, count=count, bounds=bounds))
+            ranking.append(elapsed)
+            _, elapsed = _timed(lambda: catalog.facet_counts(filters))
+            faceting.append(elapsed)
+        print(f"{i:>5} {count:>10,} {_ms(filtering, 50):>11.2f} {_ms(filtering, 95):>7.2f}"
+              f" {_ms(counting, 50):>10.2f} {_ms(ranking, 50):>10.2f} {_ms(faceting, 50):>11.2f}")
+
+    results = catalog.search(QUERIES[1], "year_new_to_old")
+    for number in (0, 1, 10, 100, results.page_count(args.page_size) - 1):
+        _, elapsed = _timed(lambda: results.page(number, args.page_size))
+        print(f"page {number + 1:>5,} of {results.page_count(args.page_size):,}: {elapsed * 1000:.2f} ms")
+
+    for text in TYPED:
+        suggesting, filtering = [], []
+        for end in range(1, len(text) + 1):
+            _, elapsed = _timed(lambda: catalog.suggest(text[:end]))
+            suggesting.append(elapsed)
+            _, elapsed = _timed(lambda: catalog.match({**QUERIES[1], "query": text[:end]}))
+            filtering.append(elapsed)
+        print(f"search {text!r} per keystroke: suggestions p50 {_ms(suggesting, 50):.2f} max {max(suggesting) * 1000:.2f} ms, "
+              f"filtered matches p50 {_ms(filtering, 50):.2f} max {max(filtering) * 1000:.2f} ms")
+
+    extra = synthetic_listings(args.batch, seed=1)
+    ids, elapsed = _timed(lambda: catalog.add(extra))
+    print(f"add {args.batch:,} listings: {elapsed * 1000:.1f} ms")
+    _, elapsed = _timed(lambda: catalog.remove(ids))
+    print(f"remove {args.batch:,} listings: {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
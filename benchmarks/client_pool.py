@@ -0,0 +1,81 @@
+"""Compare a fresh Groq client per call against the shared pooled client.
+
+Usage: ``python -m benchmarks.client_pool --sessions 20 --calls 10``
+
+Each simulated Streamlit session runs on its own thread and issues sequential
+completions against a local fake endpoint that charges ``--connect-delay``
+seconds for every new connection, standing in for the TCP + TLS handshake.
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import groq
+import httpx
+
+from benchmarks.fake_groq import start_server
+
+MESSAGES = [{"role": "user", "content": "Summarise the warranty terms."}]
+
+
+def _fresh_client_call():
+    # A new client means a new connection pool, as before the shared client existed
+    client = groq.Groq(api_key=os.environ["GROQ_API_KEY"], http_client=httpx.Client())
+    client.chat.completions.create(messages=MESSAGES, model="fake", max_tokens=16)
+
+
+def _pooled_client_call():
+    from utils.ai import get_client
+    get_client().chat.completions.create(messages=MESSAGES, model="fake", max_tokens=16)
+
+
+def _run(call, sessions, calls):
+    def session():
+        timings = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(lambda _: session(), range(sessions)))
+    return [t for timings in results for t in timings]
+
+
+def _report(label, timings, server, connections_before):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{label:<14} p50={statistics.median(timings) * 1000:7.1f} ms  "
+        f"p95={p95 * 1000:7.1f} ms  "
+        f"connections={server.counters['connections'] - connections_before}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pooled vs per-call Groq client benchmark")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--connect-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency, connect_delay=args.connect_delay)
+    os.environ["GROQ_BASE_URL"] = server.url
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+    before = server.counters["connections"]
+    _report("fresh client", _run(_fresh_client_call, args.sessions, args.calls), server, before)
+
+    from utils.ai import warm_client
+    warm_client()
+    before = server.counters["connections"]
+    _report("pooled client", _run(_pooled_client_call, args.sessions, args.calls), server, before)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Time fleet valuation with the vectorized depreciation engine vs a per-car loop.
+
+``python -m benchmarks.depreciation --cars 1000000 --horizon 5``
+
+Generates a synthetic fleet (price, age, condition, mileage) and values it
+with utils.depreciation at growing sizes, both from arrays and from a
+DataFrame, then times the one-car-at-a-time loop the Depreciation
+Predictor used to run on a sample and extrapolates it to the full fleet.
+Then times the Monte Carlo bands: one car at ``--paths`` paths, as the
+page runs it, and a batch of ``--mc-cars`` cars in one process and split
+across ``--workers`` processes.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.depreciation import (
+    BASE_RATES, CONDITIONS, HIGH_MILEAGE_RATE, MAX_MILEAGE_RATE, TYPICAL_KM_PER_YEAR, fleet_values, project_values,
+    value_bands,
+)
+
+
+def synthetic_fleet(cars, seed=0):
+    rng = np.random.default_rng(seed)
+    age = rng.integers(0, 12, size=cars)
+    return pd.DataFrame({
+        "price": rng.uniform(300000, 3000000, size=cars).round(-3),
+        "condition": rng.choice(CONDITIONS, size=cars, p=[0.3, 0.4, 0.2, 0.1]),
+        "age": age,
+        "mileage": (age * rng.normal(12000, 4000, size=cars)).clip(0).round(),
+    })
+
+
+def _loop(fleet, horizon):
+    """The Depreciation Predictor's original per-car projection, with the mileage premium."""
+    matrix = []
+    for price, condition, age, mileage in fleet.itertuples(index=False):
+        excess = max(mileage - TYPICAL_KM_PER_YEAR * max(age, 1), 0)
+        rate = BASE_RATES[condition] + min(excess / 10000 * HIGH_MILEAGE_RATE, MAX_MILEAGE_RATE)
+        values = [price]
+        for _ in range(horizon):
+            values.append(values[-1] * (1 - rate))
+        matrix.append(values)
+    return np.array(matrix)
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cars", type=int, default=1000000)
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--loop-sample", type=int, default=100000, help="Cars valued with the per-car loop")
+    parser.add_argument("--paths", type=int, default=10000, help="Monte Carlo paths per car")
+    parser.add_argument("--mc-cars", type=int, default=200, help="Cars in the Monte Carlo batch")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    fleet = synthetic_fleet(args.cars)
+    codes = pd.Index(CONDITIONS).get_indexer(fleet["condition"])
+    sizes = [n for n in (10000, 100000) if n < args.cars] + [args.cars]
+    print(f"{'cars':>10} {'arrays':>9} {'codes':>9} {'frame':>9} {'cars/s':>12} {'matrix MB':>10}  (times in ms)")
+    for size in sizes:
+        part = fleet.iloc[:size]
+        price, condition, age, mileage = (part[c].to_numpy() for c in ("price", "condition", "age", "mileage"))
+        values, from_arrays = _timed(lambda: project_values(price, condition, age, mileage, args.horizon))
+        _, from_codes = _timed(lambda: project_values(price, codes[:size], age, mileage, args.horizon))
+        _, from_frame = _timed(lambda: fleet_values(part, args.horizon))
+        print(f"{size:>10,} {from_arrays * 1000:>9.1f} {from_codes * 1000:>9.1f} {from_frame * 1000:>9.1f}"
+              f" {size / from_arrays:>12,.0f} {values.nbytes / 1e6:>10.1f}")
+
+    sample = fleet.iloc[:args.loop_sample]
+    looped, elapsed = _timed(lambda: _loop(sample, args.horizon))
+    assert np.allclose(looped, values[:args.loop_sample])
+    print(f"per-car loop: {args.loop_sample / elapsed:,.0f} cars/s, ~{elapsed * args.cars / args.loop_sample:,.0f}s "
+          f"for {args.cars:,} cars (base rates {', '.join(f'{c} {r:.0%}' for c, r in BASE_RATES.items())})")
+
+    car = fleet.iloc[0]
+    single = []
+    for seed in range(args.repeat):
+        _, elapsed = _timed(lambda: value_bands(car.price, car.condition, car.age, car.mileage, args.horizon, args.paths, seed))
+        single.append(elapsed)
+    print(f"Monte Carlo, 1 car x {args.paths:,} paths: p50 {np.percentile(single, 50) * 1000:.1f} ms, max {max(single) * 1000:.1f} ms")
+    batch = fleet.iloc[:args.mc_cars]
+    columns = [batch[c].to_numpy() for c in ("price", "condition", "age", "mileage")]
+    serial, elapsed = _timed(lambda: value_bands(*columns, args.horizon, args.paths, seed=0))
+    print(f"Monte Carlo, {args.mc_cars:,} cars x {args.paths:,} paths: {elapsed:.2f}s in one process")
+    pooled, elapsed = _timed(lambda: value_bands(*columns, args.horizon, args.paths, seed=0, workers=args.workers))
+    assert np.array_equal(serial, pooled)
+    print(f"Monte Carlo, {args.mc_cars:,} cars x {args.paths:,} paths: {elapsed:.2f}s across {args.workers} processes "
+          f"({os.cpu_count()} CPUs), same bands")
+
+
+if __name__ == "__main__":
+    main()
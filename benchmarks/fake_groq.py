@@ -0,0 +1,326 @@
+"""Local stand-in for the Groq chat-completions endpoint used by the benchmarks.
+
+Run it with ``python -m benchmarks.fake_groq --port 8787`` and point the app at it
+with ``GROQ_BASE_URL=http://127.0.0.1:8787``. Latency, token throughput and error
+rates are configurable (optionally per model), and ``--cassette`` replays responses recorded with
+``GROQ_CASSETTE_MODE=record`` so every page gets its real answer back.
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import cassette
+from utils.llm_cache import make_key
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+DEFAULT_SECTIONS = [
+    "## Summary", "🟢 The terms are broadly standard for the Indian market.",
+    "## Points to Watch", "🟡 Confirm the handling charges and the registration fee in writing.",
+    "## Risks", "🔴 The cancellation clause keeps half the booking amount.",
+    "## Recommendations", "Negotiate the add-ons and compare at least two dealers.",
+]
+
+
+def parse_distribution(spec):
+    """Turn a latency spec into a sampler of seconds.
+
+    Accepted forms: ``0.05`` (fixed), ``uniform:LOW,HIGH``, ``exponential:MEAN``,
+    ``normal:MEAN,SD`` and ``lognormal:MEDIAN,SIGMA``.
+    """
+    if callable(spec):
+        return spec
+    if isinstance(spec, (int, float)):
+        return lambda rng: float(spec)
+    name, _, args = str(spec).partition(":")
+    if not args:
+        value = float(name)
+        return lambda rng: value
+    values = [float(v) for v in args.split(",")]
+    if name == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if name == "exponential":
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    if name == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if name == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def default_reply(words):
+    """A markdown report of roughly ``words`` words built from DEFAULT_SECTIONS."""
+    text = []
+    while sum(len(line.split()) for line in text) < words:
+        text.extend(DEFAULT_SECTIONS)
+    return "\n\n".join(text)
+
+
+def split_tokens(text):
+    """Split text into word-sized pieces that join back to the original."""
+    pieces = []
+    start = 0
+    for i in range(1, len(text)):
+        if text[i] in " \n" and text[i - 1] not in " \n":
+            pieces.append(text[start:i])
+            start = i
+    pieces.append(text[start:])
+    return pieces
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Emulate the TCP + TLS handshake cost paid once per new connection
+        if self.server.connect_delay:
+            time.sleep(self.server.connect_delay)
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != COMPLETIONS_PATH:
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        self.server.count("requests")
+
+        fault = self.server.sample_fault()
+        if fault == 429:
+            self.server.count("rate_limited")
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                headers={"retry-after": str(self.server.retry_after)}
+            )
+            return
+        if fault == 500:
+            self.server.count("server_errors")
+            self._send_json(500, {"error": {"message": "Internal server error", "type": "internal_server_error"}})
+            return
+
+        model = request.get("model", "")
+        time.sleep(self.server.sample_latency(model))
+        chunks = self.server.reply_for(request)
+        if request.get("max_tokens"):
+            chunks = chunks[:request["max_tokens"]]
+        usage = {
+            "prompt_tokens": sum(len(str(m.get("content", ""))) for m in request.get("messages", [])) // 4,
+            "completion_tokens": len(chunks),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        if request.get("stream"):
+            self._send_stream(request, chunks, usage)
+            return
+        tokens_per_second = self.server.throughput(model)
+        if tokens_per_second:
+            time.sleep(len(chunks) / tokens_per_second)
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", ""),
+            "system_fingerprint": "fake",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(chunks)},
+                "finish_reason": "stop",
+                "logprobs": None
+            }],
+            "usage": usage
+        })
+
+    def _send_stream(self, request, chunks, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        tokens_per_second = self.server.throughput(request.get("model", ""))
+        token_delay = 1.0 / tokens_per_second if tokens_per_second else 0.0
+
+        def event(delta, finish_reason=None, x_groq=None):
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", ""),
+                "system_fingerprint": "fake",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+                "x_groq": x_groq
+            }
+
+        for chunk in chunks:
+            self._write_event(event({"role": "assistant", "content": chunk}))
+            if token_delay:
+                time.sleep(token_delay)
+        self._write_event(event({}, finish_reason="stop", x_groq={"id": completion_id, "usage": usage}))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_event(self, payload):
+        self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.05, connect_delay=0.0, tokens_per_second=0.0,
+                 tail_probability=0.0, tail_latency=1.0, rate_limit_rate=0.0, server_error_rate=0.0,
+                 retry_after=1.0, reply=None, reply_tokens=200, cassette_path=None, seed=None,
+                 model_latency=None, model_tokens_per_second=None):
+        super().__init__(address, FakeGroqHandler)
+        self.latency = parse_distribution(latency)
+        self.model_latency = {m: parse_distribution(spec) for m, spec in (model_latency or {}).items()}
+        self.model_tokens_per_second = dict(model_tokens_per_second or {})
+        self.connect_delay = connect_delay
+        self.tokens_per_second = tokens_per_second
+        self.tail_probability = tail_probability
+        self.tail_latency = tail_latency
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.retry_after = retry_after
+        self.default_chunks = split_tokens(reply if reply is not None else default_reply(reply_tokens))
+        self.recordings = cassette.load(cassette_path) if cassette_path else {}
+        self.counters = {"connections": 0, "requests": 0}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def handle_error(self, request, client_address):
+        # Clients closing a stream early (hedge losers, cancelled pages) is expected
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    def sample_latency(self, model=None):
+        with self._lock:
+            if self._rng.random() < self.tail_probability:
+                return self.tail_latency
+            return self.model_latency.get(model, self.latency)(self._rng)
+
+    def throughput(self, model):
+        return self.model_tokens_per_second.get(model, self.tokens_per_second)
+
+    def sample_fault(self):
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.server_error_rate:
+            return 500
+        return None
+
+    def reply_for(self, request):
+        """Recorded chunks for this exact request, or the default reply."""
+        if self.recordings:
+            entry = self.recordings.get(make_key(request))
+            if entry is not None:
+                self.count("replayed")
+                return entry["chunks"]
+            self.count("unrecorded")
+        return self.default_chunks
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(host="127.0.0.1", port=0, **options):
+    """Start a fake Groq server on a background thread and return it."""
+    server = FakeGroqServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="fake-groq", daemon=True).start()
+    return server
+
+
+def add_server_arguments(parser):
+    """Register the fake server's tuning flags on ``parser``."""
+    parser.add_argument("--latency", default="0.05", help="Seconds before the first token, or a distribution such as lognormal:0.3,0.6")
+    parser.add_argument("--connect-delay", type=float, default=0.0, help="Seconds per new connection")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Output throughput; 0 sends everything at once")
+    parser.add_argument("--tail-probability", type=float, default=0.0, help="Share of requests that take --tail-latency")
+    parser.add_argument("--tail-latency", type=float, default=1.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="Share of requests answered with 500")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after seconds sent with 429s")
+    parser.add_argument("--reply-tokens", type=int, default=200, help="Length of the default reply in words")
+    parser.add_argument("--cassette", help="Replay responses recorded in this cassette file")
+    parser.add_argument("--seed", type=int, help="Seed latency and fault sampling for repeatable runs")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+                        help="First-token latency for one model, e.g. llama-3.1-8b-instant=lognormal:0.1,0.3")
+    parser.add_argument("--model-tokens-per-second", action="append", default=[], metavar="MODEL=N",
+                        help="Output throughput for one model")
+
+
+def _per_model(values, cast=str):
+    return {model: cast(value) for model, _, value in (v.partition("=") for v in values)}
+
+
+def server_options(args):
+    return dict(
+        latency=args.latency,
+        connect_delay=args.connect_delay,
+        tokens_per_second=args.tokens_per_second,
+        tail_probability=args.tail_probability,
+        tail_latency=args.tail_latency,
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate,
+        retry_after=args.retry_after,
+        reply_tokens=args.reply_tokens,
+        cassette_path=args.cassette,
+        seed=args.seed,
+        model_latency=_per_model(args.model_latency),
+        model_tokens_per_second=_per_model(args.model_tokens_per_second, float)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeGroqServer((args.host, args.port), **server_options(args))
+    print(f"Fake Groq endpoint listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Time bulk valuation of an uploaded inventory and check its memory stays bounded.
+
+``python -m benchmarks.fleet --rows 1000000 --workers 4``
+
+Writes a synthetic dealer inventory CSV (messy mileage and condition
+spellings, some unusable rows), then values it with utils.fleet in one
+process and across ``--workers`` processes, streaming the results to a
+CSV. Reports throughput, the peak resident memory of the run against the
+input and output file sizes, and the outliers kept for the AI. With
+``--paths`` each car also gets a simulated likely range.
+"""
+import argparse
+import os
+import resource
+import tempfile
+
+import numpy as np
+
+from utils.catalog import synthetic_listings
+from utils.fleet import value_fleet
+
+
+def synthetic_inventory(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = synthetic_listings(rows, seed=seed).drop(columns=["lat", "lon", "body_type", "seating"])
+    age = (2024 - frame["year"]).clip(lower=1)
+    frame["km_driven"] = (age * rng.normal(12000, 6000, size=rows)).clip(0).round(-2).astype(np.int64).map("{:,} km".format)
+    frame["condition"] = rng.choice(["Excellent", "good", "FAIR", "Poor", "", "like new"], size=rows)
+    frame.loc[::97, "price"] = 0
+    return frame
+
+
+def _peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=20000)
+    parser.add_argument("--paths", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "inventory.csv")
+        for start in range(0, args.rows, 50000):
+            part = synthetic_inventory(min(50000, args.rows - start), seed=start)
+            part.to_csv(source, mode="a" if start else "w", header=not start, index=False)
+        del part
+        before = _peak_mb()
+        print(f"{args.rows:,} cars, {os.path.getsize(source) / 1e6:.0f} MB of CSV; {before:.0f} MB resident after writing it")
+
+        for workers in dict.fromkeys((1, args.workers)):
+            out = os.path.join(directory, f"valued-{workers}.csv")
+            stats, outliers = value_fleet(source, out, workers=workers, chunk_rows=args.chunk_rows, paths=args.paths, seed=0)
+            print(f"{workers} worker(s): {stats['valued']:,} valued, {stats['rejected']:,} skipped, {stats['flagged']:,} flagged "
+                  f"in {stats['seconds']:.1f}s ({stats['rows'] / stats['seconds']:,.0f} rows/s); "
+                  f"{os.path.getsize(out) / 1e6:.0f} MB written, peak resident {_peak_mb():.0f} MB")
+        print(f"{len(outliers)} outliers kept for the AI, yearly rates {outliers['yearly_rate'].min():.3f}-{outliers['yearly_rate'].max():.3f}")
+
+
+if __name__ == "__main__":
+    main()
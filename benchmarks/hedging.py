@@ -0,0 +1,83 @@
+"""Measure how hedged requests tighten tail latency.
+
+Usage: ``python -m benchmarks.hedging --requests 1000 --tail-probability 0.05``
+
+The fake endpoint answers most requests in ``--latency`` seconds and a
+``--tail-probability`` fraction in ``--tail-latency`` seconds. The same
+request mix is run with hedging off and on, each after ``--warmup``
+untimed requests, so the hedge policy has the latency history and
+budget a running app would.
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_groq import start_server
+
+
+def _percentile(timings, pct):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _run(requests, concurrency, stream):
+    from utils.ai import groq_chat_completion, groq_chat_stream
+
+    def call(i):
+        messages = [{"role": "user", "content": f"Compare models, request {i} {time.time_ns()}"}]
+        start = time.perf_counter()
+        if stream:
+            next(iter(groq_chat_stream(messages, page="model_comparison")))
+        else:
+            groq_chat_completion(messages, page="model_comparison")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(call, range(requests)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hedged request benchmark")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--tail-probability", type=float, default=0.05)
+    parser.add_argument("--tail-latency", type=float, default=1.0)
+    parser.add_argument("--stream", action="store_true", help="Measure time to first token")
+    args = parser.parse_args()
+
+    server = start_server(
+        latency=args.latency,
+        tail_probability=args.tail_probability,
+        tail_latency=args.tail_latency
+    )
+    os.environ["GROQ_BASE_URL"] = server.url
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ["LLM_CACHE_DISABLED"] = "1"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+    os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "100000")
+    os.environ.setdefault("GROQ_TOKENS_PER_MINUTE", "100000000")
+
+    from utils.ai import hedge_stats
+
+    for hedging in ("0", "1"):
+        os.environ["GROQ_HEDGING"] = hedging
+        _run(args.warmup, args.concurrency, args.stream)
+        before = server.counters["requests"]
+        timings = _run(args.requests, args.concurrency, args.stream)
+        print(
+            f"hedging={'on ' if hedging == '1' else 'off'} "
+            f"p50={_percentile(timings, 50) * 1000:6.0f} ms  "
+            f"p95={_percentile(timings, 95) * 1000:6.0f} ms  "
+            f"p99={_percentile(timings, 99) * 1000:6.0f} ms  "
+            f"upstream={server.counters['requests'] - before}"
+        )
+    print(hedge_stats())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Stream a large dealer inventory feed into the catalog: throughput and peak memory.
+
+``python -m benchmarks.ingest --rows 5000000``
+
+Writes a synthetic CSV feed with dealer-style formatting (Indian price
+strings, mixed-case and aliased makes, VINs on most rows, a share of
+re-sent duplicates), ingests it into an empty catalog in chunks, then
+applies a delta feed of updates, deletes and new listings.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.catalog import Catalog, synthetic_listings
+from utils.ingest import ingest
+
+MAKE_SPELLINGS = {"Maruti Suzuki": "maruti", "Volkswagen": "VW", "Tata": "TATA MOTORS", "Mahindra": "Mahindra & Mahindra"}
+
+
+def _inr(prices):
+    """Format rupee amounts the Indian way: 16,50,000 and 1,05,00,000."""
+    prices = pd.Series(prices, dtype=np.int64)
+    crore, lakh = prices // 10000000, (prices // 100000) % 100
+    thousand, rest = (prices // 1000) % 100, prices % 1000
+    text = lakh.astype(str) + "," + thousand.astype(str).str.zfill(2) + "," + rest.astype(str).str.zfill(3)
+    with_crore = crore.astype(str) + "," + lakh.astype(str).str.zfill(2) + text.str.split(",", n=1).str[1].radd(",")
+    return text.where(crore == 0, with_crore).where(prices >= 100000, prices.astype(str))
+
+
+def _feed_chunk(rows, seed, first_id):
+    rng = np.random.default_rng(seed)
+    listings = synthetic_listings(rows, seed=seed)
+    feed = pd.DataFrame({
+        "VIN": [f"MA3{n:014d}" for n in range(first_id, first_id + rows)],
+        "Brand": listings["make"].replace(MAKE_SPELLINGS),
+        "Model": listings["model"].str.lower(),
+        "Trim": listings["variant"],
+        "asking_price": _inr(listings["price"]),
+        "model_year": listings["year"],
+        "fuel": listings["fuel_type"].str.lower(),
+        "gearbox": listings["transmission"].replace({"Automatic": "AT", "Manual": "MT"}),
+        "seats": listings["seating"],
+    })
+    feed.loc[rng.random(rows) < 0.3, "VIN"] = ""
+    # Dealers re-send a few listings verbatim
+    repeats = feed.sample(frac=0.02, random_state=seed)
+    return pd.concat([feed, repeats], ignore_index=True)
+
+
+def write_feed(path, rows, chunk_rows):
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < rows:
+            chunk = _feed_chunk(min(chunk_rows, rows - written), seed=written, first_id=written)
+            chunk.to_csv(f, index=False, header=written == 0)
+            written += min(chunk_rows, rows - written)
+
+
+def write_delta(path, rows, chunk_rows):
+    """Updates and deletes for listings from the first base chunk, plus new listings."""
+    base = _feed_chunk(chunk_rows, seed=0, first_id=0)
+    base = base[base["VIN"] != ""].drop_duplicates("VIN").sample(n=rows // 2 + rows // 4, random_state=7)
+    updated, deleted = base.iloc[:rows // 2].copy(), base.iloc[rows // 2:].copy()
+    updated["asking_price"] = _inr(updated["asking_price"].str.replace(",", "").astype(np.int64) * 97 // 100)
+    deleted["action"] = "delete"
+    added = _feed_chunk(rows - len(updated) - len(deleted), seed=10 ** 9, first_id=10 ** 12)
+    pd.concat([updated, deleted, added], ignore_index=True).to_csv(path, index=False)
+
+
+def _peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--chunk-rows", type=int, default=250000)
+    parser.add_argument("--delta-rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        feed = os.path.join(directory, "feed.csv")
+        started = time.perf_counter()
+        # Written from a child process so the peak RSS below is the ingest's own
+        writer = multiprocessing.Process(target=write_feed, args=(feed, args.rows, args.chunk_rows))
+        writer.start()
+        writer.join()
+        print(f"wrote {os.path.getsize(feed) / 1e6:.0f} MB feed in {time.perf_counter() - started:.1f}s")
+
+        catalog = Catalog.empty()
+        stats = ingest(catalog, feed, args.chunk_rows)
+        print(f"base feed: {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+              f"= {stats['rows'] / stats['seconds']:,.0f} rows/s, peak RSS {_peak_mb():.0f} MB")
+        print({k: v for k, v in stats.items() if k != "seconds"})
+
+        delta = os.path.join(directory, "delta.csv")
+        write_delta(delta, args.delta_rows, args.chunk_rows)
+        stats = ingest(catalog, delta, args.chunk_rows)
+        print(f"delta feed: {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+              f"= {stats['rows'] / stats['seconds']:,.0f} rows/s, peak RSS {_peak_mb():.0f} MB")
+        print({k: v for k, v in stats.items() if k != "seconds"})
+        print(f"catalog: {catalog.live.count():,} live listings")
+
+
+if __name__ == "__main__":
+    main()
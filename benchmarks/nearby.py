@@ -0,0 +1,68 @@
+"""Time "within N km of" Car Browser searches against a scan of every listing.
+
+``python -m benchmarks.nearby --rows 1000000``
+
+Builds a synthetic catalog, then for a few cities and radii times the
+grid-indexed radius query (Catalog.near), the same query combined with
+other filters, and sorting the matches nearest first, and compares each
+with computing the distance to every listing. Results are checked
+against the scan.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.catalog import Catalog, synthetic_listings
+from utils.geo import distance_km, geocode
+
+PLACES = ["Bengaluru", "Mumbai", "110001", "Kochi", "Guwahati"]
+RADII = [10, 50, 200]
+FILTERS = {"price_range": (500000, 2000000), "year_range": (2019, 2024), "body_type": ["SUV"]}
+
+
+def _ms(times, pct):
+    return np.percentile(times, pct) * 1000
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog, indexed = _timed(lambda: Catalog.from_frame(synthetic_listings(args.rows)))
+    print(f"{args.rows:,} rows: built and indexed in {indexed:.2f}s")
+    lat, lon = catalog.numeric["lat"], catalog.numeric["lon"]
+
+    print(f"{'place':>10} {'km':>4} {'within':>8} {'index p50':>10} {'p95':>6} {'scan p50':>9} {'+filters p50':>13} {'nearest p50':>12}  (ms)")
+    for place in PLACES:
+        _, origin_lat, origin_lon = geocode(place)
+        for km in RADII:
+            filters = {**FILTERS, "location": place, "radius_km": km}
+            indexed, scanned, combined, sorting = [], [], [], []
+            for _ in range(args.repeat):
+                # Forget the memoized bitmap so every repeat does the lookup
+                catalog._near = None
+                within, elapsed = _timed(lambda: catalog.near(origin_lat, origin_lon, km))
+                indexed.append(elapsed)
+                expected, elapsed = _timed(lambda: np.flatnonzero(distance_km(lat, lon, origin_lat, origin_lon) <= km))
+                scanned.append(elapsed)
+                catalog._near = None
+                matches, elapsed = _timed(lambda: catalog.match(filters))
+                combined.append(elapsed)
+                _, elapsed = _timed(lambda: catalog.search(filters, "nearest", matches=matches).page(0, 25))
+                sorting.append(elapsed)
+            assert np.array_equal(within.to_indices(), expected), (place, km)
+            print(f"{place:>10} {km:>4} {within.count():>8,} {_ms(indexed, 50):>10.2f} {_ms(indexed, 95):>6.2f}"
+                  f" {_ms(scanned, 50):>9.2f} {_ms(combined, 50):>13.2f} {_ms(sorting, 50):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
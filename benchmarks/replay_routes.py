@@ -0,0 +1,86 @@
+"""Replay recorded page prompts against the fake endpoint and report per-page latency.
+
+Record a cassette by running the app against Groq with
+``GROQ_CASSETTE_MODE=record`` and using each page once, then run:
+
+``python -m benchmarks.replay_routes --cassette .cache/cassette.jsonl --repeat 5``
+
+Requests go through the full client stack (scheduler, coalescing, streaming)
+while the fake server plays back the recorded answers with the chosen latency
+and token throughput, so runs are repeatable and need no network.
+"""
+import argparse
+import collections
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_groq import add_server_arguments, server_options, start_server
+from utils import cassette
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-page replay benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Times each recorded request is replayed")
+    parser.add_argument("--concurrency", type=int, default=4)
+    add_server_arguments(parser)
+    parser.set_defaults(latency="lognormal:0.3,0.4", tokens_per_second=250.0, seed=7)
+    args = parser.parse_args()
+    args.cassette = args.cassette or cassette.path()
+
+    entries = list(cassette.load(args.cassette).values())
+    if not entries:
+        parser.error(f"No recordings in {args.cassette}")
+
+    server = start_server(**server_options(args))
+    os.environ["GROQ_BASE_URL"] = server.url
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ["GROQ_CASSETTE_MODE"] = ""
+    os.environ["LLM_CACHE_DISABLED"] = "1"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+    os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "100000")
+    os.environ.setdefault("GROQ_TOKENS_PER_MINUTE", "100000000")
+
+    from utils.ai import groq_chat_stream
+
+    def replay(entry):
+        start = time.perf_counter()
+        stream = groq_chat_stream(entry["messages"], page=entry["page"])
+        first = None
+        for _ in stream:
+            if first is None:
+                first = time.perf_counter() - start
+        return entry["page"], first or 0.0, time.perf_counter() - start
+
+    # Round-robin so concurrent workers mostly replay different requests
+    jobs = [entry for _ in range(args.repeat) for entry in entries]
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(replay, jobs))
+
+    by_page = collections.defaultdict(list)
+    for page, first, total in results:
+        by_page[page or "unknown"].append((first, total))
+    print(f"{'page':<24}{'calls':>6}{'ttft p50':>11}{'ttft p95':>11}{'total p50':>11}{'total p95':>11}")
+    for page, timings in sorted(by_page.items()):
+        firsts = [t[0] * 1000 for t in timings]
+        totals = [t[1] * 1000 for t in timings]
+        print(
+            f"{page:<24}{len(timings):>6}"
+            f"{_percentile(firsts, 50):>9.0f}ms{_percentile(firsts, 95):>9.0f}ms"
+            f"{_percentile(totals, 50):>9.0f}ms{_percentile(totals, 95):>9.0f}ms"
+        )
+    print(
+        f"upstream requests={server.counters['requests']} "
+        f"replayed={server.counters.get('replayed', 0)} unrecorded={server.counters.get('unrecorded', 0)}"
+    )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Train the residual-value model on synthetic sales history and time its predictions.
+
+``python -m benchmarks.residual_model --rows 1000000``
+
+Generates past sales whose yearly depreciation depends on make, fuel,
+transmission, city, condition, age and mileage (plus noise), writes them
+to a CSV, and runs the training pipeline on 80% of them. Reports training
+time, the artifact size, the yearly rate error on the held-out 20%
+against the fixed base rates, and the time to predict one car and a
+whole fleet.
+"""
+import argparse
+import os
+import tempfile
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from utils.catalog import synthetic_listings
+from utils.depreciation import BASE_RATES, CONDITIONS, CURRENT_YEAR, TYPICAL_KM_PER_YEAR
+from utils.residual_model import ResidualModel, load_history, save, train
+
+FUEL_EFFECTS = {"Diesel": 0.01, "Electric": -0.03, "CNG": 0.005}
+TRANSMISSION_EFFECTS = {"Automatic": 0.008, "CVT": 0.004}
+
+
+def synthetic_history(rows, seed=0):
+    """Past sales with a known yearly log value retention per car."""
+    rng = np.random.default_rng(seed)
+    frame = synthetic_listings(rows, seed=seed)
+    makes = frame["make"].unique()
+    make_effects = dict(zip(makes, rng.normal(0, 0.02, size=len(makes))))
+    cities = frame["city"].unique()
+    city_effects = dict(zip(cities, rng.normal(0, 0.01, size=len(cities))))
+    age = rng.integers(1, 11, size=rows)
+    condition = rng.choice(CONDITIONS, size=rows, p=[0.3, 0.4, 0.2, 0.1])
+    mileage = (age * rng.normal(TYPICAL_KM_PER_YEAR, 4000, size=rows)).clip(1000).round(-2)
+    retention = (
+        np.log1p(-pd.Series(condition).map(BASE_RATES).to_numpy())
+        + frame["make"].map(make_effects).to_numpy()
+        + frame["fuel_type"].map(FUEL_EFFECTS).fillna(0).to_numpy()
+        + frame["transmission"].map(TRANSMISSION_EFFECTS).fillna(0).to_numpy()
+        + frame["city"].map(city_effects).to_numpy()
+        - 0.01 * (mileage / age - TYPICAL_KM_PER_YEAR) / 10000
+        + 0.004 * (age - 5)
+        + rng.normal(0, 0.02, size=rows)
+    )
+    new_price = rng.uniform(400000, 3000000, size=rows).round(-3)
+    return pd.DataFrame({
+        "make": frame["make"],
+        "model": frame["model"],
+        "fuel_type": frame["fuel_type"],
+        "transmission": frame["transmission"],
+        "city": frame["city"],
+        "year": CURRENT_YEAR - age,
+        "sale_year": CURRENT_YEAR,
+        "price": (new_price * np.exp(retention * age)).round(-3),
+        "new_price": new_price,
+        "mileage": mileage,
+        "condition": condition,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.rows)
+    split = int(len(history) * 0.8)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.csv")
+        history.iloc[:split].to_csv(path, index=False)
+        started = time.perf_counter()
+        loaded, _ = load_history(path)
+        read = time.perf_counter() - started
+        artifact = train(loaded)
+        fitted = time.perf_counter() - started - read
+        save(artifact, os.path.join(directory, "model.json"))
+        size = os.path.getsize(os.path.join(directory, "model.json"))
+    print(f"{split:,} listings: read and normalized in {read:.1f}s, fitted in {fitted:.1f}s, artifact {size / 1000:.1f} KB")
+
+    model = ResidualModel(artifact)
+    held = history.iloc[split:]
+    age = (held["sale_year"] - held["year"]).to_numpy(dtype=np.float64)
+    actual = 1 - (held["price"] / held["new_price"]).to_numpy() ** (1 / age)
+    predicted = model.rates(held, age, held["mileage"].to_numpy())
+    base = held["condition"].map(BASE_RATES).to_numpy()
+    print(f"held-out yearly rate error: mean {np.mean(np.abs(predicted - actual)) * 100:.2f} points "
+          f"(base rates {np.mean(np.abs(base - actual)) * 100:.2f})")
+
+    car = held.iloc[0][["make", "model", "fuel_type", "transmission", "city", "condition"]].tolist()
+    car_age, car_mileage = float(age[0]), float(held["mileage"].iloc[0])
+    calls = 100000
+    elapsed = timeit.timeit(lambda: model.rate(*car, car_age, car_mileage), number=calls)
+    print(f"one car: {elapsed / calls * 1e6:.1f} µs per rate()")
+    started = time.perf_counter()
+    model.rates(history, CURRENT_YEAR - history["year"].to_numpy(), history["mileage"].to_numpy())
+    print(f"{len(history):,} cars: {time.perf_counter() - started:.2f}s with rates()")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Build the precomputed residual-value table and time lookups against computing each value.
+
+``python -m benchmarks.residual_table --rows 200000``
+
+Trains a residual-value model on synthetic sales history, builds the
+table from it, then changes one make's effect and rebuilds from the
+first table to show that the shared grid is reused and only the
+offsets are refreshed, and then the intercept, which the grid depends on.
+Reports build times, the file size, the time to look up one value and a
+five-year curve, and the interpolation error at random off-grid ages and
+mileages against the model itself.
+"""
+import argparse
+import os
+import tempfile
+import time
+import timeit
+
+import numpy as np
+
+from benchmarks.residual_model import synthetic_history
+from utils.depreciation import CONDITIONS
+from utils.residual_model import ResidualModel, train
+from utils.residual_table import FUELS, build, load, write
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--samples", type=int, default=10000)
+    args = parser.parse_args()
+
+    artifact = train(synthetic_history(args.rows))
+    model = ResidualModel(artifact)
+    started = time.perf_counter()
+    table, _ = build(model)
+    print(f"{len(table.keys):,} models, {len(FUELS)} fuels x {len(CONDITIONS)} conditions grid: built in {time.perf_counter() - started:.3f}s")
+
+    make = next(iter(artifact["effects"]["make"]))
+    artifact["effects"]["make"][make] += 0.01
+    artifact["trained_at"] += 1
+    started = time.perf_counter()
+    table, computed = build(ResidualModel(artifact), table)
+    print(f"after changing {make}: grid {'recomputed' if computed else 'reused'}, rebuilt in {time.perf_counter() - started:.3f}s")
+    artifact["intercept"] += 0.001
+    artifact["trained_at"] += 1
+    started = time.perf_counter()
+    table, computed = build(ResidualModel(artifact), table)
+    print(f"after changing the intercept: grid {'recomputed' if computed else 'reused'}, rebuilt in {time.perf_counter() - started:.3f}s")
+    model = ResidualModel(artifact)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "residual_table.bin")
+        write(table, path)
+        size = os.path.getsize(path)
+        started = time.perf_counter()
+        table = load(path)
+        print(f"file {size / 1e6:.2f} MB, mapped in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+        rng = np.random.default_rng(0)
+        keys = rng.choice(table.keys, size=args.samples)
+        fuels = rng.choice(FUELS[1:], size=args.samples)
+        conditions = rng.choice(CONDITIONS, size=args.samples)
+        ages = rng.uniform(1, 15, size=args.samples)
+        mileages = ages * rng.uniform(5000, 25000, size=args.samples)
+        cars = [(*key.split("|", 1), fuel, condition, age, mileage)
+                for key, fuel, condition, age, mileage in zip(keys, fuels, conditions, ages, mileages)]
+        looked_up = np.array([table.residual(*car) for car in cars])
+        exact = np.array([
+            (1 - model.rate(make, name, fuel, "", "", condition, age, mileage)) ** age
+            for make, name, fuel, condition, age, mileage in cars
+        ])
+        error = np.abs(looked_up / exact - 1)
+        print(f"off-grid error against the model: mean {error.mean() * 100:.3f}%, max {error.max() * 100:.3f}%")
+
+        car = cars[0]
+        calls = 100000
+        elapsed = timeit.timeit(lambda: table.residual(*car), number=calls)
+        print(f"one value: {elapsed / calls * 1e6:.1f} µs per residual()")
+        elapsed = timeit.timeit(lambda: model.rate(car[0], car[1], car[2], "", "", *car[3:]), number=calls)
+        print(f"          {elapsed / calls * 1e6:.1f} µs per model rate()")
+        calls = 10000
+        elapsed = timeit.timeit(lambda: table.curve(1000000, *car), number=calls)
+        print(f"five-year curve: {elapsed / calls * 1e6:.1f} µs per curve()")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Compare model routing policies: per-page latency, model mix and token use.
+
+``python -m benchmarks.routing --repeat 5``
+
+Each policy (quality, latency, auto) replays the same per-page prompts
+through the full client stack against the fake endpoint, where the small
+model answers faster than the 70B one. Pass ``--cassette`` to use prompts
+recorded from the real pages instead of the built-in samples.
+"""
+import argparse
+import collections
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_groq import add_server_arguments, server_options, start_server
+from utils import cassette, routing, telemetry
+
+SAMPLE_REQUESTS = [
+    ("ai_assistant", "You are an expert AI car shopping assistant for the Indian market.", "hi"),
+    ("ai_assistant", "You are an expert AI car shopping assistant for the Indian market.",
+     "Which is better for city driving, a hatchback or a compact SUV?"),
+    ("ai_assistant", "You are an expert AI car shopping assistant for the Indian market.",
+     "Compare the loan EMI and insurance cost of a Creta versus a Seltos over five years."),
+    ("car_browser", "You are an expert car search assistant for the Indian market.",
+     "Price Range: ₹5,00,000 - ₹12,00,000\nBody Types: SUV, Hatchback\nFuel Types: Petrol\n"
+     "Transmission: Automatic\nSeating Capacity: 5\nYear Range: 2021 - 2024\nSort By: Price: Low to High"),
+    ("depreciation_predictor", "You are an expert in car depreciation and resale value prediction.",
+     "Car: Hyundai Creta SX, 2022, ₹14,50,000, 25,000 km, Petrol, Delhi. Predict the value for 5 years."),
+    ("ai_insights", "You are an expert automotive market analyst.",
+     "Analyse these prices and running costs: " + ", ".join(f"Model {i}: ₹{8 + i},00,000" for i in range(40))),
+    ("financial_advisor", "You are an expert car financial advisor for India.",
+     "Car price ₹12,00,000, down payment ₹2,00,000, loan 5 years at 9.5% interest. Is this a good deal?"),
+    ("policy_scanner", "You are an expert in automotive dealer policies.",
+     "Booking amount is non-refundable. Warranty void if serviced outside the dealer network. " * 10),
+    ("fine_print_analyzer", "You are an expert in analysing car purchase agreements.",
+     "The buyer agrees to the following clauses of the sale agreement and loan contract. " * 20),
+    ("model_comparison", "You are an expert car comparison analyst.",
+     "Compare Tata Nexon, Hyundai Venue and Kia Sonet on price, mileage, safety and features."),
+]
+
+
+def _sample_entries():
+    return [
+        {"page": page, "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}]}
+        for page, system, user in SAMPLE_REQUESTS
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model routing benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Times each request is sent per policy")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--policies", default=",".join(("quality", "latency", "auto")))
+    add_server_arguments(parser)
+    parser.set_defaults(
+        latency="lognormal:0.35,0.4",
+        tokens_per_second=250.0,
+        reply_tokens=600,
+        seed=7,
+        model_latency=[f"{routing.FAST_MODEL}=lognormal:0.12,0.3"],
+        model_tokens_per_second=[f"{routing.FAST_MODEL}=750"]
+    )
+    args = parser.parse_args()
+    entries = list(cassette.load(args.cassette).values()) if args.cassette else _sample_entries()
+    # The prompts are played back from the cassette on our side; the server sends its default reply
+    args.cassette = None
+
+    server = start_server(**server_options(args))
+    os.environ["GROQ_BASE_URL"] = server.url
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ["GROQ_CASSETTE_MODE"] = ""
+    os.environ["LLM_CACHE_DISABLED"] = "1"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+    os.environ["LLM_TELEMETRY_LOG"] = ""
+    os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "100000")
+    os.environ.setdefault("GROQ_TOKENS_PER_MINUTE", "100000000")
+
+    from utils.ai import groq_chat_stream
+
+    def send(entry):
+        for _ in groq_chat_stream(entry["messages"], page=entry["page"]):
+            pass
+
+    jobs = [entry for _ in range(args.repeat) for entry in entries]
+    print(
+        f"{'policy':<9}{'page':<24}{'fast':>6}{'ttft p50':>10}{'p50':>9}{'p95':>9}"
+        f"{'prompt tok':>12}{'output tok':>12}"
+    )
+    for policy in args.policies.split(","):
+        os.environ["GROQ_ROUTING_POLICY"] = policy
+        telemetry.registry.reset()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(send, jobs))
+
+        fast = collections.Counter()
+        for entry in entries:
+            fast[entry["page"]] += routing.classify(entry["messages"], entry["page"]) == "fast"
+        per_page = collections.Counter(entry["page"] for entry in entries)
+        totals = collections.Counter()
+        for page, metrics in sorted(telemetry.registry.snapshot().items()):
+            calls = metrics["calls"]
+            totals["calls"] += calls
+            totals["latency"] += metrics["latency"]["mean"] * calls
+            totals["prompt"] += metrics.get("prompt_tokens", 0)
+            totals["output"] += metrics.get("completion_tokens", 0)
+            print(
+                f"{policy:<9}{page:<24}{fast[page] / per_page[page]:>6.0%}"
+                f"{metrics['ttft']['p50'] * 1000:>8.0f}ms"
+                f"{metrics['latency']['p50'] * 1000:>7.0f}ms{metrics['latency']['p95'] * 1000:>7.0f}ms"
+                f"{metrics.get('prompt_tokens', 0) / calls:>12.0f}{metrics.get('completion_tokens', 0) / calls:>12.0f}"
+            )
+        print(
+            f"{policy:<9}all pages: mean latency {totals['latency'] / totals['calls'] * 1000:.0f}ms, "
+            f"{totals['prompt'] / totals['calls']:.0f} prompt and {totals['output'] / totals['calls']:.0f} "
+            f"output tokens per call\n"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
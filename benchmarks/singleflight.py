@@ -0,0 +1,56 @@
+"""Load test for in-flight request coalescing.
+
+Usage: ``python -m benchmarks.singleflight --sessions 50 --prompts 2``
+
+Every simulated session requests one of ``--prompts`` distinct prompts at the
+same moment. With coalescing the fake endpoint should see one request per
+unique prompt. The response cache is disabled so only coalescing is measured.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_groq import start_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-flight load test")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--prompts", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--stream", action="store_true", help="Use groq_chat_stream instead of groq_chat_completion")
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency)
+    os.environ["GROQ_BASE_URL"] = server.url
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ["LLM_CACHE_DISABLED"] = "1"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+
+    from utils.ai import groq_chat_completion, groq_chat_stream
+
+    barrier = threading.Barrier(args.sessions)
+
+    def session(i):
+        messages = [{"role": "user", "content": f"Analyze market data #{i % args.prompts}"}]
+        barrier.wait()
+        start = time.perf_counter()
+        if args.stream:
+            "".join(groq_chat_stream(messages, page="ai_insights"))
+        else:
+            groq_chat_completion(messages, page="ai_insights")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        timings = sorted(pool.map(session, range(args.sessions)))
+
+    print(f"sessions={args.sessions} unique prompts={args.prompts} upstream requests={server.counters['requests']}")
+    print(f"latency p50={timings[len(timings) // 2] * 1000:.0f} ms  max={timings[-1] * 1000:.0f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Cold start and memory of Car Browser workers mapping one catalog snapshot vs building their own.
+
+``python -m benchmarks.snapshot --rows 2000000 --workers 4``
+
+Publishes a snapshot of a synthetic catalog, then starts fresh worker
+processes that each map it and run the Car Browser queries, and compares
+them with a worker that builds the catalog itself. Memory is the
+proportional set size (shared pages split between the processes mapping
+them), read from /proc on Linux.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.catalog import QUERIES
+from utils import catalog_snapshot
+from utils.catalog import Catalog, synthetic_listings
+
+
+def _memory_mb():
+    """(RSS, PSS) of this process in MB, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {name: value for name, _, value in (line.partition(":") for line in f)}
+    except OSError:
+        return None
+    return int(fields["Rss"].split()[0]) / 1024, int(fields["Pss"].split()[0]) / 1024
+
+
+def _browse(catalog):
+    for filters in QUERIES:
+        catalog.facet_counts(filters)
+        catalog.search(filters).page(0, 25)
+
+
+def _mapped_worker(path, ready, done, results):
+    started = time.perf_counter()
+    catalog = catalog_snapshot.load(path)
+    loaded = time.perf_counter() - started
+    _browse(catalog)
+    first_queries = time.perf_counter() - started - loaded
+    ready.wait()
+    results.put(("mapped", loaded, first_queries, _memory_mb()))
+    done.wait()
+
+
+def _building_worker(rows, results):
+    started = time.perf_counter()
+    catalog = Catalog.from_frame(synthetic_listings(rows))
+    loaded = time.perf_counter() - started
+    _browse(catalog)
+    results.put(("built", loaded, time.perf_counter() - started - loaded, _memory_mb()))
+
+
+def _report(kind, loaded, first_queries, memory):
+    memory = f"RSS {memory[0]:,.0f} MB, PSS {memory[1]:,.0f} MB" if memory else "memory n/a"
+    print(f"{kind:>6}: ready in {loaded * 1000:,.1f} ms, first queries {first_queries * 1000:,.0f} ms, {memory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    context = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["CATALOG_SNAPSHOT_DIR"] = directory
+        started = time.perf_counter()
+        catalog = Catalog.from_frame(synthetic_listings(args.rows))
+        built = time.perf_counter() - started
+        name = catalog_snapshot.publish(catalog)
+        path = os.path.join(directory, name)
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        print(f"{args.rows:,} rows: built in {built:.1f}s, snapshot {size / 1e6:,.0f} MB "
+              f"published in {time.perf_counter() - started - built:.2f}s")
+        del catalog
+
+        results = context.Queue()
+        ready, done = context.Barrier(args.workers + 1), context.Event()
+        workers = [context.Process(target=_mapped_worker, args=(path, ready, done, results)) for _ in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        # Every worker holds its mapping until all have reported, so PSS shows the sharing
+        ready.wait()
+        for _ in workers:
+            _report(*results.get())
+        done.set()
+        for worker in workers:
+            worker.join()
+
+        worker = context.Process(target=_building_worker, args=(args.rows, results))
+        worker.start()
+        _report(*results.get())
+        worker.join()
+
+        # Swapping in a new snapshot is one more publish; readers re-map on their next call
+        current = catalog_snapshot.current()
+        started = time.perf_counter()
+        catalog_snapshot.publish(current)
+        published = time.perf_counter() - started
+        started = time.perf_counter()
+        swapped = catalog_snapshot.current()
+        print(f"swap: republished in {published:.2f}s, picked up in {(time.perf_counter() - started) * 1000:.1f} ms "
+              f"({swapped is not current})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import pandas as pd
+import streamlit as st
+from utils import llm_cache, telemetry
+from utils.ai import get_scheduler, hedge_stats
+from utils.jobs import get_queue
+
+
+def _ms(summary, pct):
+    return round(summary[pct] * 1000) if summary else None
+
+
+def admin_metrics_page():
+    if st.button('← Back to Home', key='back_home_admin'):
+        st.session_state.user_choice = None
+        st.rerun()
+
+    st.markdown("<h3 style='color:#60a5fa; text-align:center; margin-bottom:1.2rem;'>📈 LLM Metrics</h3>", unsafe_allow_html=True)
+
+    snapshot = telemetry.registry.snapshot()
+    rows = []
+    for route, metrics in sorted(snapshot.items()):
+        if "calls" not in metrics:
+            continue
+        hits = metrics.get("cache_hit", 0)
+        looked_up = hits + metrics.get("cache_miss", 0)
+        latency = metrics.get("latency")
+        ttft = metrics.get("ttft")
+        rows.append({
+            "Route": route,
+            "Calls": metrics.get("calls", 0),
+            "Errors": metrics.get("errors", 0),
+            "Latency p50 (ms)": _ms(latency, "p50"),
+            "Latency p95 (ms)": _ms(latency, "p95"),
+            "Latency p99 (ms)": _ms(latency, "p99"),
+            "TTFT p50 (ms)": _ms(ttft, "p50"),
+            "TTFT p95 (ms)": _ms(ttft, "p95"),
+            "TTFT p99 (ms)": _ms(ttft, "p99"),
+            "Queue p95 (ms)": _ms(metrics.get("queue_wait"), "p95"),
+            "Cache hit rate": f"{hits / looked_up:.0%}" if looked_up else "-",
+            "Retries": metrics.get("retries", 0),
+            "Prompt tokens": metrics.get("prompt_tokens", 0),
+            "Completion tokens": metrics.get("completion_tokens", 0),
+        })
+
+    if rows:
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+    else:
+        st.info("No LLM calls recorded since this process started.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown("#### Scheduler")
+        st.json(get_scheduler().stats())
+        st.markdown("#### Background jobs")
+        st.json(get_queue().stats())
+    with col2:
+        st.markdown("#### Response cache")
+        st.json(llm_cache.stats())
+    with col3:
+        st.markdown("#### Hedging")
+        st.json(hedge_stats())
+        st.markdown("#### Car Browser filters")
+        browser = snapshot.get("car_browser", {})
+        evaluations = sum(browser.get(f"filter_{outcome}", 0) for outcome in ("exact", "refined", "full"))
+        reused = browser.get("filter_exact", 0) + browser.get("filter_refined", 0)
+        st.json({
+            "evaluations": evaluations,
+            "exact": browser.get("filter_exact", 0),
+            "refined": browser.get("filter_refined", 0),
+            "full": browser.get("filter_full", 0),
+            "hit_rate": f"{reused / evaluations:.0%}" if evaluations else "-",
+            "p50_ms": _ms(browser.get("filter_time"), "p50"),
+            "p95_ms": _ms(browser.get("filter_time"), "p95"),
+        })
+
+    if st.button("🔄 Refresh", key="refresh_admin_metrics"):
+        st.rerun()
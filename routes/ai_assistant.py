@@ -1,9 +1,8 @@
 import streamlit as st
 import speech_recognition as sr
 from gtts import gTTS
-import tempfile
-import os
 from utils.ai import groq_chat_completion
+from utils.jobs import await_job, submit_job
 import base64
 from io import BytesIO
 import streamlit.components.v1 as components
@@ -235,18 +234,30 @@ def ai_assistant_chat():
                         </div>
                         """, unsafe_allow_html=True)
 
+            if st.session_state.chat_loading:
+                try:
+                    ai_response = await_job("ai_assistant")
+                except Exception as e:
+                    ai_response = f"[Error: {e}]"
+                if ai_response is not None:
+                    st.session_state.ai_chat_history.append({"role": "assistant", "content": ai_response})
+                st.session_state.chat_loading = False
+                st.rerun()
+
         # User input based on chat mode
         if st.session_state.chat_mode == 'text':
             with st.form("ai_chat_form", clear_on_submit=True):
                 user_input = st.text_input("Type your question...", key="ai_chat_input")
                 submitted = st.form_submit_button("Send", use_container_width=True)
-                if submitted and user_input.strip():
+                if submitted and user_input.strip() and not st.session_state.chat_loading:
                     st.session_state.ai_chat_history.append({"role": "user", "content": user_input})
                     try:
-                        ai_response = groq_chat_completion(st.session_state.ai_chat_history)
+                        # The reply is generated in the background and shown in the chat as it arrives.
+                        # Chat replies are sampled and personal, so they are never cached or shared.
+                        submit_job("ai_assistant", list(st.session_state.ai_chat_history), use_cache=False)
+                        st.session_state.chat_loading = True
                     except Exception as e:
-                        ai_response = f"[Error: {e}]"
-                    st.session_state.ai_chat_history.append({"role": "assistant", "content": ai_response})
+                        st.session_state.ai_chat_history.append({"role": "assistant", "content": f"[Error: {e}]"})
                     st.rerun()
         else:  # Voice mode
             st.markdown("<div style='text-align:center; margin-bottom:1rem;'>Click the microphone button to start speaking</div>", unsafe_allow_html=True)
@@ -265,7 +276,7 @@ def ai_assistant_chat():
                                 # Use voice-specific system prompt for voice mode
                                 voice_messages = [{"role": "system", "content": st.session_state.voice_system_prompt}]
                                 voice_messages.extend(st.session_state.ai_chat_history[1:])  # Skip the text mode system prompt
-                                ai_response = groq_chat_completion(voice_messages)
+                                ai_response = groq_chat_completion(voice_messages, page="ai_assistant", use_cache=False)
                             except Exception as e:
                                 ai_response = f"[Error: {e}]"
                             st.session_state.ai_chat_history.append({"role": "assistant", "content": ai_response})
@@ -1,11 +1,14 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from utils.ai import groq_chat_completion
+import time
+from utils.formatting import colorize_markdown
+from utils.insights import current, ensure_fresh, status, wait
 from utils.sample_data import INSIGHTS_SAMPLE
 import plotly.express as px
 
+# Seconds the page waits for the very first analysis before offering to check again
+FIRST_SNAPSHOT_WAIT = 15
+
 def ai_insights_page():
     if st.button('← Back to Home', key='back_home_insights'):
         st.session_state.user_choice = None
@@ -95,34 +98,30 @@ def ai_insights_page():
     st.markdown("<div style='margin-top:2rem;'></div>", unsafe_allow_html=True)
     st.markdown("<h5 style='color:#fff; margin-bottom:1rem;'>AI Market Analysis</h5>", unsafe_allow_html=True)
     
-    # Prepare data for AI analysis
-    analysis_prompt = [
-        {"role": "system", "content": (
-            "You are an expert automotive market analyst for India. "
-            "Based on the following market data, provide: "
-            "1. Market Overview: Current trends and their implications "
-            "2. Segment Analysis: Performance of different price segments "
-            "3. Model Insights: Key factors driving model popularity "
-            "4. Future Outlook: Predictions for the next 6-12 months "
-            "5. Recommendations: Strategic insights for buyers "
-            "Format your response as a markdown report with clear sections. "
-            "Use color indicators: 🟢 for positive, 🟡 for neutral, 🔴 for negative."
-        )},
-        {"role": "user", "content": str(INSIGHTS_SAMPLE)}
-    ]
-
-    try:
-        analysis = groq_chat_completion(analysis_prompt)
-        st.markdown(analysis, unsafe_allow_html=True)
-    except Exception as e:
-        st.error(f"Error generating analysis: {str(e)}")
+    # The analysis is precomputed by the background refresher and shared by every session
+    ensure_fresh()
+    snapshot = current()
+    if snapshot is None:
+        # Only until the first snapshot exists: wait once for it rather than rerunning the page
+        with st.spinner("The market analysis is being prepared..."):
+            snapshot = wait(FIRST_SNAPSHOT_WAIT)
+    refreshing, error = status()
+    if snapshot is None:
+        if error is not None:
+            st.error(f"Error generating analysis: {str(error)}")
+        else:
+            st.info("The market analysis is still being prepared.")
+            st.button("Check Again", key="insights_check_again")
+    else:
+        st.markdown(colorize_markdown(snapshot["analysis"]), unsafe_allow_html=True)
+        updated = time.strftime("%d %b %Y, %H:%M", time.localtime(snapshot["created_at"]))
+        st.caption(f"Updated {updated}" + (" · refreshing in the background" if refreshing else ""))
 
-    # Add download button for the analysis
-    if 'analysis' in locals():
+        # Add download button for the analysis
         st.download_button(
             label="Download Analysis",
-            data=analysis,
+            data=snapshot["analysis"],
             file_name="market_analysis.md",
             mime="text/markdown",
             use_container_width=True
-        ) 
\ No newline at end of file
+        )
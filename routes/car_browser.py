@@ -1,7 +1,28 @@
 import streamlit as st
-import pandas as pd
-from utils.ai import groq_chat_completion
+from utils.catalog import FilterCache, get_catalog
 from utils.formatting import colorize_markdown
+from utils.geo import distance_km, geocode
+from utils.jobs import await_job, submit_job
+from utils.sample_data import BROWSER_MAKES
+
+# Rows per results page, and how many of the top matches the AI summary sees
+PAGE_SIZE = 25
+NARRATIVE_ROWS = 8
+
+# Filter -> widget key, so the filters can be read before the widgets are drawn
+FILTER_WIDGETS = {
+    'query': 'search_text',
+    'location': 'location_text',
+    'radius_km': 'radius_slider',
+    'price_range': 'price_slider',
+    'year_range': 'year_slider',
+    'body_type': 'body_type_select',
+    'fuel_type': 'fuel_type_select',
+    'transmission': 'transmission_select',
+    'seating_capacity': 'seating_select',
+    'make': 'make_select',
+    'sort_by': 'sort_select'
+}
 
 def car_browser_page():
     if st.button('← Back to Home', key='back_home_browser'):
@@ -14,6 +35,11 @@ def car_browser_page():
     # Initialize session state for filters
     if 'filters' not in st.session_state:
         st.session_state.filters = {
+            'query': '',
+            # Default to the city given in the AI Assistant or Depreciation Predictor, if any
+            'location': (st.session_state.get('user_preferences') or {}).get('location')
+                or (st.session_state.get('depr_data') or {}).get('location') or '',
+            'radius_km': 50,
             'price_range': (0, 5000000),
             'year_range': (2020, 2024),
             'body_type': [],
@@ -27,15 +53,91 @@ def car_browser_page():
         st.session_state.search_results = None
     if 'search_loading' not in st.session_state:
         st.session_state.search_loading = False
+    if 'browser_page' not in st.session_state:
+        st.session_state.browser_page = 0
+    if 'filter_cache' not in st.session_state:
+        st.session_state.filter_cache = FilterCache()
+
+    # Pick up this run's widget changes first, so the counts below reflect them
+    for name, key in FILTER_WIDGETS.items():
+        if key in st.session_state:
+            st.session_state.filters[name] = st.session_state[key]
+
+    # Filter the local catalog only when the filters change; paging reuses the result set
+    catalog = get_catalog()
+    filter_key = (id(catalog), catalog.version, repr(sorted(st.session_state.filters.items())))
+    browser_results = st.session_state.get('browser_results')
+    if browser_results is None or browser_results['key'] != filter_key:
+        browser_results = {
+            'key': filter_key,
+            'counts': catalog.facet_counts(st.session_state.filters),
+            'results': catalog.search(
+                st.session_state.filters,
+                st.session_state.filters['sort_by'],
+                matches=st.session_state.filter_cache.match(catalog, st.session_state.filters)
+            )
+        }
+        st.session_state.browser_results = browser_results
+        st.session_state.browser_page = 0
+    counts, results = browser_results['counts'], browser_results['results']
+    match_count = results.count
+
+    def with_count(name):
+        return lambda option: f"{option} ({counts[name].get(option, 0):,})"
+
+    def range_caption(name):
+        in_range, available = counts[name]
+        st.caption(f"{in_range:,} of {available:,} matching listings fall in this range")
 
     # Create two columns for filters and results
     filter_col, results_col = st.columns([1, 2])
 
     with filter_col:
         st.markdown("<h5 style='color:#fff; margin-bottom:1rem;'>Filters</h5>", unsafe_allow_html=True)
-        
+
+        # Free-text search over make, model and variant, typo tolerant
+        st.markdown("<div style='color:#a1a1aa; margin-bottom:0.5rem;'>Search</div>", unsafe_allow_html=True)
+        query = st.text_input(
+            "Search make, model or variant",
+            value=st.session_state.filters.get('query', ''),
+            placeholder='e.g. "creta sx o" or "hyryder"',
+            key="search_text"
+        )
+        st.session_state.filters['query'] = query
+        if query.strip():
+            suggestions = catalog.suggest(query, 5)
+            if suggestions:
+                st.caption("Closest names: " + " · ".join(f"{' '.join(name)} ({count:,})" for name, count in suggestions))
+            else:
+                st.caption(f"No make, model or variant looks like \"{query.strip()}\"")
+
+        # Location: listings within a radius of a city or pincode
+        st.markdown("<div style='color:#a1a1aa; margin-top:1rem; margin-bottom:0.5rem;'>Near</div>", unsafe_allow_html=True)
+        location = st.text_input(
+            "City or pincode",
+            value=st.session_state.filters.get('location', ''),
+            placeholder='e.g. "Pune" or "560034"',
+            key="location_text"
+        )
+        st.session_state.filters['location'] = location
+        radius_km = st.slider(
+            "Within (km)",
+            min_value=5,
+            max_value=500,
+            value=st.session_state.filters.get('radius_km', 50),
+            step=5,
+            key="radius_slider"
+        )
+        st.session_state.filters['radius_km'] = radius_km
+        place = geocode(location) if location.strip() else None
+        if place:
+            within, available = counts['near']
+            st.caption(f"{within:,} of {available:,} matching listings are within {radius_km} km of {place[0]}")
+        elif location.strip():
+            st.caption(f"Couldn't find \"{location.strip()}\"; showing listings everywhere")
+
         # Price Range
-        st.markdown("<div style='color:#a1a1aa; margin-bottom:0.5rem;'>Price Range (₹)</div>", unsafe_allow_html=True)
+        st.markdown("<div style='color:#a1a1aa; margin-top:1rem; margin-bottom:0.5rem;'>Price Range (₹)</div>", unsafe_allow_html=True)
         price_min, price_max = st.slider(
             "Price Range",
             min_value=0,
@@ -46,6 +148,7 @@ def car_browser_page():
             key="price_slider"
         )
         st.session_state.filters['price_range'] = (price_min, price_max)
+        range_caption('price_range')
 
         # Year Range
         st.markdown("<div style='color:#a1a1aa; margin-top:1rem; margin-bottom:0.5rem;'>Year Range</div>", unsafe_allow_html=True)
@@ -58,6 +161,7 @@ def car_browser_page():
             key="year_slider"
         )
         st.session_state.filters['year_range'] = (year_min, year_max)
+        range_caption('year_range')
 
         # Body Type
         st.markdown("<div style='color:#a1a1aa; margin-top:1rem; margin-bottom:0.5rem;'>Body Type</div>", unsafe_allow_html=True)
@@ -66,6 +170,7 @@ def car_browser_page():
             "Select Body Types",
             body_types,
             default=st.session_state.filters['body_type'],
+            format_func=with_count('body_type'),
             key="body_type_select"
         )
         st.session_state.filters['body_type'] = selected_body_types
@@ -77,6 +182,7 @@ def car_browser_page():
             "Select Fuel Types",
             fuel_types,
             default=st.session_state.filters['fuel_type'],
+            format_func=with_count('fuel_type'),
             key="fuel_type_select"
         )
         st.session_state.filters['fuel_type'] = selected_fuel_types
@@ -88,6 +194,7 @@ def car_browser_page():
             "Select Transmission",
             transmission_types,
             default=st.session_state.filters['transmission'],
+            format_func=with_count('transmission'),
             key="transmission_select"
         )
         st.session_state.filters['transmission'] = selected_transmission
@@ -99,17 +206,19 @@ def car_browser_page():
             "Select Seating Capacity",
             seating_options,
             default=st.session_state.filters['seating_capacity'],
+            format_func=with_count('seating_capacity'),
             key="seating_select"
         )
         st.session_state.filters['seating_capacity'] = selected_seating
 
         # Make
         st.markdown("<div style='color:#a1a1aa; margin-top:1rem; margin-bottom:0.5rem;'>Make</div>", unsafe_allow_html=True)
-        makes = ["Maruti Suzuki", "Hyundai", "Tata", "Mahindra", "Toyota", "Honda", "Kia", "Volkswagen", "Skoda", "MG", "Others"]
+        makes = BROWSER_MAKES
         selected_makes = st.multiselect(
             "Select Makes",
             makes,
             default=st.session_state.filters['make'],
+            format_func=with_count('make'),
             key="make_select"
         )
         st.session_state.filters['make'] = selected_makes
@@ -122,71 +231,108 @@ def car_browser_page():
             "year_new_to_old": "Year: Newest First",
             "year_old_to_new": "Year: Oldest First"
         }
+        if place:
+            sort_options["nearest"] = "Distance: Nearest First"
+        sort_keys = list(sort_options.keys())
         selected_sort = st.selectbox(
             "Sort Results By",
-            options=list(sort_options.keys()),
+            options=sort_keys,
             format_func=lambda x: sort_options[x],
-            index=list(sort_options.keys()).index(st.session_state.filters['sort_by']),
+            index=sort_keys.index(st.session_state.filters['sort_by']) if st.session_state.filters['sort_by'] in sort_keys else 0,
             key="sort_select"
         )
         st.session_state.filters['sort_by'] = selected_sort
 
-        # Search Button
-        if st.button("Search Cars", use_container_width=True):
+        # AI summary of the best matches; nothing to summarise without any
+        ai_summary_clicked = st.button("✨ AI Summary of Top Matches", use_container_width=True, disabled=not match_count)
+
+    if ai_summary_clicked:
+        if match_count:
             st.session_state.search_loading = True
             st.session_state.search_results = None
-            
-            with st.spinner("Searching for cars..."):
-                # Prepare filter data for AI
-                filter_text = (
-                    f"Price Range: ₹{price_min:,} - ₹{price_max:,}\n"
-                    f"Year Range: {year_min} - {year_max}\n"
-                    f"Body Types: {', '.join(selected_body_types) if selected_body_types else 'Any'}\n"
-                    f"Fuel Types: {', '.join(selected_fuel_types) if selected_fuel_types else 'Any'}\n"
-                    f"Transmission: {', '.join(selected_transmission) if selected_transmission else 'Any'}\n"
-                    f"Seating Capacity: {', '.join(selected_seating) if selected_seating else 'Any'}\n"
-                    f"Makes: {', '.join(selected_makes) if selected_makes else 'Any'}\n"
-                    f"Sort By: {sort_options[selected_sort]}"
-                )
-
-                search_prompt = [
-                    {"role": "system", "content": (
-                        "You are an expert car search assistant for the Indian market. "
-                        "Given the following search criteria, provide: "
-                        "1. A list of 5-7 best matching car models with their variants "
-                        "2. For each car, include: "
-                        "   - Price range "
-                        "   - Key features "
-                        "   - Pros and cons "
-                        "   - Best variant recommendation "
-                        "3. Sort the results according to the specified sort order "
-                        "4. Use color indicators: 🟢 for pros, 🔴 for cons "
-                        "Format your response as a markdown report with clear sections for each car."
-                    )},
-                    {"role": "user", "content": filter_text}
-                ]
-
-                try:
-                    result = groq_chat_completion(search_prompt)
-                    st.session_state.search_results = result
-                except Exception as e:
-                    st.session_state.search_results = f"[Error: {e}]"
-                
-            st.session_state.search_loading = False
-            st.rerun()
+
+            # Only the top matches are sent to the model
+            search_note = f" the search \"{query.strip()}\"" if query.strip() else ""
+            if place:
+                search_note += f" within {radius_km} km of {place[0]}"
+            listing_text = "\n".join(
+                f"- {row.year} {row.make} {row.model} {row.variant}: ₹{row.price:,}, {row.body_type}, "
+                f"{row.fuel_type}, {row.transmission}, {row.seating} seats, {row.city}"
+                for row in results.page(0, NARRATIVE_ROWS).itertuples()
+            )
+            search_prompt = [
+                {"role": "system", "content": (
+                    "You are an expert car search assistant for the Indian market. "
+                    "Given the best matching listings for a buyer's search, provide: "
+                    "1. A short overview of what the buyer's budget and filters get them "
+                    "2. For each distinct model in the listings: "
+                    "   - Key features "
+                    "   - Pros and cons "
+                    "   - Best variant recommendation "
+                    "3. Which listing you would shortlist first and why "
+                    "4. Use color indicators: 🟢 for pros, 🔴 for cons "
+                    "Only discuss the listings given. Format your response as a markdown report."
+                )},
+                {"role": "user", "content": f"{match_count:,} listings match{search_note}. Top matches ({sort_options[selected_sort]}):\n{listing_text}"}
+            ]
+
+            # Run the request in the background; the results area streams it in
+            try:
+                submit_job("car_browser", search_prompt)
+            except Exception as e:
+                st.session_state.search_results = f"[Error: {e}]"
+                st.session_state.search_loading = False
+        st.rerun()
 
     with results_col:
-        if st.session_state.search_loading:
-            st.info("Searching for cars...")
-        elif st.session_state.search_results:
-            st.markdown("<h5 style='color:#fff; margin-bottom:1rem;'>Search Results</h5>", unsafe_allow_html=True)
-            
-            # Colorize the results
-            st.markdown(colorize_markdown(st.session_state.search_results), unsafe_allow_html=True)
+        st.markdown("<h5 style='color:#fff; margin-bottom:1rem;'>Search Results</h5>", unsafe_allow_html=True)
+        if match_count:
+            page_count = results.page_count(PAGE_SIZE)
+            page = min(st.session_state.browser_page, page_count - 1)
+            st.markdown(f"<div style='color:#a1a1aa; margin-bottom:0.5rem;'>{match_count:,} of {len(catalog):,} listings match</div>", unsafe_allow_html=True)
+            # Only the visible page is decoded and sent to the browser
+            page_rows = results.page(page, PAGE_SIZE)
+            if place:
+                page_rows["distance"] = distance_km(page_rows["lat"].to_numpy(), page_rows["lon"].to_numpy(), place[1], place[2]).round(1)
+            st.dataframe(
+                page_rows.drop(columns=["lat", "lon"]).rename(columns={
+                    "make": "Make", "model": "Model", "variant": "Variant", "price": "Price (₹)", "year": "Year",
+                    "body_type": "Body", "fuel_type": "Fuel", "transmission": "Transmission", "seating": "Seats",
+                    "city": "City", "distance": "Distance (km)"
+                }),
+                hide_index=True,
+                use_container_width=True,
+                column_config={"Price (₹)": st.column_config.NumberColumn(format="₹%d")}
+            )
+            prev_col, page_col, next_col = st.columns([1, 2, 1])
+            with prev_col:
+                if st.button("← Previous", key="browser_prev", disabled=page == 0, use_container_width=True):
+                    st.session_state.browser_page = page - 1
+                    st.rerun()
+            with page_col:
+                st.markdown(f"<div style='text-align:center; color:#a1a1aa; padding-top:0.4rem;'>Page {page + 1:,} of {page_count:,}</div>", unsafe_allow_html=True)
+            with next_col:
+                if st.button("Next →", key="browser_next", disabled=page >= page_count - 1, use_container_width=True):
+                    st.session_state.browser_page = page + 1
+                    st.rerun()
         else:
             st.markdown("""
             <div style='text-align:center; color:#a1a1aa; margin-top:2rem;'>
                 <div style='font-size:2rem; margin-bottom:1rem;'>🔍</div>
-                <div>Use the filters on the left to find your perfect car</div>
+                <div>No listings match these filters. Try widening the price, year or distance range.</div>
             </div>
-            """, unsafe_allow_html=True) 
\ No newline at end of file
+            """, unsafe_allow_html=True)
+
+        if st.session_state.search_loading:
+            st.markdown("<h5 style='color:#fff; margin-top:1.5rem; margin-bottom:1rem;'>AI Summary</h5>", unsafe_allow_html=True)
+            try:
+                st.session_state.search_results = await_job("car_browser")
+            except Exception as e:
+                st.session_state.search_results = f"[Error: {e}]"
+            st.session_state.search_loading = False
+            st.rerun()
+        elif st.session_state.search_results:
+            st.markdown("<h5 style='color:#fff; margin-top:1.5rem; margin-bottom:1rem;'>AI Summary</h5>", unsafe_allow_html=True)
+            
+            # Colorize the results
+            st.markdown(colorize_markdown(st.session_state.search_results), unsafe_allow_html=True)
@@ -1,8 +1,118 @@
+import os
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from utils.ai import groq_chat_completion
+from utils.depreciation import CURRENT_YEAR, HORIZON, PERCENTILES, project_values, value_bands, yearly_rates
+from utils.fleet import NARRATIVE_ROWS, OUTLIER_KM_PER_YEAR, OUTLIER_RATE, PATHS, output_path, value_fleet
 from utils.formatting import colorize_markdown
+from utils.geo import geocode
+from utils.residual_model import get_model
+from utils.residual_table import get_table
+from utils.jobs import await_job, submit_job
+
+
+def fleet_section():
+    """Bulk mode: value a dealer's whole inventory file and offer the results as a download."""
+    if 'fleet_result' not in st.session_state:
+        st.session_state.fleet_result = None
+    if 'fleet_loading' not in st.session_state:
+        st.session_state.fleet_loading = False
+
+    st.markdown("<div style='color:#a1a1aa; margin-bottom:0.5rem;'>Upload your inventory with make, model, year and price columns, plus optionally mileage, condition, fuel type, transmission, city and VIN.</div>", unsafe_allow_html=True)
+    uploaded = st.file_uploader("Inventory file", type=["csv", "gz", "jsonl", "parquet"], key="fleet_upload")
+    col1, col2 = st.columns(2)
+    with col1:
+        output_format = st.selectbox("Download as", options=["CSV", "Parquet"], key="fleet_format")
+        with_range = st.checkbox(f"Include likely range (P{PERCENTILES[0]}-P{PERCENTILES[-1]})", key="fleet_range",
+                                 help="Simulates every car's value; takes longer on a large inventory")
+    with col2:
+        explain = st.checkbox("Explain flagged cars with AI", value=True, key="fleet_explain",
+                              help=f"Only the {NARRATIVE_ROWS} fastest-depreciating flagged cars are sent to the AI")
+
+    if st.button("Value Inventory", use_container_width=True, disabled=uploaded is None):
+        previous = st.session_state.fleet_result
+        if isinstance(previous, dict) and os.path.exists(previous['path']):
+            os.remove(previous['path'])
+        st.session_state.fleet_result = None
+        fmt = output_format.lower()
+        path = output_path(fmt)
+        bar = st.progress(0.0, text="Reading inventory...")
+        try:
+            stats, outliers = value_fleet(
+                uploaded, path, fmt, paths=PATHS if with_range else 0,
+                progress=lambda s: bar.progress(s['fraction'], text=f"{s['valued']:,} cars valued ({s['fraction']:.0%} of the file)")
+            )
+            st.session_state.fleet_result = {'path': path, 'format': fmt, 'stats': stats, 'outliers': outliers, 'analysis': None}
+            if explain and len(outliers):
+                outlier_text = "\n".join(
+                    f"- Row {row.row}: {row.year} {row.make} {row.model} {row.variant}, {row.condition}, "
+                    f"{'N/A' if row.mileage != row.mileage else f'{row.mileage:,.0f} km'}, {row.city}: "
+                    f"₹{row.price:,.0f} now, ₹{getattr(row, f'value_year_{HORIZON}'):,.0f} in {HORIZON} years "
+                    f"({row.yearly_rate * 100:.1f}% a year); flagged for {row.flags}"
+                    for row in outliers.itertuples()
+                )
+                fleet_prompt = [
+                    {"role": "system", "content": (
+                        "You are an expert automotive market analyst for India advising a used-car dealer. "
+                        "The dealer's inventory has been valued; the cars below were flagged as outliers "
+                        f"(over {OUTLIER_KM_PER_YEAR:,} km a year, or losing over {OUTLIER_RATE:.0%} of their value a year). "
+                        "For each car, explain briefly why it stands out and what the dealer should do: "
+                        "reprice, sell soon, recondition or hold. Use color indicators: 🟢 hold, 🟡 watch, 🔴 act now. "
+                        "Only discuss the cars given. Format your response as a markdown report."
+                    )},
+                    {"role": "user", "content": f"{stats['valued']:,} cars valued, {stats['flagged']:,} flagged. Fastest-depreciating flagged cars:\n{outlier_text}"}
+                ]
+                submit_job("depreciation_predictor", fleet_prompt)
+                st.session_state.fleet_loading = True
+        except Exception as e:
+            if os.path.exists(path):
+                os.remove(path)
+            st.session_state.fleet_result = f"[Error: {e}]"
+        st.rerun()
+
+    result = st.session_state.fleet_result
+    if isinstance(result, str):
+        st.error(result)
+    elif result:
+        stats = result['stats']
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Cars Valued", f"{stats['valued']:,}")
+        col2.metric("Rows Skipped", f"{stats['rejected']:,}", help="Rows without a usable make, model, price or year")
+        col3.metric("Flagged", f"{stats['flagged']:,}")
+        col4.metric("Time", f"{stats['seconds']:.1f}s")
+        with open(result['path'], "rb") as f:
+            st.download_button(
+                label=f"Download Valuations ({result['format'].upper()})",
+                data=f,
+                file_name=f"fleet_valuation.{result['format']}",
+                mime="text/csv" if result['format'] == "csv" else "application/octet-stream",
+                use_container_width=True
+            )
+        if len(result['outliers']):
+            st.markdown("<h6 style='color:#fff; margin-top:1.5rem; margin-bottom:0.5rem;'>Fastest-Depreciating Flagged Cars</h6>", unsafe_allow_html=True)
+            st.dataframe(
+                result['outliers'][['row', 'make', 'model', 'year', 'condition', 'mileage', 'price', 'yearly_rate', f'value_year_{HORIZON}', 'flags']].assign(
+                    yearly_rate=lambda d: (d['yearly_rate'] * 100).round(1)
+                ).rename(columns={
+                    'row': 'Row', 'make': 'Make', 'model': 'Model', 'year': 'Year', 'condition': 'Condition', 'mileage': 'Mileage (km)',
+                    'price': 'Price (₹)', 'yearly_rate': 'Yearly Depreciation (%)', f'value_year_{HORIZON}': f'Value in {HORIZON} Years (₹)', 'flags': 'Flags'
+                }),
+                hide_index=True,
+                use_container_width=True
+            )
+        if st.session_state.fleet_loading:
+            st.markdown("<h6 style='color:#fff; margin-top:1.5rem; margin-bottom:0.5rem;'>Outlier Analysis</h6>", unsafe_allow_html=True)
+            try:
+                result['analysis'] = await_job("depreciation_predictor")
+            except Exception as e:
+                result['analysis'] = f"[Error: {e}]"
+            st.session_state.fleet_loading = False
+            st.rerun()
+        elif result['analysis']:
+            st.markdown("<h6 style='color:#fff; margin-top:1.5rem; margin-bottom:0.5rem;'>Outlier Analysis</h6>", unsafe_allow_html=True)
+            st.markdown(colorize_markdown(result['analysis']), unsafe_allow_html=True)
+
 
 def depreciation_predictor_page():
     if st.button('← Back to Home', key='back_home_depr'):
@@ -12,6 +122,11 @@ def depreciation_predictor_page():
     st.markdown("<h3 style='color:#34d399; text-align:center; margin-bottom:1.2rem;'>📉 AI Depreciation Predictor</h3>", unsafe_allow_html=True)
     st.markdown("<div style='text-align:center; color:#a1a1aa; margin-bottom:1.5rem;'>Predict your car's value over time with AI-powered market analysis.</div>", unsafe_allow_html=True)
 
+    mode = st.radio("Mode", options=["Single Car", "Whole Inventory"], horizontal=True, label_visibility="collapsed", key="depr_mode")
+    if mode == "Whole Inventory":
+        fleet_section()
+        return
+
     # Initialize session state
     if 'depr_result' not in st.session_state:
         st.session_state.depr_result = None
@@ -137,85 +252,128 @@ def depreciation_predictor_page():
                         'transmission': transmission
                     }
                     
-                    with st.spinner("Predicting depreciation with AI..."):
-                        try:
-                            # Calculate base depreciation
-                            purchase_price = float(price.replace(',', ''))
-                            current_year = int(year)
-                            years_old = 2024 - current_year
-                            
-                            # Base depreciation rates (will be adjusted by AI)
-                            base_rates = {
-                                "Excellent": 0.12,  # 12% per year
-                                "Good": 0.15,      # 15% per year
-                                "Fair": 0.18,      # 18% per year
-                                "Poor": 0.25       # 25% per year
-                            }
-                            
-                            # Calculate initial values
-                            base_rate = base_rates[condition]
-                            values = [purchase_price]
-                            for i in range(1, 6):
-                                values.append(values[-1] * (1 - base_rate))
-                            
-                            # Prepare data for AI
-                            depr_summary = (
-                                f"Make: {make}\n"
-                                f"Model: {model}\n"
-                                f"Year: {year}\n"
-                                f"Variant: {variant}\n"
-                                f"Purchase Price: ₹{price}\n"
-                                f"Current Mileage: {mileage or 'N/A'}\n"
-                                f"Condition: {condition}\n"
-                                f"Location: {location}\n"
-                                f"Fuel Type: {fuel_type}\n"
-                                f"Transmission: {transmission}\n"
-                                f"Base Depreciation Rate: {base_rate*100:.1f}% per year\n"
-                                f"Year-by-year value projection: {', '.join([f'Year {i}: ₹{v:,.0f}' for i, v in enumerate(values)])}"
-                            )
-
-                            depr_prompt = [
-                                {"role": "system", "content": (
-                                    "You are an expert automotive market analyst for India. "
-                                    "Given the following car details and base depreciation projection, provide: "
-                                    "1. Market Analysis: "
-                                    "   - 🟢 Green: Above average resale value "
-                                    "   - 🟡 Yellow: Average resale value "
-                                    "   - 🔴 Red: Below average resale value "
-                                    "2. Adjusted Depreciation Rate: Modify the base rate based on market factors "
-                                    "3. Location Impact: How the location affects resale value "
-                                    "4. Maintenance Impact: How maintenance affects value retention "
-                                    "5. Market Trends: Current market trends for this model "
-                                    "6. Recommendations: How to maximize resale value "
-                                    "Format your response as a markdown report with clear sections. "
-                                    "Include specific numbers and percentages where relevant."
-                                )},
-                                {"role": "user", "content": depr_summary}
-                            ]
+                    try:
+                        # Calculate base depreciation
+                        purchase_price = float(price.replace(',', ''))
+                        current_year = int(year)
+                        years_old = CURRENT_YEAR - current_year
+                        # Unparseable mileage is treated as unknown
+                        mileage_km = pd.to_numeric(mileage.replace(',', ''), errors='coerce') if mileage.strip() else None
 
-                            try:
-                                analysis = groq_chat_completion(depr_prompt)
-                                st.session_state.depr_result = {
-                                    'values': values,
-                                    'analysis': analysis,
-                                    'summary': depr_summary
-                                }
-                            except Exception as e:
-                                st.session_state.depr_result = f"[Error: {e}]"
-                        except Exception as e:
-                            st.session_state.depr_result = f"[Error in calculation: {e}]"
+                        # Rate fitted to past sales when a model has been trained, else the base rate for the condition
+                        fitted = get_model()
+                        if fitted is not None:
+                            place = geocode(location) if location.strip() else None
+                            base_rate = fitted.rate(make, model, fuel_type, transmission, place[0] if place else '', condition, years_old, mileage_km)
+                            rate_note = f"Fitted Depreciation Rate: {base_rate*100:.1f}% per year (fitted to {fitted.artifact['listings']:,} past sales)"
+                            rate_task = "2. Depreciation Rate: Explain what drives the fitted rate for this car; use it as given "
+                        else:
+                            base_rate = yearly_rates(condition, years_old, mileage_km)[0]
+                            rate_note = f"Base Depreciation Rate: {base_rate*100:.1f}% per year"
+                            rate_task = "2. Adjusted Depreciation Rate: Modify the base rate based on market factors "
+                        # Precomputed residual values for common models, tracking the rate as the car ages; else a flat rate
+                        table = get_table()
+                        values = table.curve(purchase_price, make, model, fuel_type, condition, years_old, mileage_km) if table else None
+                        if values is None:
+                            values = project_values(purchase_price, condition, years_old, mileage_km, rates=base_rate)[0].tolist()
+                        # Likely range from simulated rates, mileage and market moves, around the same year-by-year rates as the line
+                        line_rates = 1 - np.array(values[1:]) / np.array(values[:-1])
+                        bands = value_bands(purchase_price, condition, years_old, mileage_km, rates=line_rates[None])[0]
+                        low, high = bands[0], bands[-1]
                         
-                    st.session_state.depr_loading = False
+                        # Prepare data for AI
+                        depr_summary = (
+                            f"Make: {make}\n"
+                            f"Model: {model}\n"
+                            f"Year: {year}\n"
+                            f"Variant: {variant}\n"
+                            f"Purchase Price: ₹{price}\n"
+                            f"Current Mileage: {mileage or 'N/A'}\n"
+                            f"Condition: {condition}\n"
+                            f"Location: {location}\n"
+                            f"Fuel Type: {fuel_type}\n"
+                            f"Transmission: {transmission}\n"
+                            f"{rate_note}\n"
+                            f"Year-by-year value projection: {', '.join([f'Year {i}: ₹{v:,.0f}' for i, v in enumerate(values)])}\n"
+                            f"Simulated P{PERCENTILES[0]}-P{PERCENTILES[-1]} range: {', '.join([f'Year {i}: ₹{l:,.0f}-₹{h:,.0f}' for i, (l, h) in enumerate(zip(low, high)) if i])}"
+                        )
+
+                        depr_prompt = [
+                            {"role": "system", "content": (
+                                "You are an expert automotive market analyst for India. "
+                                "Given the following car details and base depreciation projection, provide: "
+                                "1. Market Analysis: "
+                                "   - 🟢 Green: Above average resale value "
+                                "   - 🟡 Yellow: Average resale value "
+                                "   - 🔴 Red: Below average resale value "
+                                f"{rate_task}"
+                                "3. Location Impact: How the location affects resale value "
+                                "4. Maintenance Impact: How maintenance affects value retention "
+                                "5. Market Trends: Current market trends for this model "
+                                "6. Recommendations: How to maximize resale value "
+                                "Format your response as a markdown report with clear sections. "
+                                "Include specific numbers and percentages where relevant."
+                            )},
+                            {"role": "user", "content": depr_summary}
+                        ]
+
+                        # Keep the projection while the analysis runs in the background
+                        st.session_state.depr_result = {
+                            'values': values,
+                            'bands': bands.tolist(),
+                            'analysis': None,
+                            'summary': depr_summary
+                        }
+                        submit_job("depreciation_predictor", depr_prompt)
+                    except Exception as e:
+                        st.session_state.depr_result = f"[Error in calculation: {e}]"
+                        st.session_state.depr_loading = False
                     st.rerun()
 
     with results_col:
         if st.session_state.depr_loading:
-            st.info("Predicting depreciation with AI...")
+            st.markdown("<h6 style='color:#fff; margin-top:1.5rem; margin-bottom:0.5rem;'>Market Analysis</h6>", unsafe_allow_html=True)
+            try:
+                analysis = await_job("depreciation_predictor")
+                if analysis is None:
+                    st.session_state.depr_result = None
+                else:
+                    st.session_state.depr_result['analysis'] = analysis
+            except Exception as e:
+                st.session_state.depr_result = f"[Error: {e}]"
+            st.session_state.depr_loading = False
+            st.rerun()
         elif st.session_state.depr_result and isinstance(st.session_state.depr_result, dict):
             st.markdown("<h5 style='color:#fff; margin-bottom:1rem;'>Depreciation Analysis</h5>", unsafe_allow_html=True)
             
             # Create interactive chart
             fig = go.Figure()
+            bands = st.session_state.depr_result.get('bands')
+            if bands:
+                # Shaded P10-P90 band with the simulated median through it
+                fig.add_trace(go.Scatter(
+                    x=list(range(6)),
+                    y=bands[-1],
+                    mode='lines',
+                    name=f'P{PERCENTILES[-1]}',
+                    line=dict(width=0)
+                ))
+                fig.add_trace(go.Scatter(
+                    x=list(range(6)),
+                    y=bands[0],
+                    mode='lines',
+                    name=f'P{PERCENTILES[0]}',
+                    line=dict(width=0),
+                    fill='tonexty',
+                    fillcolor='rgba(52, 211, 153, 0.2)'
+                ))
+                fig.add_trace(go.Scatter(
+                    x=list(range(6)),
+                    y=bands[len(bands) // 2],
+                    mode='lines',
+                    name=f'P{PERCENTILES[len(bands) // 2]}',
+                    line=dict(color='#34d399', width=2, dash='dot')
+                ))
             fig.add_trace(go.Scatter(
                 x=list(range(6)),
                 y=st.session_state.depr_result['values'],
@@ -246,6 +404,8 @@ def depreciation_predictor_page():
                 'Year': [f"Year {i}" for i in range(6)],
                 'Value': [f"₹{v:,.0f}" for v in st.session_state.depr_result['values']]
             })
+            if bands:
+                value_df[f'Likely Range (P{PERCENTILES[0]}-P{PERCENTILES[-1]})'] = [f"₹{l:,.0f} - ₹{h:,.0f}" for l, h in zip(bands[0], bands[-1])]
             st.table(value_df)
             
             # Display AI analysis
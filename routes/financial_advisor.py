@@ -1,7 +1,6 @@
 import streamlit as st
-import pandas as pd
-from utils.ai import groq_chat_completion
 from utils.formatting import colorize_markdown
+from utils.jobs import await_job, submit_job
 
 def financial_advisor_page():
     if st.button('← Back to Home', key='back_home_finance'):
@@ -111,74 +110,78 @@ def financial_advisor_page():
                         'additional_costs': additional_costs
                     }
                     
-                    with st.spinner("Analyzing deal with AI..."):
-                        try:
-                            # Calculate basic financial metrics
-                            P = float(car_price.replace(',', '')) - float(down_payment.replace(',', ''))
-                            N = int(loan_term)
-                            R = float(interest_rate) / 12 / 100
-                            emi = (P * R * (1 + R) ** N) / ((1 + R) ** N - 1) if R > 0 else P / N
-                            total_payment = emi * N
-                            total_interest = total_payment - P
-                            
-                            # Calculate additional costs
-                            insurance_val = float(insurance.replace(',', '')) if insurance.strip() else 0
-                            maintenance_val = float(maintenance.replace(',', '')) if maintenance.strip() else 0
-                            fuel_val = float(fuel.replace(',', '')) if fuel.strip() else 0
-                            resale_val = float(resale_value.replace(',', '')) if resale_value.strip() else 0
-                            
-                            # Calculate total cost of ownership
-                            tco = total_payment + (insurance_val * (N/12)) + (maintenance_val * (N/12)) + (fuel_val * N)
-                            if resale_val:
-                                tco -= resale_val
+                    try:
+                        # Calculate basic financial metrics
+                        P = float(car_price.replace(',', '')) - float(down_payment.replace(',', ''))
+                        N = int(loan_term)
+                        R = float(interest_rate) / 12 / 100
+                        emi = (P * R * (1 + R) ** N) / ((1 + R) ** N - 1) if R > 0 else P / N
+                        total_payment = emi * N
+                        total_interest = total_payment - P
+                        
+                        # Calculate additional costs
+                        insurance_val = float(insurance.replace(',', '')) if insurance.strip() else 0
+                        maintenance_val = float(maintenance.replace(',', '')) if maintenance.strip() else 0
+                        fuel_val = float(fuel.replace(',', '')) if fuel.strip() else 0
+                        resale_val = float(resale_value.replace(',', '')) if resale_value.strip() else 0
+                        
+                        # Calculate total cost of ownership
+                        tco = total_payment + (insurance_val * (N/12)) + (maintenance_val * (N/12)) + (fuel_val * N)
+                        if resale_val:
+                            tco -= resale_val
 
-                            # Prepare summary for AI
-                            summary = (
-                                f"Car Price: ₹{car_price}\n"
-                                f"Down Payment: ₹{down_payment}\n"
-                                f"Loan Term: {loan_term} months\n"
-                                f"Interest Rate: {interest_rate}% per annum\n"
-                                f"EMI: ₹{emi:,.2f} per month\n"
-                                f"Total Payment (Principal + Interest): ₹{total_payment:,.2f}\n"
-                                f"Total Interest Paid: ₹{total_interest:,.2f}\n"
-                                f"Insurance: ₹{insurance or 'N/A'} per year\n"
-                                f"Maintenance: ₹{maintenance or 'N/A'} per year\n"
-                                f"Fuel: ₹{fuel or 'N/A'} per month\n"
-                                f"Expected Resale Value: ₹{resale_value or 'N/A'}\n"
-                                f"Additional Costs:\n{additional_costs if additional_costs else 'None'}\n"
-                                f"Total Cost of Ownership (TCO): ₹{tco:,.2f}"
-                            )
+                        # Prepare summary for AI
+                        summary = (
+                            f"Car Price: ₹{car_price}\n"
+                            f"Down Payment: ₹{down_payment}\n"
+                            f"Loan Term: {loan_term} months\n"
+                            f"Interest Rate: {interest_rate}% per annum\n"
+                            f"EMI: ₹{emi:,.2f} per month\n"
+                            f"Total Payment (Principal + Interest): ₹{total_payment:,.2f}\n"
+                            f"Total Interest Paid: ₹{total_interest:,.2f}\n"
+                            f"Insurance: ₹{insurance or 'N/A'} per year\n"
+                            f"Maintenance: ₹{maintenance or 'N/A'} per year\n"
+                            f"Fuel: ₹{fuel or 'N/A'} per month\n"
+                            f"Expected Resale Value: ₹{resale_value or 'N/A'}\n"
+                            f"Additional Costs:\n{additional_costs if additional_costs else 'None'}\n"
+                            f"Total Cost of Ownership (TCO): ₹{tco:,.2f}"
+                        )
 
-                            finance_prompt = [
-                                {"role": "system", "content": (
-                                    "You are an expert automotive financial advisor for the Indian market. "
-                                    "Given the following deal summary, provide: "
-                                    "1. Deal Quality Assessment: "
-                                    "   - 🟢 Green: Excellent deal "
-                                    "   - 🟡 Yellow: Fair deal "
-                                    "   - 🔴 Red: Poor deal "
-                                    "2. Interest Rate Analysis: Compare with current market rates "
-                                    "3. Monthly Budget Impact: Break down monthly costs "
-                                    "4. Long-term Financial Impact: 5-year projection "
-                                    "5. Negotiation Points: Specific areas to negotiate "
-                                    "6. Recommendations: Actionable advice "
-                                    "Format your response as a markdown report with clear sections. "
-                                    "Include specific numbers and percentages where relevant."
-                                )},
-                                {"role": "user", "content": summary}
-                            ]
+                        finance_prompt = [
+                            {"role": "system", "content": (
+                                "You are an expert automotive financial advisor for the Indian market. "
+                                "Given the following deal summary, provide: "
+                                "1. Deal Quality Assessment: "
+                                "   - 🟢 Green: Excellent deal "
+                                "   - 🟡 Yellow: Fair deal "
+                                "   - 🔴 Red: Poor deal "
+                                "2. Interest Rate Analysis: Compare with current market rates "
+                                "3. Monthly Budget Impact: Break down monthly costs "
+                                "4. Long-term Financial Impact: 5-year projection "
+                                "5. Negotiation Points: Specific areas to negotiate "
+                                "6. Recommendations: Actionable advice "
+                                "Format your response as a markdown report with clear sections. "
+                                "Include specific numbers and percentages where relevant."
+                            )},
+                            {"role": "user", "content": summary}
+                        ]
 
-                            result = groq_chat_completion(finance_prompt)
-                            st.session_state.finance_result = result
-                        except Exception as e:
-                            st.session_state.finance_result = f"[Error in calculation: {e}]"
-                        
-                    st.session_state.finance_loading = False
+                        # Run the analysis in the background; the results column streams it in
+                        submit_job("financial_advisor", finance_prompt)
+                    except Exception as e:
+                        st.session_state.finance_result = f"[Error in calculation: {e}]"
+                        st.session_state.finance_loading = False
                     st.rerun()
 
     with results_col:
         if st.session_state.finance_loading:
-            st.info("Analyzing deal with AI...")
+            st.markdown("<h5 style='color:#fff; margin-bottom:1rem;'>Financial Analysis</h5>", unsafe_allow_html=True)
+            try:
+                st.session_state.finance_result = await_job("financial_advisor")
+            except Exception as e:
+                st.session_state.finance_result = f"[Error: {e}]"
+            st.session_state.finance_loading = False
+            st.rerun()
         elif st.session_state.finance_result:
             st.markdown("<h5 style='color:#fff; margin-bottom:1rem;'>Financial Analysis</h5>", unsafe_allow_html=True)
             
@@ -1,5 +1,5 @@
 import streamlit as st
-from utils.ai import groq_chat_completion
+from utils.jobs import await_job, submit_job
 
 def fine_print_analyzer_page():
     if st.button('← Back to Home', key='back_home_fineprint'):
@@ -90,58 +90,62 @@ def fine_print_analyzer_page():
                         'additional_context': additional_context
                     }
                     
-                    with st.spinner("Analyzing contract with AI..."):
-                        try:
-                            # Prepare context for AI
-                            context = {
-                                "Contract Type": contract_type.replace('_', ' ').title(),
-                                "Dealer Name": dealer_name,
-                                "Car Details": car_details,
-                                "Additional Context": additional_context
-                            }
-                            
-                            context_text = "\n".join([f"{k}: {v}" for k, v in context.items() if v])
-                            
-                            analysis_prompt = [
-                                {"role": "system", "content": (
-                                    "You are an expert automotive contract analyst specializing in the Indian market. "
-                                    "Analyze the following contract text and provide: "
-                                    "1. Plain Language Translation: "
-                                    "   - Convert legal jargon into clear, simple explanations "
-                                    "   - Break down complex clauses into bullet points "
-                                    "2. Risk Assessment: "
-                                    "   - 🔴 High Risk: Potentially problematic terms "
-                                    "   - 🟡 Medium Risk: Terms requiring attention "
-                                    "   - 🟢 Low/Positive Risk: Standard or beneficial terms "
-                                    "3. Financial Impact Analysis: "
-                                    "   - Direct costs and fees "
-                                    "   - Hidden or potential costs "
-                                    "   - Long-term financial implications "
-                                    "4. Key Terms Summary: "
-                                    "   - Important deadlines and dates "
-                                    "   - Obligations and responsibilities "
-                                    "   - Rights and protections "
-                                    "5. Recommendations: "
-                                    "   - Terms to negotiate "
-                                    "   - Points to clarify "
-                                    "   - Protective measures to consider "
-                                    "Format your response as a markdown report with clear sections. "
-                                    "Use bullet points for clarity and include specific quotes from the contract where relevant."
-                                )},
-                                {"role": "user", "content": f"Context:\n{context_text}\n\nContract Text:\n{contract_text}"}
-                            ]
-
-                            result = groq_chat_completion(analysis_prompt)
-                            st.session_state.fineprint_result = result
-                        except Exception as e:
-                            st.session_state.fineprint_result = f"[Error: {e}]"
+                    try:
+                        # Prepare context for AI
+                        context = {
+                            "Contract Type": contract_type.replace('_', ' ').title(),
+                            "Dealer Name": dealer_name,
+                            "Car Details": car_details,
+                            "Additional Context": additional_context
+                        }
+                        
+                        context_text = "\n".join([f"{k}: {v}" for k, v in context.items() if v])
                         
-                    st.session_state.fineprint_loading = False
+                        analysis_prompt = [
+                            {"role": "system", "content": (
+                                "You are an expert automotive contract analyst specializing in the Indian market. "
+                                "Analyze the following contract text and provide: "
+                                "1. Plain Language Translation: "
+                                "   - Convert legal jargon into clear, simple explanations "
+                                "   - Break down complex clauses into bullet points "
+                                "2. Risk Assessment: "
+                                "   - 🔴 High Risk: Potentially problematic terms "
+                                "   - 🟡 Medium Risk: Terms requiring attention "
+                                "   - 🟢 Low/Positive Risk: Standard or beneficial terms "
+                                "3. Financial Impact Analysis: "
+                                "   - Direct costs and fees "
+                                "   - Hidden or potential costs "
+                                "   - Long-term financial implications "
+                                "4. Key Terms Summary: "
+                                "   - Important deadlines and dates "
+                                "   - Obligations and responsibilities "
+                                "   - Rights and protections "
+                                "5. Recommendations: "
+                                "   - Terms to negotiate "
+                                "   - Points to clarify "
+                                "   - Protective measures to consider "
+                                "Format your response as a markdown report with clear sections. "
+                                "Use bullet points for clarity and include specific quotes from the contract where relevant."
+                            )},
+                            {"role": "user", "content": f"Context:\n{context_text}\n\nContract Text:\n{contract_text}"}
+                        ]
+
+                        # Run the analysis in the background; the results column streams it in
+                        submit_job("fine_print_analyzer", analysis_prompt)
+                    except Exception as e:
+                        st.session_state.fineprint_result = f"[Error: {e}]"
+                        st.session_state.fineprint_loading = False
                     st.rerun()
 
     with results_col:
         if st.session_state.fineprint_loading:
-            st.info("Analyzing contract with AI...")
+            st.markdown("<h5 style='color:#fff; margin-bottom:1rem;'>Analysis Results</h5>", unsafe_allow_html=True)
+            try:
+                st.session_state.fineprint_result = await_job("fine_print_analyzer")
+            except Exception as e:
+                st.session_state.fineprint_result = f"[Error: {e}]"
+            st.session_state.fineprint_loading = False
+            st.rerun()
         elif st.session_state.fineprint_result:
             st.markdown("<h5 style='color:#fff; margin-bottom:1rem;'>Analysis Results</h5>", unsafe_allow_html=True)
             
@@ -1,7 +1,30 @@
 import streamlit as st
 import pandas as pd
-from utils.ai import groq_chat_completion
+from utils.depreciation import CURRENT_YEAR, TYPICAL_KM_PER_YEAR, project_values
 from utils.formatting import colorize_markdown
+from utils.jobs import await_job, submit_job
+from utils.residual_model import get_model
+from utils.residual_table import get_table
+
+# Years ahead the comparison values each model, and the condition it's assumed to be kept in
+YEARS_AHEAD = 3
+CONDITION = "Excellent"
+
+
+def _projected_value(car, table, fitted):
+    """Value of ``car`` YEARS_AHEAD years from now: a table lookup, else the fitted or base rate."""
+    age = max(CURRENT_YEAR - int(car['year']), 0)
+    km_per_year = pd.to_numeric(str(car['mileage']).replace(',', ''), errors='coerce')
+    if km_per_year != km_per_year:
+        km_per_year = TYPICAL_KM_PER_YEAR
+    mileage = km_per_year * max(age, 1)
+    values = table.curve(car['price'], car['make'], car['model'], condition=CONDITION, age=age, mileage=mileage,
+                         km_per_year=km_per_year, horizon=YEARS_AHEAD) if table else None
+    if values is not None:
+        return values[-1]
+    rate = fitted.rate(car['make'], car['model'], '', '', '', CONDITION, age, mileage) if fitted else None
+    return project_values(car['price'], CONDITION, age, mileage, YEARS_AHEAD, rate)[0, -1]
+
 
 def model_comparison_page():
     if st.button('← Back to Home', key='back_home_compare'):
@@ -46,6 +69,7 @@ def model_comparison_page():
                     'variant': variant,
                     'mileage': mileage
                 })
+                st.session_state.comparison_values = None
                 st.rerun()
             except ValueError:
                 st.error("Please enter a valid price")
@@ -64,54 +88,83 @@ def model_comparison_page():
             with col3:
                 if st.button("Remove", key=f"remove_{i}"):
                     st.session_state.comparison_data.pop(i)
+                    st.session_state.comparison_values = None
                     st.rerun()
 
         # Compare button
         if st.button("Compare Models", use_container_width=True):
             st.session_state.comparison_loading = True
             st.session_state.comparison_result = None
-            
-            with st.spinner("Analyzing models with AI..."):
-                # Prepare comparison data for AI
-                comparison_text = "\n\n".join([
-                    f"Model {i+1}:\n"
-                    f"Make: {car['make']}\n"
-                    f"Model: {car['model']}\n"
-                    f"Year: {car['year']}\n"
-                    f"Price: ₹{car['price']:,.0f}\n"
-                    f"Variant: {car['variant']}\n"
-                    f"Expected Annual Mileage: {car['mileage'] or 'N/A'}"
-                    for i, car in enumerate(st.session_state.comparison_data)
-                ])
-
-                comparison_prompt = [
-                    {"role": "system", "content": (
-                        "You are an expert automotive analyst for the Indian market. "
-                        "Compare the following car models and provide: "
-                        "1. Future value prediction after 3 years for each model "
-                        "2. Depreciation rate analysis "
-                        "3. Potential dealer policy caveats to watch for "
-                        "4. Monthly ownership cost comparison "
-                        "5. Purchase recommendations with clear reasoning "
-                        "Format your response as a markdown report with clear sections. "
-                        "Use color indicators: 🟢 for positive, 🟡 for neutral, 🔴 for negative. "
-                        "Include specific numbers and percentages where relevant."
-                    )},
-                    {"role": "user", "content": comparison_text}
-                ]
-
-                try:
-                    result = groq_chat_completion(comparison_prompt)
-                    st.session_state.comparison_result = result
-                except Exception as e:
-                    st.session_state.comparison_result = f"[Error: {e}]"
-                
-            st.session_state.comparison_loading = False
+
+            # Future values come from the residual-value table, not the AI
+            try:
+                table, fitted = get_table(), get_model()
+                values = [_projected_value(car, table, fitted) for car in st.session_state.comparison_data]
+            except Exception as e:
+                values = [None] * len(st.session_state.comparison_data)
+                st.session_state.comparison_error = f"[Error in calculation: {e}]"
+            st.session_state.comparison_values = values
+
+            # Prepare comparison data for AI
+            comparison_text = "\n\n".join([
+                f"Model {i+1}:\n"
+                f"Make: {car['make']}\n"
+                f"Model: {car['model']}\n"
+                f"Year: {car['year']}\n"
+                f"Price: ₹{car['price']:,.0f}\n"
+                f"Variant: {car['variant']}\n"
+                f"Expected Annual Mileage: {car['mileage'] or 'N/A'}"
+                + (f"\nProjected Value in {YEARS_AHEAD} Years: ₹{value:,.0f}" if value is not None else "")
+                for i, (car, value) in enumerate(zip(st.session_state.comparison_data, values))
+            ])
+
+            comparison_prompt = [
+                {"role": "system", "content": (
+                    "You are an expert automotive analyst for the Indian market. "
+                    "Compare the following car models and provide: "
+                    f"1. Future value after {YEARS_AHEAD} years for each model: use the projected values given; explain what drives them "
+                    "2. Depreciation rate analysis "
+                    "3. Potential dealer policy caveats to watch for "
+                    "4. Monthly ownership cost comparison "
+                    "5. Purchase recommendations with clear reasoning "
+                    "Format your response as a markdown report with clear sections. "
+                    "Use color indicators: 🟢 for positive, 🟡 for neutral, 🔴 for negative. "
+                    "Include specific numbers and percentages where relevant."
+                )},
+                {"role": "user", "content": comparison_text}
+            ]
+
+            # Run the request in the background; the results area streams it in
+            try:
+                submit_job("model_comparison", comparison_prompt)
+            except Exception as e:
+                st.session_state.comparison_result = f"[Error: {e}]"
+                st.session_state.comparison_loading = False
             st.rerun()
 
+    # Projected values are ready before the AI analysis
+    values = st.session_state.get('comparison_values')
+    if st.session_state.get('comparison_error'):
+        st.error(st.session_state.pop('comparison_error'))
+    elif values and None not in values:
+        st.markdown(f"<h5 style='color:#fff; margin-top:1.5rem;'>Projected Value in {YEARS_AHEAD} Years</h5>", unsafe_allow_html=True)
+        st.table(pd.DataFrame({
+            'Model': [f"{car['make']} {car['model']} ({car['year']})" for car in st.session_state.comparison_data],
+            'Price': [f"₹{car['price']:,.0f}" for car in st.session_state.comparison_data],
+            f'Value in {YEARS_AHEAD} Years': [f"₹{v:,.0f}" for v in values],
+            'Yearly Depreciation': [f"{(1 - (v / car['price']) ** (1 / YEARS_AHEAD)) * 100:.1f}%" for car, v in zip(st.session_state.comparison_data, values)],
+        }))
+
     # Display comparison results
     if st.session_state.comparison_loading:
-        st.info("Analyzing models with AI...")
+        st.markdown("<div style='margin-top:1.5rem;'></div>", unsafe_allow_html=True)
+        st.markdown("<h5 style='color:#fff;'>AI Comparison Analysis</h5>", unsafe_allow_html=True)
+        try:
+            st.session_state.comparison_result = await_job("model_comparison")
+        except Exception as e:
+            st.session_state.comparison_result = f"[Error: {e}]"
+        st.session_state.comparison_loading = False
+        st.rerun()
     elif st.session_state.comparison_result:
         st.markdown("<div style='margin-top:1.5rem;'></div>", unsafe_allow_html=True)
         st.markdown("<h5 style='color:#fff;'>AI Comparison Analysis</h5>", unsafe_allow_html=True)
@@ -1,6 +1,6 @@
 import streamlit as st
-from utils.ai import groq_chat_completion
 from utils.formatting import colorize_markdown
+from utils.jobs import await_job, submit_job
 
 def policy_scanner_page():
     if st.button('← Back to Home', key='back_home_policy'):
@@ -68,49 +68,53 @@ def policy_scanner_page():
                 st.session_state.policy_scan_loading = True
                 st.session_state.policy_scan_result = None
                 
-                with st.spinner("Analyzing policy with AI..."):
-                    # Prepare context for AI
-                    context = {
-                        "policy_type": policy_type,
-                        "dealer_name": dealer_name,
-                        "car_model": car_model,
-                        "purchase_type": purchase_type,
-                        "financing_type": financing_type
-                    }
-                    
-                    context_text = "\n".join([f"{k}: {v}" for k, v in context.items() if v])
-                    
-                    policy_prompt = [
-                        {"role": "system", "content": (
-                            "You are an expert automotive policy analyst specializing in the Indian market. "
-                            "Analyze the following policy text and provide a comprehensive breakdown: "
-                            "1. Key Terms and Conditions: List and explain the most important terms "
-                            "2. Hidden Fees and Charges: Identify any non-obvious costs or mandatory add-ons "
-                            "3. Risk Assessment: "
-                            "   - 🟢 Green: Standard/beneficial terms "
-                            "   - 🟡 Yellow: Terms requiring attention "
-                            "   - 🔴 Red: Potentially problematic terms "
-                            "4. Negotiation Points: Suggest terms that could be negotiated "
-                            "5. Legal Implications: Highlight any legally significant clauses "
-                            "6. Recommendations: Provide actionable advice "
-                            "Format your response as a markdown report with clear sections. "
-                            "Use bullet points for clarity and include specific quotes from the policy where relevant."
-                        )},
-                        {"role": "user", "content": f"Context:\n{context_text}\n\nPolicy Text:\n{policy_text}"}
-                    ]
+                # Prepare context for AI
+                context = {
+                    "policy_type": policy_type,
+                    "dealer_name": dealer_name,
+                    "car_model": car_model,
+                    "purchase_type": purchase_type,
+                    "financing_type": financing_type
+                }
+                
+                context_text = "\n".join([f"{k}: {v}" for k, v in context.items() if v])
+                
+                policy_prompt = [
+                    {"role": "system", "content": (
+                        "You are an expert automotive policy analyst specializing in the Indian market. "
+                        "Analyze the following policy text and provide a comprehensive breakdown: "
+                        "1. Key Terms and Conditions: List and explain the most important terms "
+                        "2. Hidden Fees and Charges: Identify any non-obvious costs or mandatory add-ons "
+                        "3. Risk Assessment: "
+                        "   - 🟢 Green: Standard/beneficial terms "
+                        "   - 🟡 Yellow: Terms requiring attention "
+                        "   - 🔴 Red: Potentially problematic terms "
+                        "4. Negotiation Points: Suggest terms that could be negotiated "
+                        "5. Legal Implications: Highlight any legally significant clauses "
+                        "6. Recommendations: Provide actionable advice "
+                        "Format your response as a markdown report with clear sections. "
+                        "Use bullet points for clarity and include specific quotes from the policy where relevant."
+                    )},
+                    {"role": "user", "content": f"Context:\n{context_text}\n\nPolicy Text:\n{policy_text}"}
+                ]
 
-                    try:
-                        result = groq_chat_completion(policy_prompt)
-                        st.session_state.policy_scan_result = result
-                    except Exception as e:
-                        st.session_state.policy_scan_result = f"[Error: {e}]"
-                    
-                st.session_state.policy_scan_loading = False
+                # Run the analysis in the background; the results column streams it in
+                try:
+                    submit_job("policy_scanner", policy_prompt)
+                except Exception as e:
+                    st.session_state.policy_scan_result = f"[Error: {e}]"
+                    st.session_state.policy_scan_loading = False
                 st.rerun()
 
     with results_col:
         if st.session_state.policy_scan_loading:
-            st.info("Analyzing policy with AI...")
+            st.markdown("<h5 style='color:#fff; margin-bottom:1rem;'>Analysis Results</h5>", unsafe_allow_html=True)
+            try:
+                st.session_state.policy_scan_result = await_job("policy_scanner")
+            except Exception as e:
+                st.session_state.policy_scan_result = f"[Error: {e}]"
+            st.session_state.policy_scan_loading = False
+            st.rerun()
         elif st.session_state.policy_scan_result:
             st.markdown("<h5 style='color:#fff; margin-bottom:1rem;'>Analysis Results</h5>", unsafe_allow_html=True)
             
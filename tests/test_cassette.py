@@ -0,0 +1,42 @@
+import pytest
+
+from utils import ai, cassette
+
+MESSAGES = [{"role": "user", "content": "Is a 2019 Creta with 60,000 km a good buy?"}]
+
+
+@pytest.fixture
+def cassette_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("GROQ_CASSETTE_PATH", str(tmp_path / "cassette.jsonl"))
+    monkeypatch.setenv("LLM_CACHE_DISABLED", "1")
+    monkeypatch.setenv("LLM_TELEMETRY_LOG", "")
+    return tmp_path / "cassette.jsonl"
+
+
+def test_replay_returns_the_recorded_chunks(cassette_path, monkeypatch):
+    def open_upstream(params, stream, page, session, info, ticket=None):
+        yield from ("Yes, ", "if the ", "price is right.")
+
+    monkeypatch.setattr(ai, "_open_upstream", open_upstream)
+    monkeypatch.setenv("GROQ_CASSETTE_MODE", "record")
+    recorded = list(ai.groq_chat_stream(MESSAGES, page="car_browser"))
+
+    def offline(*args, **kwargs):
+        raise AssertionError("replay must not call the API")
+
+    monkeypatch.setattr(ai, "_open_upstream", offline)
+    monkeypatch.setenv("GROQ_CASSETTE_MODE", "replay")
+    assert list(ai.groq_chat_stream(MESSAGES, page="car_browser")) == recorded == ["Yes, ", "if the ", "price is right."]
+    assert ai.groq_chat_completion(MESSAGES, page="car_browser") == "Yes, if the price is right."
+
+    with pytest.raises(cassette.CassetteMiss):
+        ai.groq_chat_completion([{"role": "user", "content": "Something never recorded"}], page="car_browser")
+
+
+def test_later_recording_wins(cassette_path, monkeypatch):
+    monkeypatch.setenv("GROQ_CASSETTE_MODE", "record")
+    params = {"model": "m", "messages": MESSAGES}
+    cassette.record("key", "car_browser", params, ["first"])
+    assert list(cassette.replay("key")) == ["first"]
+    cassette.record("key", "car_browser", params, ["second"])
+    assert list(cassette.replay("key")) == ["second"]
@@ -0,0 +1,149 @@
+import numpy as np
+
+from utils import telemetry
+from utils.catalog import Catalog, FilterCache, synthetic_listings
+from utils.geo import distance_km, geocode
+from utils.sample_data import BROWSER_MAKES
+
+
+def test_more_than_32767_categories():
+    rows = 40000
+    frame = synthetic_listings(rows, seed=0)
+    frame["variant"] = [f"Trim{i:05d}" for i in range(rows)]
+    catalog = Catalog.from_frame(frame.iloc[:rows - 1000])
+    catalog.add(frame.iloc[rows - 1000:])
+
+    assert len(catalog.categories["variant"]) == rows
+    last = np.array([rows - 1])
+    assert catalog.rows(last)["variant"].tolist() == [f"Trim{rows - 1:05d}"]
+    # Fuzzy search also finds near numbers, but must find the row itself
+    assert rows - 2 in catalog.match({"query": f"Trim{rows - 2:05d}"}).to_indices()
+
+
+def _listings():
+    return synthetic_listings(5000, seed=1)
+
+
+def test_filters_match_a_row_by_row_scan():
+    frame = _listings()
+    catalog = Catalog.from_frame(frame)
+    filters = {
+        "price_range": (300000, 1200000),
+        "year_range": (2018, 2022),
+        "make": ["Hyundai", "Others"],
+        "fuel_type": ["Petrol", "Diesel"],
+        "seating_capacity": ["5", "8+"],
+    }
+    expected = (
+        frame["price"].between(300000, 1200000) & frame["year"].between(2018, 2022)
+        & (frame["make"].eq("Hyundai") | ~frame["make"].isin(BROWSER_MAKES))
+        & frame["fuel_type"].isin(["Petrol", "Diesel"]) & ((frame["seating"] == 5) | (frame["seating"] >= 8))
+    )
+    assert catalog.match(filters).to_indices().tolist() == np.flatnonzero(expected).tolist()
+
+    # Bounds between the slider steps fall back to the sorted index
+    filters["price_range"] = (312345, 987654)
+    expected &= frame["price"].between(312345, 987654)
+    assert catalog.match(filters).to_indices().tolist() == np.flatnonzero(expected).tolist()
+
+    # Added listings are indexed, removed ones never match again
+    catalog.add(frame.iloc[:100])
+    catalog.remove(np.flatnonzero(expected)[:3])
+    again = np.concatenate((np.flatnonzero(expected)[3:], len(frame) + np.flatnonzero(expected[:100])))
+    assert catalog.match(filters).to_indices().tolist() == again.tolist()
+
+
+def test_facet_counts_ignore_their_own_filter():
+    frame = _listings()
+    catalog = Catalog.from_frame(frame)
+    filters = {"price_range": (0, 1000000), "year_range": (2015, 2025), "make": ["Tata"], "fuel_type": ["Diesel"]}
+    counts = catalog.facet_counts(filters)
+
+    in_price = frame["price"].between(0, 1000000)
+    # Make options are counted with every filter but the make one
+    others = frame[in_price & frame["fuel_type"].eq("Diesel")]
+    assert counts["make"]["Tata"] == (others["make"] == "Tata").sum()
+    assert counts["make"]["Hyundai"] == (others["make"] == "Hyundai").sum()
+    assert counts["make"]["Others"] == (~others["make"].isin(BROWSER_MAKES)).sum()
+    tata = frame[in_price & frame["make"].eq("Tata")]
+    assert counts["fuel_type"] == tata["fuel_type"].value_counts().to_dict()
+    chosen = tata[tata["fuel_type"] == "Diesel"]
+    assert counts["seating_capacity"]["5"] == (chosen["seating"] == 5).sum()
+    assert counts["price_range"] == (len(chosen), (frame["make"].eq("Tata") & frame["fuel_type"].eq("Diesel")).sum())
+
+
+def test_pages_come_out_in_sort_order():
+    frame = _listings()
+    catalog = Catalog.from_frame(frame)
+    # A common filter walks the sort permutation, a rare one sorts its few matches
+    for filters in ({"price_range": (400000, 900000)}, {"make": ["Hyundai"], "seating_capacity": ["7"], "fuel_type": ["Diesel"]}):
+        matches = np.flatnonzero(catalog.match(filters).to_mask())
+        for sort_by, column, descending in (("price_low_to_high", "price", False), ("year_new_to_old", "year", True)):
+            results = catalog.search(filters, sort_by)
+            ids = np.concatenate([results.indices(start, start + 20) for start in range(0, len(results), 20)])
+            assert len(results) == len(matches) and sorted(ids.tolist()) == matches.tolist()
+            expected = np.sort(frame[column].to_numpy()[matches])
+            assert frame[column].to_numpy()[ids].tolist() == (expected[::-1] if descending else expected).tolist()
+
+
+def test_narrowed_filters_match_a_full_evaluation():
+    catalog = Catalog.from_frame(_listings())
+    cache = FilterCache()
+    steps = [
+        {"price_range": (0, 5000000)},
+        {"price_range": (200000, 1500000)},
+        {"price_range": (200000, 1500000), "make": ["Hyundai", "Tata"]},
+        {"price_range": (200000, 1500000), "make": ["Tata"], "fuel_type": ["Diesel"]},
+        {"price_range": (250000, 1000000), "make": ["Tata"], "fuel_type": ["Diesel"], "seating_capacity": ["5"]},
+        {"price_range": (250000, 1000000), "make": ["Tata"], "location": "Pune", "radius_km": 100},
+    ]
+    outcomes = []
+    for filters in steps:
+        before = telemetry.registry.snapshot().get("car_browser", {})
+        matches = cache.match(catalog, filters)
+        after = telemetry.registry.snapshot()["car_browser"]
+        outcomes += [name for name in ("filter_full", "filter_refined", "filter_exact") if after.get(name, 0) > before.get(name, 0)]
+        assert matches.to_indices().tolist() == catalog.match(filters).to_indices().tolist()
+    # Dropping the fuel and seating filters widens the result, so the last step starts over
+    assert outcomes == ["filter_full"] + ["filter_refined"] * 4 + ["filter_full"]
+
+    previous = cache.matches
+    assert cache.match(catalog, dict(steps[-1])) is previous
+    # A catalog change invalidates the cached matches
+    catalog.remove(previous.to_indices()[:1])
+    assert cache.match(catalog, steps[-1]).count() == previous.count() - 1
+
+
+def test_search_tolerates_typos():
+    frame = _listings()
+    catalog = Catalog.from_frame(frame)
+    creta = np.flatnonzero(frame["model"] == "Creta").tolist()
+    for query in ("Creta", "cretta", "hundai creta"):
+        assert catalog.match({"query": query}).to_indices().tolist() == creta
+    assert set(catalog.rows(catalog.match({"query": "scorpoi"}).to_indices())["model"]) == {"Scorpio-N"}
+    variant = np.flatnonzero((frame["model"] == "Creta") & (frame["variant"] == "SX(O)")).tolist()
+    assert catalog.match({"query": "creta sx(o)"}).to_indices().tolist() == variant
+    assert catalog.match({"query": "xyzzy"}).count() == 0
+
+    suggestions = catalog.suggest("cret", 3)
+    assert [name[:2] for name, _ in suggestions] == [("Hyundai", "Creta")] * 3
+    assert [count for _, count in suggestions] == sorted((count for _, count in suggestions), reverse=True)
+
+
+def test_location_filter_matches_distances():
+    frame = _listings()
+    catalog = Catalog.from_frame(frame)
+    assert geocode("Koramangala, Bengaluru") == geocode("560034") == geocode("Banglore")
+    assert geocode("Navi Mumbai")[0] == "Navi Mumbai" and geocode("nowhere") is None
+
+    _, lat, lon = geocode("Pune")
+    distances = distance_km(frame["lat"].to_numpy(np.float64), frame["lon"].to_numpy(np.float64), lat, lon)
+    for km in (10, 150, 600):
+        filters = {"location": "Pune", "radius_km": km}
+        # Listings without a location have NaN distances and never match
+        expected = np.flatnonzero(distances <= km).tolist()
+        assert catalog.match(filters).to_indices().tolist() == expected
+        nearest = catalog.search(filters, "nearest").indices(0, 10)
+        assert (np.diff(distances[nearest]) >= 0).all()
+    # An unknown place is ignored rather than matching nothing
+    assert catalog.match({"location": "nowhere"}).count() == len(frame)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.depreciation import CURRENT_YEAR, fleet_values, project_values, value_bands
+
+
+def test_bands_follow_rates_that_change_by_year():
+    line = project_values(1000000, "Good", rates=0.3)[0]
+    line[3:] = line[2] * np.cumprod([0.95, 0.95, 0.95])
+    rates = 1 - line[1:] / line[:-1]
+    low, median, high = value_bands(1000000, "Good", 3, 36000, rates=rates[None], seed=0)[0]
+
+    assert (low <= line).all() and (line <= high).all()
+    # Market shocks only ever cut values, so the median sits a little under the line
+    assert np.allclose(median, line, rtol=0.05)
+
+
+def test_projection_compounds_each_cars_rate():
+    values = project_values([1000000, 500000], ["Good", "poor "], age=[2, 2], mileage=[24000, 64000], horizon=[5, 2])
+    assert np.allclose(values[0], 1000000 * 0.85 ** np.arange(6))
+    # 40,000 km over the typical 24,000 adds 4 points to the Poor base rate; the short horizon pads with NaN
+    assert np.allclose(values[1, :3], 500000 * 0.71 ** np.arange(3))
+    assert np.isnan(values[1, 3:]).all()
+    assert np.allclose(project_values(1000000, np.array([0]), horizon=1), [[1000000, 880000]])
+    with pytest.raises(ValueError, match="Unknown condition Mint"):
+        project_values(1000000, "Mint")
+
+
+def test_fleet_values_age_from_model_year():
+    frame = pd.DataFrame({"price": [800000, 800000], "condition": ["Good", "Good"], "year": [CURRENT_YEAR - 3, CURRENT_YEAR - 3],
+                          "mileage": [36000, np.nan]})
+    values = fleet_values(frame, horizon=3)
+    assert list(values.columns) == ["year_0", "year_1", "year_2", "year_3"]
+    # Typical mileage for the age, or none recorded, adds no premium
+    assert np.allclose(values.to_numpy(), 800000 * 0.85 ** np.arange(4))
+
+
+def test_seeded_bands_are_the_same_on_a_process_pool():
+    args = ([1000000, 600000, 450000], ["Excellent", "Good", "Fair"], [1, 4, 7], [10000, 50000, 120000])
+    bands = value_bands(*args, paths=500, seed=7)
+    assert bands.shape == (3, 3, 6)
+    assert np.array_equal(bands, value_bands(*args, paths=500, seed=7, workers=2))
+    assert np.allclose(bands[:, :, 0], np.array(args[0])[:, None])
+    low, median, high = bands[:, 0], bands[:, 1], bands[:, 2]
+    assert (low <= median).all() and (median <= high).all()
+    # Relative to the median, the spread only widens with time
+    assert (np.diff((high - low) / median, axis=1) > 0).all()
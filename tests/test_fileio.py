@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from utils.fileio import atomic_open, env_float, env_int, take_file_lock, write_atomic
+
+
+def test_failed_write_leaves_file_alone(tmp_path):
+    path = tmp_path / "CURRENT"
+    write_atomic(path, "snapshot-1")
+    with pytest.raises(RuntimeError):
+        with atomic_open(path) as f:
+            f.write("snapshot-2")
+            raise RuntimeError("interrupted")
+
+    assert path.read_text(encoding="utf-8") == "snapshot-1"
+    assert os.listdir(tmp_path) == ["CURRENT"]
+
+
+def test_lock_is_exclusive_until_stale(tmp_path):
+    path = tmp_path / "refresh.lock"
+    assert take_file_lock(path, 600)
+    assert not take_file_lock(path, 600)
+    # A crashed holder's lock is cleared once it is older than the timeout
+    os.utime(path, (0, 0))
+    assert take_file_lock(path, 600)
+
+
+def test_bad_env_value_falls_back(monkeypatch):
+    monkeypatch.setenv("FILEIO_TEST_SETTING", "eight")
+    assert env_int("FILEIO_TEST_SETTING", 8) == 8
+    assert env_float("FILEIO_TEST_SETTING", 0.5) == 0.5
+    monkeypatch.setenv("FILEIO_TEST_SETTING", "4")
+    assert env_int("FILEIO_TEST_SETTING", 8) == 4
@@ -0,0 +1,54 @@
+import io
+
+import pandas as pd
+
+from utils import fleet
+
+
+def _inventory(rows):
+    buffer = io.BytesIO(pd.DataFrame(rows).to_csv(index=False).encode("utf-8"))
+    buffer.name = "inventory.csv"
+    return buffer
+
+
+def test_missing_mileage_is_not_flagged(tmp_path, monkeypatch):
+    monkeypatch.setattr(fleet, "get_model", lambda: None)
+    out = tmp_path / "valued.csv"
+    stats, _ = fleet.value_fleet(_inventory([
+        {"make": "Hyundai", "model": "Creta", "year": 2020, "price": 1200000, "mileage": "", "condition": "Good"},
+        {"make": "Hyundai", "model": "Creta", "year": 2020, "price": 1200000, "mileage": "not known", "condition": "Good"},
+        {"make": "Hyundai", "model": "Creta", "year": 2020, "price": 1200000, "mileage": "40,000 km", "condition": "Good"},
+        {"make": "Hyundai", "model": "Creta", "year": 2020, "price": 1200000, "mileage": "250000", "condition": "Good"},
+    ]), str(out), workers=1)
+    valued = pd.read_csv(out, keep_default_na=False)
+    assert stats["valued"] == 4
+    assert valued["flags"].tolist() == ["", "", "", "high mileage"]
+    assert stats["flagged"] == 1
+
+
+def test_parquet_in_and_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(fleet, "get_model", lambda: None)
+    source = tmp_path / "inventory.parquet"
+    pd.DataFrame([
+        {"make": "Tata", "model": "Nexon", "year": "2022", "price": "9,50,000", "km_driven": "30000"},
+        {"make": "Kia", "model": "Seltos", "year": "2021", "price": "14 lakh", "km_driven": "45000"},
+    ]).to_parquet(source)
+    out = tmp_path / "valued.parquet"
+    stats, _ = fleet.value_fleet(str(source), str(out), "parquet", workers=1)
+    valued = pd.read_parquet(out)
+    assert stats["valued"] == 2
+    assert valued["price"].tolist() == [950000, 1400000]
+    assert (valued["value_year_5"] < valued["price"]).all()
+
+
+def test_parquet_after_a_chunk_of_bad_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(fleet, "get_model", lambda: None)
+    bad = {"make": "", "model": "", "year": "unknown", "price": "0", "mileage": ""}
+    good = {"make": "Tata", "model": "Nexon", "year": 2022, "price": 950000, "mileage": "30000", "vin": "MAT123"}
+    out = tmp_path / "valued.parquet"
+    for workers in (1, 2):
+        stats, _ = fleet.value_fleet(_inventory([bad] * 3 + [good] * 3), str(out), "parquet", paths=50, workers=workers, chunk_rows=3, seed=0)
+        valued = pd.read_parquet(out)
+        assert stats["valued"] == 3 and stats["rejected"] == 3
+        assert valued["vin"].tolist() == ["MAT123"] * 3
+        assert (valued["value_year_5_p10"] <= valued["value_year_5_p90"]).all()
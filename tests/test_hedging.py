@@ -0,0 +1,89 @@
+import time
+
+from utils import ai
+from utils.hedging import HedgePolicy, race
+
+PARAMS = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 10}
+
+
+class _Scheduler:
+    def try_acquire(self, page, session, tokens):
+        return object()
+
+
+def _fake_upstream(primary_seconds):
+    def open_upstream(params, stream, page, session, info, ticket=None):
+        hedge = ticket is not None
+        if not hedge:
+            time.sleep(primary_seconds)
+        info["prompt_tokens"] = 10 if hedge else 20
+        info["queue_wait"] = 0.0 if hedge else 0.5
+        yield "hedge" if hedge else "primary"
+    return open_upstream
+
+
+def _policy():
+    policy = HedgePolicy(max_ratio=1.0, min_delay=0.01)
+    for _ in range(policy.min_samples):
+        policy.record(0.02)
+    return policy
+
+
+def test_winning_hedge_telemetry(monkeypatch):
+    policy = _policy()
+    monkeypatch.setattr(ai, "_open_upstream", _fake_upstream(0.5))
+    monkeypatch.setattr(ai, "get_scheduler", _Scheduler)
+    monkeypatch.setattr(ai, "get_hedge_policy", lambda stream, model: policy)
+    info = {}
+    assert list(ai._hedged(PARAMS, False, "page", "session", info)) == ["hedge"]
+    assert info == {"prompt_tokens": 10, "queue_wait": 0.0, "hedged": True}
+    time.sleep(0.6)
+    # The losing primary finishing later must not touch the call's telemetry
+    assert info == {"prompt_tokens": 10, "queue_wait": 0.0, "hedged": True}
+
+
+def test_winning_primary_telemetry(monkeypatch):
+    policy = _policy()
+    monkeypatch.setattr(ai, "_open_upstream", _fake_upstream(0.0))
+    monkeypatch.setattr(ai, "get_scheduler", _Scheduler)
+    monkeypatch.setattr(ai, "get_hedge_policy", lambda stream, model: policy)
+    info = {}
+    assert list(ai._hedged(PARAMS, False, "page", "session", info)) == ["primary"]
+    assert info == {"prompt_tokens": 20, "queue_wait": 0.5}
+
+
+def test_hedges_stay_within_budget():
+    policy = HedgePolicy(max_ratio=0.25)
+    assert policy.delay() is None
+    for _ in range(policy.min_samples):
+        policy.record(0.02)
+    allowed = 0
+    for _ in range(399):
+        policy.delay()
+        allowed += policy.allow()
+    assert allowed == 100
+    assert policy.stats()["over_budget"] == 299
+
+
+def test_idle_credit_is_capped():
+    policy = HedgePolicy(max_ratio=0.5)
+    for _ in range(100):
+        policy.delay()
+    assert sum(policy.allow() for _ in range(20)) == 10
+
+
+def test_slow_primaries_hedge_at_most_the_budget():
+    policy = HedgePolicy(max_ratio=0.25, min_delay=0.01)
+    # Enough fast history that the slow calls below don't raise the hedge delay
+    for _ in range(100):
+        policy.record(0.02)
+
+    def slow():
+        time.sleep(0.1)
+        yield "primary"
+
+    def hedge():
+        yield "hedge"
+
+    replies = ["".join(race(slow(), hedge, policy)) for _ in range(8)]
+    assert replies.count("hedge") == policy.counters["fired"] == policy.counters["won"] == 2
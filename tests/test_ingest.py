@@ -0,0 +1,31 @@
+import json
+
+from utils.catalog import Catalog
+from utils.ingest import ingest
+
+
+def _feed(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+def test_delete_row_with_only_a_vin(tmp_path):
+    catalog = Catalog.empty()
+    stats = ingest(catalog, _feed(tmp_path / "listings.jsonl", [
+        {"vin": "v1", "make": "Hyundai", "model": "Creta", "price": "12,50,000", "year": 2021, "city": "Pune"},
+        {"vin": "V2", "make": "Tata", "model": "Nexon", "price": "9.5 lakh", "year": 2022, "city": "Delhi"},
+    ]))
+    assert stats["inserted"] == 2
+    assert catalog.live.count() == 2
+
+    stats = ingest(catalog, _feed(tmp_path / "sold.jsonl", [{"vin": "V1", "action": "sold"}]))
+    assert stats["rejected"] == 0
+    assert stats["deleted"] == 1
+    assert catalog.live.count() == 1
+
+
+def test_delete_row_without_a_vin_or_listing_is_rejected(tmp_path):
+    catalog = Catalog.empty()
+    stats = ingest(catalog, _feed(tmp_path / "sold.jsonl", [{"action": "sold"}]))
+    assert stats["rejected"] == 1
+    assert stats["deleted"] == 0
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from utils import jobs
+from utils.jobs import JobQueue, _follow
+
+
+class _Job:
+    def __init__(self):
+        self.text = ""
+        self.finished = threading.Event()
+
+
+def test_follow_yields_new_text_until_the_job_finishes():
+    job = _Job()
+
+    def run():
+        for chunk in ("one ", "two ", "three"):
+            time.sleep(0.05)
+            job.text += chunk
+        job.finished.set()
+
+    threading.Thread(target=run).start()
+    chunks = list(_follow(job, 0.01))
+    assert "".join(chunks) == "one two three"
+    # Quiet spells yield "" so the page keeps redrawing
+    assert "" in chunks
+
+
+def test_follow_stops_at_the_deadline():
+    job = _Job()
+    job.text = "partial"
+    started = time.monotonic()
+    chunks = list(_follow(job, 0.01, started + 0.1))
+    assert "".join(chunks) == "partial"
+    assert 0.1 <= time.monotonic() - started < 0.5
+
+
+def test_job_passes_use_cache_through(monkeypatch):
+    calls = []
+
+    def stream(messages, page=None, use_cache=True, session=None):
+        calls.append(use_cache)
+        yield "reply"
+
+    monkeypatch.setattr(jobs, "groq_chat_stream", stream)
+    queue = JobQueue(max_workers=1)
+    for use_cache in (True, False):
+        job = queue.submit("session", "ai_assistant", [], use_cache=use_cache)
+        assert job.finished.wait(5)
+        assert job.text == "reply"
+    assert calls == [True, False]
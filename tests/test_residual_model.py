@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from utils.residual_model import load, save, train
+
+
+def _history(rows=4000, seed=0):
+    """Past sales where Tatas lose 20% a year and Hyundais 12%, whatever their age."""
+    rng = np.random.default_rng(seed)
+    tata = rng.random(rows) < 0.5
+    age = rng.integers(1, 9, size=rows)
+    new_price = rng.uniform(600000, 1500000, size=rows)
+    retention = np.where(tata, np.log(0.80), np.log(0.88)) + rng.normal(0, 0.005, size=rows)
+    return pd.DataFrame({
+        "make": np.where(tata, "Tata", "Hyundai"),
+        "model": np.where(tata, "Nexon", "Creta"),
+        "fuel_type": "Petrol",
+        "year": 2024 - age,
+        "sale_year": 2024,
+        "price": new_price * np.exp(retention * age),
+        "new_price": new_price,
+        "mileage": 12000.0 * age,
+        "condition": "Good",
+    })
+
+
+def test_training_recovers_each_makes_rate(tmp_path):
+    history = _history()
+    artifact = train(history)
+    assert artifact["listings"] == len(history)
+    assert artifact["fit"]["rmse"] < artifact["fit"]["base_rates_rmse"]
+
+    path = tmp_path / "residual_model.json"
+    save(artifact, path)
+    model = load(path)
+    assert abs(model.rate("Tata", "Nexon", "Petrol", condition="Good", age=4, mileage=48000) - 0.20) < 0.005
+    assert abs(model.rate("Hyundai", "Creta", "Petrol", condition="Good", age=4, mileage=48000) - 0.12) < 0.005
+    # The vectorized rates agree with the per-car ones
+    sample = history.iloc[:50]
+    age = (sample["sale_year"] - sample["year"]).to_numpy()
+    expected = [
+        model.rate(row.make, row.model, row.fuel_type, condition=row.condition, age=a, mileage=row.mileage)
+        for row, a in zip(sample.itertuples(), age)
+    ]
+    assert np.allclose(model.rates(sample, age, sample["mileage"].to_numpy()), expected)
+
+
+def test_history_without_mileage_or_spread_of_ages():
+    history = _history()
+    history = history[history["year"] == 2020].assign(mileage=np.nan)
+    artifact = train(history)
+    assert artifact["slopes"] == {"age": 0.0, "km_per_year": 0.0}
+    assert artifact["fit"]["rmse"] < 0.01
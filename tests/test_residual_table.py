@@ -0,0 +1,41 @@
+import copy
+
+from utils.residual_model import ResidualModel, model_key
+from utils.residual_table import build
+
+
+def _artifact():
+    """A small trained-model artifact, as utils.residual_model.train() writes it."""
+    return {
+        "format": 1, "trained_at": 1700000000.0, "listings": 1000,
+        "intercept": -0.14, "age_mean": 5.0, "slopes": {"age": 0.004, "km_per_year": -0.01},
+        "effects": {
+            "make": {"hyundai": 0.01, "tata": -0.02},
+            "model": {model_key("Hyundai", "Creta"): 0.005, model_key("Tata", "Nexon"): -0.01},
+            "fuel_type": {"diesel": 0.01}, "transmission": {}, "city": {}, "condition": {"good": 0.0, "poor": -0.05},
+        },
+    }
+
+
+def test_make_change_keeps_grid_and_other_models():
+    artifact = _artifact()
+    table, _ = build(ResidualModel(artifact))
+
+    changed = copy.deepcopy(artifact)
+    changed["effects"]["model"][model_key("Hyundai", "Creta")] += 0.5
+    changed["trained_at"] += 1
+    model = ResidualModel(changed)
+    rebuilt, computed = build(model, table)
+
+    assert not computed
+    assert rebuilt.values is table.values
+    assert rebuilt.residual("Tata", "Nexon", "Diesel", "Good", 3, 40000) == table.residual("Tata", "Nexon", "Diesel", "Good", 3, 40000)
+    # A large effect pushes the rate against its limit, which must still apply
+    for age, mileage in ((3, 40000), (6.5, 90000)):
+        exact = (1 - model.rate("Hyundai", "Creta", "Diesel", "", "", "Good", age, mileage)) ** age
+        assert abs(rebuilt.residual("Hyundai", "Creta", "Diesel", "Good", age, mileage) / exact - 1) < 1e-5
+
+    changed["intercept"] += 0.01
+    changed["trained_at"] += 1
+    _, computed = build(ResidualModel(changed), rebuilt)
+    assert computed
@@ -0,0 +1,43 @@
+import json
+
+from utils import routing
+
+
+def _ask(text):
+    return [{"role": "system", "content": "You are a car shopping assistant."}, {"role": "user", "content": text}]
+
+
+def test_auto_routes_simple_questions_to_the_fast_model(monkeypatch):
+    monkeypatch.delenv("GROQ_ROUTING_POLICY", raising=False)
+    monkeypatch.delenv("GROQ_ROUTING_RULES", raising=False)
+    assert routing.route(_ask("hi"), "ai_assistant") == ("fast", routing.FAST_MODEL, 512)
+    assert routing.classify(_ask("Compare the loan interest on these two"), "ai_assistant") == "quality"
+    assert routing.classify(_ask("x" * 2500), "ai_assistant") == "quality"
+    # Pinned pages ignore the heuristic
+    assert routing.classify(_ask("hi"), "policy_scanner") == "quality"
+    assert routing.classify(_ask("Compare the loan interest on these two"), "car_browser") == "fast"
+
+
+def test_policies(monkeypatch):
+    monkeypatch.delenv("GROQ_ROUTING_RULES", raising=False)
+    question = _ask("Compare the loan interest on these two")
+    monkeypatch.setenv("GROQ_ROUTING_POLICY", "latency")
+    assert routing.classify(question, "ai_assistant") == "fast"
+    assert routing.classify(question, "policy_scanner") == "quality"
+    monkeypatch.setenv("GROQ_ROUTING_POLICY", "quality")
+    assert routing.classify(_ask("hi"), "car_browser") == "quality"
+    monkeypatch.setenv("GROQ_ROUTING_POLICY", "fastest")
+    assert routing.policy() == "auto"
+
+
+def test_rules_file_overrides_defaults(tmp_path, monkeypatch):
+    monkeypatch.delenv("GROQ_ROUTING_POLICY", raising=False)
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"pages": {"car_browser": "quality"}, "models": {"fast": {"max_tokens": 256}}}), encoding="utf-8")
+    monkeypatch.setenv("GROQ_ROUTING_RULES", str(path))
+    assert routing.classify(_ask("hi"), "car_browser") == "quality"
+    assert routing.route(_ask("hi"), "ai_assistant") == ("fast", routing.FAST_MODEL, 256)
+    # Pages the file doesn't mention keep their defaults
+    assert routing.classify(_ask("hi"), "policy_scanner") == "quality"
+    monkeypatch.delenv("GROQ_ROUTING_RULES")
+    assert routing.classify(_ask("hi"), "car_browser") == "fast"
@@ -0,0 +1,95 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import groq
+import httpx
+
+from utils import ai
+from utils.scheduler import RequestScheduler
+
+
+def _scheduler(**kwargs):
+    return RequestScheduler(requests_per_minute=6000, tokens_per_minute=10 ** 7, max_concurrent=1, **kwargs)
+
+
+def _queue(scheduler, order, page, session):
+    """Start a request that notes when it is granted, and wait until it is queued."""
+    depth = scheduler.stats()["queue_depth"]
+
+    def run():
+        ticket = scheduler.acquire(page, session, 10)
+        order.append(session)
+        scheduler.release(ticket)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    while scheduler.stats()["queue_depth"] == depth:
+        time.sleep(0.005)
+    return thread
+
+
+def test_busy_session_takes_turns():
+    scheduler = _scheduler()
+    order = []
+    holder = scheduler.acquire("car_browser", "holder", 10)
+    threads = [_queue(scheduler, order, "car_browser", session) for session in ("busy", "busy", "busy", "quiet")]
+    scheduler.release(holder)
+    for thread in threads:
+        thread.join(5)
+    assert order == ["busy", "quiet", "busy", "busy"]
+
+
+def test_chat_goes_ahead_of_reports():
+    scheduler = _scheduler()
+    order = []
+    holder = scheduler.acquire("car_browser", "holder", 10)
+    threads = [_queue(scheduler, order, "model_comparison", "report"), _queue(scheduler, order, "ai_assistant", "chat")]
+    scheduler.release(holder)
+    for thread in threads:
+        thread.join(5)
+    assert order == ["chat", "report"]
+
+
+def test_pause_holds_requests_and_hedges():
+    scheduler = _scheduler()
+    scheduler.pause(0.2)
+    assert scheduler.try_acquire("car_browser", "hedge", 10) is None
+    started = time.monotonic()
+    scheduler.release(scheduler.acquire("car_browser", "session", 10))
+    assert time.monotonic() - started >= 0.2
+    assert scheduler.stats()["throttled"] == 1
+
+
+def _rate_limited(headers):
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    return groq.RateLimitError("rate limited", response=httpx.Response(429, headers=headers, request=request), body=None)
+
+
+def test_retry_after_header():
+    assert ai._retry_after(_rate_limited({"retry-after": "2"})) == 2.0
+    assert ai._retry_after(_rate_limited({"retry-after-ms": "250", "retry-after": "1"})) == 0.25
+    assert ai._retry_after(_rate_limited({"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"})) is None
+
+
+def test_rate_limit_pauses_the_scheduler_and_retries(monkeypatch):
+    scheduler = _scheduler()
+    errors = [_rate_limited({"retry-after-ms": "200"})]
+
+    def create(stream, **params):
+        if errors:
+            raise errors.pop()
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content="reply"))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(ai, "get_client", lambda: client)
+    monkeypatch.setattr(ai, "get_scheduler", lambda: scheduler)
+    monkeypatch.setattr(ai.random, "uniform", lambda low, high: 0.0)
+    params = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 10}
+    info = {}
+    started = time.monotonic()
+    assert list(ai._open_upstream(params, False, "car_browser", "session", info)) == ["reply"]
+    assert time.monotonic() - started >= 0.2
+    assert info["retries"] == 1
+    stats = scheduler.stats()
+    assert stats["throttled"] == 1 and stats["granted"] == 2 and stats["running"] == 0
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from utils import ai
+from utils.singleflight import Flight
+
+MESSAGES = [{"role": "user", "content": "Which SUV holds its value best?"}]
+
+
+def _in_background(results):
+    def run():
+        try:
+            results.append(ai.groq_chat_completion(MESSAGES, page="car_browser", use_cache=False))
+        except Exception as e:
+            results.append(e)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def _followed():
+    flights = list(ai._flights._flights.values())
+    return flights and flights[0].followers
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """A fake upstream that sends its first chunk, then waits for ``release``."""
+    monkeypatch.setenv("LLM_TELEMETRY_LOG", "")
+    calls = []
+    release = threading.Event()
+    fake = {"calls": calls, "release": release, "error": None}
+
+    def open_upstream(key, params, stream, page, session, info):
+        calls.append(key)
+        yield "Creta "
+        release.wait(5)
+        if fake["error"]:
+            raise fake["error"]
+        yield "and Nexon"
+
+    monkeypatch.setattr(ai, "_upstream", open_upstream)
+    return fake
+
+
+def test_follower_shares_the_leaders_reply(upstream):
+    results = []
+    leader = _in_background(results)
+    _wait_for(lambda: upstream["calls"])
+    follower = _in_background(results)
+    _wait_for(_followed)
+    upstream["release"].set()
+    leader.join(5)
+    follower.join(5)
+    assert results == ["Creta and Nexon", "Creta and Nexon"]
+    assert len(upstream["calls"]) == 1
+    assert ai._flights.in_flight() == 0
+
+
+def test_leaders_error_reaches_the_follower(upstream):
+    upstream["error"] = RuntimeError("upstream failed")
+    results = []
+    leader = _in_background(results)
+    _wait_for(lambda: upstream["calls"])
+    follower = _in_background(results)
+    _wait_for(_followed)
+    upstream["release"].set()
+    leader.join(5)
+    follower.join(5)
+    assert [str(result) for result in results] == ["upstream failed", "upstream failed"]
+    assert len(upstream["calls"]) == 1
+    # The next identical request goes upstream again instead of reusing the failure
+    upstream["error"] = None
+    assert ai.groq_chat_completion(MESSAGES, page="car_browser", use_cache=False) == "Creta and Nexon"
+    assert len(upstream["calls"]) == 2
+
+
+def test_follower_times_out():
+    flight = Flight()
+    flight.publish("partial")
+    chunks = flight.follow(0.05)
+    assert next(chunks) == "partial"
+    with pytest.raises(TimeoutError):
+        next(chunks)
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+from utils import ai
+from utils.formatting import render_stream
+from utils.scheduler import RequestScheduler
+
+PARAMS = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 10}
+
+
+class _Placeholder:
+    def __init__(self):
+        self.drawn = []
+
+    def markdown(self, text, unsafe_allow_html=False):
+        self.drawn.append(text)
+
+
+class _Response:
+    """A streamed completion: chunk objects like the Groq SDK's, plus the HTTP response to close."""
+
+    def __init__(self, texts):
+        self.response = SimpleNamespace(closed=False)
+        self.response.close = lambda: setattr(self.response, "closed", True)
+        self._chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], x_groq=None) for text in texts]
+        usage = SimpleNamespace(prompt_tokens=5, completion_tokens=3, total_tokens=8)
+        self._chunks.append(SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage)))
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+
+def _client(monkeypatch, response):
+    scheduler = RequestScheduler(requests_per_minute=600, tokens_per_minute=10 ** 6, max_concurrent=1)
+    create = lambda stream, **params: response
+    monkeypatch.setattr(ai, "get_client", lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(ai, "get_scheduler", lambda: scheduler)
+    return scheduler
+
+
+def test_stream_yields_text_and_usage(monkeypatch):
+    response = _Response(["🟢 Good ", "buy"])
+    scheduler = _client(monkeypatch, response)
+    info = {}
+    assert list(ai._open_upstream(PARAMS, True, "car_browser", "session", info)) == ["🟢 Good ", "buy"]
+    assert info["prompt_tokens"] == 5 and info["completion_tokens"] == 3
+    assert response.response.closed
+    assert scheduler.stats()["running"] == 0
+
+
+def test_stopping_early_releases_the_connection(monkeypatch):
+    response = _Response(["one", "two", "three"])
+    scheduler = _client(monkeypatch, response)
+    stream = ai._open_upstream(PARAMS, True, "car_browser", "session", {})
+    assert next(stream) == "one"
+    stream.close()
+    assert response.response.closed
+    assert scheduler.stats()["running"] == 0
+
+
+def test_render_stream_draws_the_final_text_without_cursor():
+    placeholder = _Placeholder()
+    text = render_stream(iter(["🟢 Good ", "buy"]), placeholder, interval=0)
+    assert text == "🟢 Good buy"
+    assert placeholder.drawn[0].endswith(" ▌")
+    assert placeholder.drawn[-1].endswith("Good buy")
+    assert "color:#34d399" in placeholder.drawn[-1]
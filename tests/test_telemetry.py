@@ -0,0 +1,54 @@
+import json
+import random
+
+from utils.telemetry import Histogram, MetricsRegistry, record_call, registry
+
+
+def test_percentiles_are_within_five_percent():
+    rng = random.Random(1)
+    values = [rng.lognormvariate(-1, 1) for _ in range(5000)]
+    histogram = Histogram()
+    for value in values:
+        histogram.observe(value)
+    ordered = sorted(values)
+    for pct in (50, 95, 99):
+        exact = ordered[int(len(ordered) * pct / 100) - 1]
+        assert abs(histogram.percentile(pct) / exact - 1) <= 0.05
+    assert histogram.percentile(100) == histogram.max == ordered[-1]
+
+
+def test_small_and_empty_histograms():
+    histogram = Histogram()
+    assert histogram.summary()["p99"] == 0.0
+    histogram.observe(0.25)
+    # With one observation every percentile is that observation
+    assert histogram.percentile(50) == histogram.percentile(99) == 0.25
+
+
+def test_snapshot_groups_metrics_by_route():
+    metrics = MetricsRegistry()
+    for value in (0.1, 0.2, 0.3):
+        metrics.observe("latency", "car_browser", value)
+    metrics.increment("calls", "car_browser", 3)
+    metrics.increment("calls", "ai_assistant")
+    snapshot = metrics.snapshot()
+    assert snapshot["car_browser"]["calls"] == 3
+    assert snapshot["car_browser"]["latency"]["count"] == 3
+    assert abs(snapshot["car_browser"]["latency"]["mean"] - 0.2) < 1e-9
+    assert snapshot["ai_assistant"] == {"calls": 1}
+
+
+def test_record_call_logs_and_counts(tmp_path, monkeypatch):
+    log = tmp_path / "llm_calls.jsonl"
+    monkeypatch.setenv("LLM_TELEMETRY_LOG", str(log))
+    registry.reset()
+    record_call({"page": "policy_scanner", "cache": "hit", "latency": 0.01, "ttft": 0.01})
+    record_call({"page": "policy_scanner", "cache": "miss", "latency": 1.5, "retries": 2, "hedged": True})
+    snapshot = registry.snapshot()["policy_scanner"]
+    assert snapshot["calls"] == 2
+    assert snapshot["cache_hit"] == snapshot["cache_miss"] == snapshot["hedged"] == 1
+    assert snapshot["retries"] == 2
+    assert snapshot["latency"]["count"] == 2 and snapshot["ttft"]["count"] == 1
+    lines = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+    assert [line["cache"] for line in lines] == ["hit", "miss"]
+    registry.reset()
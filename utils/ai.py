@@ -1,15 +1,380 @@
 import os
+import random
+import threading
+import time
+import httpx
 import groq
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils import cassette, llm_cache, routing, telemetry
+from utils.fileio import env_float, env_int
+from utils.hedging import HedgePolicy, HedgeSkipped, race
+from utils.scheduler import RequestScheduler
+from utils.singleflight import SingleFlight
 
-def groq_chat_completion(messages):
-    """Send messages to Groq API and return the response."""
-    client = groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
-    response = client.chat.completions.create(
+_client = None
+_http_client = None
+_scheduler = None
+_hedge_policies = {}
+_client_lock = threading.Lock()
+_warm_started = False
+_flights = SingleFlight()
+
+
+def _build_client():
+    """Create a Groq client backed by a keep-alive HTTP connection pool.
+
+    Pool sizes and timeouts can be tuned through the environment:
+    GROQ_MAX_CONNECTIONS, GROQ_MAX_KEEPALIVE_CONNECTIONS, GROQ_KEEPALIVE_EXPIRY,
+    GROQ_CONNECT_TIMEOUT and GROQ_READ_TIMEOUT. Retries are left to ``_open_upstream``
+    so the scheduler sees every rate-limit response.
+    """
+    global _http_client
+    timeout = httpx.Timeout(
+        env_float("GROQ_READ_TIMEOUT", 60.0),
+        connect=env_float("GROQ_CONNECT_TIMEOUT", 5.0)
+    )
+    _http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=env_int("GROQ_MAX_CONNECTIONS", 50),
+            max_keepalive_connections=env_int("GROQ_MAX_KEEPALIVE_CONNECTIONS", 20),
+            keepalive_expiry=env_float("GROQ_KEEPALIVE_EXPIRY", 120.0)
+        ),
+        timeout=timeout
+    )
+    return groq.Groq(
+        api_key=os.getenv("GROQ_API_KEY"),
+        http_client=_http_client,
+        timeout=timeout,
+        max_retries=0
+    )
+
+
+def get_client():
+    """Return the process-wide Groq client, creating it on first use.
+
+    The client is shared by every Streamlit session in the process so the
+    underlying connections (and their TLS sessions) are reused across calls.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_client()
+    return _client
+
+
+def get_scheduler():
+    """Return the process-wide request scheduler, creating it on first use.
+
+    Budgets come from GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE and
+    GROQ_MAX_CONCURRENT.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _client_lock:
+            if _scheduler is None:
+                _scheduler = RequestScheduler(
+                    requests_per_minute=env_float("GROQ_REQUESTS_PER_MINUTE", 30),
+                    tokens_per_minute=env_float("GROQ_TOKENS_PER_MINUTE", 12000),
+                    max_concurrent=env_int("GROQ_MAX_CONCURRENT", 8)
+                )
+    return _scheduler
+
+
+def _session_id():
+    """Identify the calling Streamlit session, falling back to the thread."""
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is not None:
+        return ctx.session_id
+    return threading.current_thread().name
+
+
+def _warm():
+    try:
+        client = get_client()
+        _http_client.head(str(client.base_url))
+    except Exception:
+        # Warming is best effort; the first real request will connect instead.
+        pass
+
+
+def warm_client():
+    """Open a pooled connection to the Groq API in the background, once per process."""
+    global _warm_started
+    with _client_lock:
+        if _warm_started:
+            return
+        _warm_started = True
+    threading.Thread(target=_warm, name="groq-warmup", daemon=True).start()
+
+
+def _completion_kwargs(messages, page):
+    """Request parameters, with the model and max_tokens chosen by ``utils.routing``."""
+    _, model, max_tokens = routing.route(messages, page)
+    return dict(
         messages=messages,
-        model="llama-3.3-70b-versatile",
+        model=model,
         temperature=0.7,
-        max_tokens=1024,
-        top_p=1,
-        stream=False
+        max_tokens=max_tokens,
+        top_p=1
     )
-    return response.choices[0].message.content 
\ No newline at end of file
+
+
+def _estimate_tokens(params):
+    prompt_chars = sum(len(str(m["content"])) for m in params["messages"])
+    return prompt_chars // 4 + params["max_tokens"]
+
+
+def _retry_after(error):
+    """Seconds the API asked us to wait, from retry-after(-ms) headers."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def _record_usage(info, usage):
+    if usage is None:
+        return None
+    info["prompt_tokens"] = usage.prompt_tokens
+    info["completion_tokens"] = usage.completion_tokens
+    return usage.total_tokens
+
+
+def _open_upstream(params, stream, page, session, info, ticket=None):
+    """Yield the response text for ``params`` from the Groq API.
+
+    Each attempt waits for a scheduler slot first. Rate-limit, server and
+    connection errors are retried up to GROQ_MAX_RETRIES times with jittered
+    exponential backoff; a retry-after header pauses the whole scheduler.
+    A hedge arrives with its ``ticket`` already granted and is never retried.
+    Queue wait, retries and token usage are written into ``info``.
+    """
+    client = get_client()
+    scheduler = get_scheduler()
+    estimate = _estimate_tokens(params)
+    max_retries = 0 if ticket is not None else env_int("GROQ_MAX_RETRIES", 3)
+    attempt = 0
+    while True:
+        if ticket is None:
+            ticket = scheduler.acquire(page, session, estimate, timeout=env_float("GROQ_QUEUE_TIMEOUT", 120.0))
+            info["queue_wait"] = info.get("queue_wait", 0.0) + ticket.wait
+        try:
+            response = client.chat.completions.create(stream=stream, **params)
+            break
+        except (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError) as e:
+            scheduler.release(ticket, used_tokens=0)
+            ticket = None
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            info["retries"] = attempt
+            retry_after = _retry_after(e)
+            if isinstance(e, groq.RateLimitError):
+                scheduler.pause(retry_after or 0)
+            backoff = min(20.0, 0.5 * 2 ** (attempt - 1))
+            time.sleep((retry_after or 0) + random.uniform(0, backoff))
+        except BaseException:
+            scheduler.release(ticket)
+            raise
+
+    used_tokens = None
+    try:
+        if not stream:
+            used_tokens = _record_usage(info, response.usage)
+            yield response.choices[0].message.content
+            return
+        for chunk in response:
+            if getattr(chunk, "x_groq", None) and chunk.x_groq.usage:
+                used_tokens = _record_usage(info, chunk.x_groq.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        if stream:
+            # Release the pooled connection even if the caller stops early
+            response.response.close()
+        scheduler.release(ticket, used_tokens)
+
+
+def get_hedge_policy(stream, model):
+    """Return the hedge policy for streaming or blocking calls to ``model``.
+
+    Streaming and blocking calls hedge on different latencies (time to first
+    token versus the whole response), and each model has its own speed, so
+    every combination keeps its own history. Tuned by GROQ_HEDGE_PERCENTILE,
+    GROQ_HEDGE_MAX_RATIO and GROQ_HEDGE_MIN_DELAY.
+    """
+    key = (stream, model)
+    if key not in _hedge_policies:
+        with _client_lock:
+            _hedge_policies.setdefault(key, HedgePolicy(
+                percentile=env_float("GROQ_HEDGE_PERCENTILE", 90.0),
+                max_ratio=env_float("GROQ_HEDGE_MAX_RATIO", 0.1),
+                min_delay=env_float("GROQ_HEDGE_MIN_DELAY", 0.2)
+            ))
+    return _hedge_policies[key]
+
+
+def _hedging_enabled(page):
+    if os.getenv("GROQ_HEDGING", "").lower() not in ("1", "true", "yes"):
+        return False
+    pages = os.getenv("GROQ_HEDGE_PAGES")
+    return not pages or page in [p.strip() for p in pages.split(",")]
+
+
+def hedge_stats():
+    """Return how often hedges fired and won, per model for streaming and blocking calls."""
+    return {
+        f"{model} {'stream' if stream else 'blocking'}": policy.stats()
+        for (stream, model), policy in _hedge_policies.items()
+    }
+
+
+def _open_hedge(params, stream, page, session, info):
+    ticket = get_scheduler().try_acquire(page, session, _estimate_tokens(params))
+    if ticket is None:
+        raise HedgeSkipped()
+    return _open_upstream(params, stream, page, session, info, ticket=ticket)
+
+
+def _hedged(params, stream, page, session, info):
+    """Race the request against a hedge; only the winning attempt's measurements go into ``info``."""
+    primary_info, hedge_info = {}, {}
+    hedge_won = []
+    try:
+        yield from race(
+            _open_upstream(params, stream, page, session, primary_info),
+            lambda: _open_hedge(params, stream, page, session, hedge_info),
+            get_hedge_policy(stream, params["model"]),
+            won=hedge_won.append
+        )
+    finally:
+        if hedge_won and hedge_won[0]:
+            info.update(hedge_info, hedged=True)
+        else:
+            info.update(primary_info)
+
+
+def _upstream(key, params, stream, page, session, info):
+    if cassette.mode() == "replay":
+        return cassette.replay(key)
+    if not _hedging_enabled(page):
+        return _open_upstream(params, stream, page, session, info)
+    return _hedged(params, stream, page, session, info)
+
+
+def _complete(messages, page, use_cache, stream, session):
+    """Yield response text and record telemetry for the call once it ends."""
+    info = {"page": page, "stream": stream}
+    started = time.monotonic()
+    try:
+        for chunk in _produce(messages, page, use_cache, stream, session, info):
+            if "ttft" not in info:
+                info["ttft"] = time.monotonic() - started
+            yield chunk
+    except GeneratorExit:
+        info["cancelled"] = True
+        raise
+    except BaseException as e:
+        info["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        info["latency"] = time.monotonic() - started
+        telemetry.record_call(info)
+
+
+def _produce(messages, page, use_cache, stream, session, info):
+    """Yield response text, going through the cache and in-flight coalescing.
+
+    Concurrent callers with the same request key share one upstream call:
+    the first becomes the leader and the rest follow its output, including
+    any error it raises. Followers give up after SINGLEFLIGHT_TIMEOUT seconds.
+    While recording a cassette, cache reads are skipped so every request is captured.
+    """
+    params = _completion_kwargs(messages, page)
+    info["model"] = params["model"]
+    key = llm_cache.make_key(params)
+    caching = use_cache and llm_cache.enabled()
+    info["cache"] = "miss" if caching else "bypass"
+    if caching and cassette.mode() != "record":
+        cached = llm_cache.get(key)
+        if cached is not None:
+            info["cache"] = "hit"
+            yield cached
+            return
+
+    flight, leader = _flights.join(key)
+    if not leader:
+        info["coalesced"] = True
+        yield from flight.follow(env_float("SINGLEFLIGHT_TIMEOUT", 120.0))
+        return
+
+    upstream = _upstream(key, params, stream, page, session or _session_id(), info)
+    parts = []
+    try:
+        for chunk in upstream:
+            parts.append(chunk)
+            flight.publish(chunk)
+            yield chunk
+    except GeneratorExit:
+        if _flights.abandon(key, flight):
+            upstream.close()
+        else:
+            # Other sessions are waiting on this response; finish reading it for them
+            threading.Thread(
+                target=_drain,
+                args=(upstream, flight, key, params, parts, caching, page),
+                name="groq-drain",
+                daemon=True
+            ).start()
+        raise
+    except BaseException as e:
+        _flights.forget(key, flight)
+        flight.finish(e)
+        raise
+    _land(flight, key, params, parts, caching, page)
+
+
+def _land(flight, key, params, parts, caching, page):
+    if cassette.mode() == "record":
+        cassette.record(key, page, params, parts)
+    if caching:
+        llm_cache.put(key, "".join(parts), page)
+    _flights.forget(key, flight)
+    flight.finish()
+
+
+def _drain(upstream, flight, key, params, parts, caching, page):
+    try:
+        for chunk in upstream:
+            parts.append(chunk)
+            flight.publish(chunk)
+    except BaseException as e:
+        _flights.forget(key, flight)
+        flight.finish(e)
+        return
+    _land(flight, key, params, parts, caching, page)
+
+
+def groq_chat_completion(messages, page=None, use_cache=True, session=None):
+    """Send messages to Groq API and return the response.
+
+    Identical requests are answered from the shared response cache; pass
+    ``use_cache=False`` to always go to the API. ``session`` identifies the
+    caller to the scheduler when calling from outside a Streamlit script run.
+    """
+    return "".join(_complete(messages, page, use_cache, False, session))
+
+
+def groq_chat_stream(messages, page=None, use_cache=True, session=None):
+    """Send messages to Groq API and yield the response text as it arrives.
+
+    A cached response is yielded in one piece. Fresh responses are cached only
+    once the stream has been read to the end.
+    """
+    return _complete(messages, page, use_cache, True, session)
@@ -0,0 +1,220 @@
+import numpy as np
+
+_ONE = np.uint64(1)
+_M1, _M2, _M4, _H01 = (np.uint64(m) for m in (0x5555555555555555, 0x3333333333333333, 0x0F0F0F0F0F0F0F0F, 0x0101010101010101))
+
+
+def _word_count(size):
+    return (size + 63) >> 6
+
+
+def popcount(words):
+    """Total set bits in a uint64 array (SWAR; NumPy 1.x has no bit-count ufunc)."""
+    x = words - ((words >> _ONE) & _M1)
+    x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+    x = (x + (x >> np.uint64(4))) & _M4
+    return int(((x * _H01) >> np.uint64(56)).sum())
+
+
+def _bits(ids):
+    return np.left_shift(_ONE, (ids & 63).astype(np.uint64))
+
+
+class Bitmap:
+    """A set of row ids below ``size``, packed 64 to a word.
+
+    A bitmap is either dense, with every word in ``words``, or sparse, in
+    which case only the non-zero words are kept and ``positions`` holds
+    their word numbers in ascending order. As with roaring's array
+    containers, ``compress()`` picks whichever form is smaller, so rare
+    values cost little memory while common ones stay plain word arrays.
+    """
+
+    __slots__ = ("size", "words", "positions")
+
+    def __init__(self, size, words=None, positions=None):
+        self.size = size
+        self.words = np.zeros(_word_count(size), dtype=np.uint64) if words is None else words
+        self.positions = positions
+
+    @classmethod
+    def from_mask(cls, mask):
+        packed = np.packbits(mask, bitorder="little")
+        buffer = np.zeros(_word_count(len(mask)) * 8, dtype=np.uint8)
+        buffer[:len(packed)] = packed
+        return cls(len(mask), buffer.view(np.uint64))
+
+    @classmethod
+    def from_indices(cls, indices, size):
+        if len(indices) * 64 < size:
+            bitmap = cls(size)
+            bitmap.add(indices)
+            return bitmap
+        # Scattering into a byte mask is cheaper than setting bits one by one
+        mask = np.zeros(size, dtype=bool)
+        mask[indices] = True
+        return cls.from_mask(mask)
+
+    @property
+    def sparse(self):
+        return self.positions is not None
+
+    def dense(self):
+        """This bitmap with every word present (self if it already is)."""
+        if not self.sparse:
+            return self
+        words = np.zeros(_word_count(self.size), dtype=np.uint64)
+        words[self.positions] = self.words
+        return Bitmap(self.size, words)
+
+    def compress(self):
+        """Return the smaller of this bitmap's dense and sparse forms."""
+        dense = self.dense()
+        positions = np.flatnonzero(dense.words).astype(np.uint32)
+        # A sparse word costs 12 bytes (value and position), a dense one 8
+        if len(positions) * 12 < len(dense.words) * 8:
+            return Bitmap(self.size, dense.words[positions], positions)
+        return dense
+
+    def copy(self):
+        return Bitmap(self.size, self.words.copy(), None if self.positions is None else self.positions.copy())
+
+    def __or__(self, other):
+        result = self.dense().copy()
+        result.union_update(other)
+        return result
+
+    def __and__(self, other):
+        result = self.dense().copy()
+        result.intersection_update(other)
+        return result
+
+    def union_update(self, other):
+        """In place: self |= other. ``self`` must be dense."""
+        if other.sparse:
+            self.words[other.positions] |= other.words
+        else:
+            np.bitwise_or(self.words, other.words, out=self.words)
+
+    def intersection_update(self, other):
+        """In place: self &= other. ``self`` must be dense."""
+        if other.sparse:
+            kept = self.words[other.positions] & other.words
+            self.words[:] = 0
+            self.words[other.positions] = kept
+        else:
+            np.bitwise_and(self.words, other.words, out=self.words)
+
+    def difference_update(self, other):
+        """In place: self &= ~other. ``self`` must be dense."""
+        if other.sparse:
+            self.words[other.positions] &= ~other.words
+        else:
+            self.words &= ~other.words
+
+    def count(self):
+        return popcount(self.words)
+
+    def intersection_count(self, other):
+        """len(self & other) without building the intersection. ``self`` must be dense."""
+        if other.sparse:
+            return popcount(self.words[other.positions] & other.words)
+        return popcount(self.words & other.words)
+
+    def contains(self, ids):
+        """Boolean array: which of ``ids`` are in the bitmap."""
+        ids = np.asarray(ids, dtype=np.int64)
+        dense = self.dense()
+        return ((dense.words[ids >> 6] >> (ids & 63).astype(np.uint64)) & _ONE).astype(bool)
+
+    def to_mask(self):
+        """Boolean array with one entry per row."""
+        bits = np.unpackbits(self.dense().words.view(np.uint8), bitorder="little")
+        return bits[:self.size].view(bool)
+
+    def to_indices(self):
+        return np.flatnonzero(self.to_mask())
+
+    def _mutable(self):
+        if self.sparse:
+            dense = self.dense()
+            self.words, self.positions = dense.words, None
+
+    def add(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids):
+            self._mutable()
+            np.bitwise_or.at(self.words, ids >> 6, _bits(ids))
+
+    def discard(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids):
+            self._mutable()
+            np.bitwise_and.at(self.words, ids >> 6, ~_bits(ids))
+
+    def resize(self, size):
+        """Grow the universe to ``size`` rows; the new rows start unset."""
+        extra = _word_count(size) - _word_count(self.size)
+        if extra > 0 and not self.sparse:
+            self.words = np.concatenate((self.words, np.zeros(extra, dtype=np.uint64)))
+        self.size = size
+
+
+class SortedIndex:
+    """Row ids ordered by one numeric column, for range lookups and sorted scans."""
+
+    def __init__(self, values):
+        self.order = np.argsort(values, kind="stable")
+        self.values = values[self.order]
+
+    @classmethod
+    def from_sorted(cls, order, values):
+        """An index over already sorted ``values``, with ``order`` their row ids."""
+        index = cls.__new__(cls)
+        index.order, index.values = order, values
+        return index
+
+    def _position(self, value, side):
+        # Search with the column's own dtype; a wider key makes NumPy copy the whole column
+        info = np.iinfo(self.values.dtype) if self.values.dtype.kind in "iu" else None
+        if info is not None:
+            if value < info.min:
+                return 0
+            if value > info.max:
+                return len(self.values)
+        return np.searchsorted(self.values, self.values.dtype.type(value), side=side)
+
+    def between(self, low, high):
+        """Row ids with low <= value <= high."""
+        return self.order[self._position(low, "left"):self._position(high, "right")]
+
+    def below(self, bound):
+        """Row ids with value < bound."""
+        return self.order[:self._position(bound, "left")]
+
+    def add(self, ids, values):
+        """Insert new rows; ids must be larger than any already indexed."""
+        ordered = np.argsort(values, kind="stable")
+        ids, values = np.asarray(ids)[ordered], np.asarray(values)[ordered]
+        at = np.searchsorted(self.values, values, side="right")
+        self.order = np.insert(self.order, at, ids)
+        self.values = np.insert(self.values, at, values)
+
+    def offset(self, bound, descending=False):
+        """Sorted positions to skip before reaching ``bound`` in scan order."""
+        if descending:
+            return len(self.values) - self._position(bound, "right")
+        return self._position(bound, "left")
+
+
+def range_bitmaps(index, size, boundaries):
+    """``{b: Bitmap of rows with value < b}`` for each boundary, built off the sorted index."""
+    mask = np.zeros(size, dtype=bool)
+    done = 0
+    bitmaps = {}
+    for bound in sorted(boundaries):
+        ids = index.below(bound)
+        mask[ids[done:]] = True
+        done = len(ids)
+        bitmaps[bound] = Bitmap.from_mask(mask).compress()
+    return bitmaps
@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "cassette.jsonl")
+
+_lock = threading.Lock()
+_index = {}
+_index_stamp = None
+
+
+class CassetteMiss(KeyError):
+    """Replay mode was asked for a request that was never recorded."""
+
+
+def mode():
+    """Return "record", "replay" or None, from GROQ_CASSETTE_MODE."""
+    value = os.getenv("GROQ_CASSETTE_MODE", "").lower()
+    return value if value in ("record", "replay") else None
+
+
+def path():
+    return os.getenv("GROQ_CASSETTE_PATH", DEFAULT_PATH)
+
+
+def record(key, page, params, chunks):
+    """Append one finished completion, chunk by chunk, to the cassette."""
+    entry = {
+        "key": key,
+        "page": page,
+        "model": params.get("model"),
+        "temperature": params.get("temperature"),
+        "max_tokens": params.get("max_tokens"),
+        "top_p": params.get("top_p"),
+        "messages": params["messages"],
+        "chunks": list(chunks),
+    }
+    with _lock:
+        os.makedirs(os.path.dirname(path()) or ".", exist_ok=True)
+        with open(path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def load(cassette_path=None):
+    """Read a cassette into a dict of key -> entry; later recordings win."""
+    entries = {}
+    with open(cassette_path or path(), encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries[entry["key"]] = entry
+    return entries
+
+
+def lookup(key):
+    """Return the recorded entry for ``key``, reloading the file when it changes."""
+    global _index, _index_stamp
+    with _lock:
+        try:
+            stat = os.stat(path())
+        except FileNotFoundError:
+            raise CassetteMiss(key)
+        stamp = (path(), stat.st_mtime_ns, stat.st_size)
+        if stamp != _index_stamp:
+            _index = load()
+            _index_stamp = stamp
+        entry = _index.get(key)
+    if entry is None:
+        raise CassetteMiss(key)
+    return entry
+
+
+def replay(key):
+    """Yield the recorded chunks for ``key`` without touching the network."""
+    yield from lookup(key)["chunks"]
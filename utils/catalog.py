@@ -0,0 +1,684 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import telemetry
+from utils.bitmap import Bitmap, SortedIndex, range_bitmaps
+from utils.geo import CITIES, GridIndex, distance_km, geocode
+from utils.sample_data import BROWSER_MAKES, CATALOG_MODELS
+from utils.text_index import TextIndex, tokens
+
+CATEGORICAL = ("make", "model", "variant", "body_type", "fuel_type", "transmission", "city")
+# lat/lon are NaN for listings without a known location (city "Unknown")
+NUMERIC = {"price": np.int32, "year": np.int16, "seating": np.int8, "lat": np.float32, "lon": np.float32}
+COLUMNS = (
+    "make", "model", "variant", "price", "year", "body_type", "fuel_type", "transmission", "seating", "city", "lat", "lon"
+)
+# Columns the Car Browser's free-text search ("query" filter) looks in
+NAME_COLUMNS = ("make", "model", "variant")
+
+# Car Browser multiselect filter key -> indexed column
+FACETS = {
+    "make": "make",
+    "body_type": "body_type",
+    "fuel_type": "fuel_type",
+    "transmission": "transmission",
+    "seating_capacity": "seating",
+}
+RANGES = {"price_range": "price", "year_range": "year"}
+# Radius used when a location is set without one
+DEFAULT_RADIUS_KM = 50
+# Range bitmaps at the Car Browser slider steps; other bounds fall back to the sorted index
+RANGE_BOUNDARIES = {
+    "price": range(0, 5000001, 100000),
+    "year": range(2015, 2026),
+}
+
+# Car Browser sort keys -> (column, descending)
+SORTS = {
+    "price_low_to_high": ("price", False),
+    "price_high_to_low": ("price", True),
+    "year_new_to_old": ("year", True),
+    "year_old_to_new": ("year", False),
+}
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+class Catalog:
+    """Vehicle listings held column by column in NumPy arrays, with bitmap indexes.
+
+    Categorical columns are dictionary encoded: ``codes[name]`` holds an
+    int32 code per row and ``categories[name]`` the distinct values. Every
+    filterable value has a bitmap of the rows carrying it (``facets``), so a
+    filter combination is an OR within each facet and an AND across facets.
+    Price and year are kept in sorted indexes, with bitmaps of the rows
+    below each slider step (``ranges``), ``text`` indexes the listing
+    names for free-text search and ``grid`` the locations for radius
+    queries. Removed rows are cleared from the ``live``
+    bitmap, which every query starts from. ``keys`` identifies each listing
+    (see listing_keys) so feeds can update and delete them.
+    """
+
+    def __init__(self, codes, categories, numeric, keys, indexes=None):
+        self.codes = codes
+        self.categories = categories
+        self.numeric = numeric
+        self.keys = keys
+        self._index = {name: {value: i for i, value in enumerate(values)} for name, values in categories.items()}
+        self._lock = threading.RLock()
+        # Bumped on every add/remove, so cached results can tell they are out of date
+        self.version = 0
+        self._near = None
+        # Prebuilt indexes come from a snapshot (see utils/catalog_snapshot.py)
+        for name, index in (indexes or self._build_indexes()).items():
+            setattr(self, name, index)
+
+    def _build_indexes(self):
+        size = len(self)
+        facets = {column: {} for column in FACETS.values()}
+        for column in FACETS.values():
+            values = self._column(column)
+            for value in np.unique(values):
+                facets[column][self._key(column, value)] = Bitmap.from_mask(values == value).compress()
+        sorted_indexes = {name: SortedIndex(self.numeric[name]) for name in RANGE_BOUNDARIES}
+        return {
+            "key_index": SortedIndex(self.keys),
+            "text": TextIndex.from_codes(size, *self._name_codes(0)),
+            "grid": GridIndex.from_points(self.numeric["lat"], self.numeric["lon"]),
+            "live": Bitmap.from_mask(np.ones(size, dtype=bool)),
+            "facets": facets,
+            "sorted": sorted_indexes,
+            "ranges": {
+                name: range_bitmaps(sorted_indexes[name], size, boundaries)
+                for name, boundaries in RANGE_BOUNDARIES.items()
+            },
+        }
+
+    @classmethod
+    def from_frame(cls, frame):
+        codes, categories, numeric = {}, {}, {}
+        for name in CATEGORICAL:
+            column = pd.Categorical(frame[name].astype(str))
+            codes[name] = column.codes.astype(np.int32)
+            categories[name] = list(column.categories)
+        for name, dtype in NUMERIC.items():
+            numeric[name] = frame[name].to_numpy(dtype=dtype)
+        return cls(codes, categories, numeric, listing_keys(frame))
+
+    @classmethod
+    def empty(cls):
+        return cls.from_frame(pd.DataFrame({name: pd.Series(dtype=NUMERIC.get(name, object)) for name in COLUMNS}))
+
+    def __len__(self):
+        return len(self.numeric["price"])
+
+    def _name_codes(self, start):
+        """Make, model and variant codes of the rows from ``start`` on, and their category lists."""
+        return [self.codes[name][start:] for name in NAME_COLUMNS], [self.categories[name] for name in NAME_COLUMNS]
+
+    def _column(self, column):
+        """Codes for a categorical column, values for a numeric one."""
+        return self.codes[column] if column in self.codes else self.numeric[column]
+
+    def _key(self, column, value):
+        """Facet bitmap key: the decoded category, or the plain number."""
+        return self.categories[column][value] if column in self.codes else int(value)
+
+    def _facet_keys(self, key, selected):
+        if key == "make" and "Others" in selected:
+            # "Others" is every make the browser doesn't list by name
+            named = set(BROWSER_MAKES)
+            return [m for m in selected if m != "Others"] + [m for m in self.facets["make"] if m not in named]
+        if key == "seating_capacity":
+            exact = [int(s) for s in selected if s.isdigit()]
+            if "8+" in selected:
+                exact += [seats for seats in self.facets["seating"] if seats >= 8]
+            return exact
+        return selected
+
+    def _facet_union(self, column, keys):
+        bitmaps = [self.facets[column][k] for k in keys if k in self.facets[column]]
+        if len(bitmaps) == 1:
+            return bitmaps[0]
+        union = Bitmap(len(self))
+        for bitmap in bitmaps:
+            union.union_update(bitmap)
+        return union
+
+    def _apply_range(self, result, name, low, high):
+        """result &= rows with low <= name <= high."""
+        index, bitmaps = self.sorted[name], self.ranges[name]
+        if low in bitmaps and high + 1 in bitmaps:
+            result.intersection_update(bitmaps[high + 1])
+            result.difference_update(bitmaps[low])
+        elif low in bitmaps and high in bitmaps:
+            # Rows exactly at ``high`` sit just past the step bitmap
+            edge = index.between(high, high)
+            edge = edge[result.contains(edge)]
+            result.intersection_update(bitmaps[high])
+            result.difference_update(bitmaps[low])
+            result.add(edge)
+        else:
+            result.intersection_update(Bitmap.from_indices(index.between(low, high), len(self)))
+
+    def near(self, lat, lon, km):
+        """Bitmap of the rows within ``km`` of (lat, lon). Don't modify it; the last one is reused."""
+        key = (lat, lon, km, len(self))
+        if self._near is None or self._near[0] != key:
+            ids = self.grid.candidates(lat, lon, km)
+            ids = ids[distance_km(self.numeric["lat"][ids], self.numeric["lon"][ids], lat, lon) <= km]
+            self._near = (key, Bitmap.from_indices(np.sort(ids), len(self)))
+        return self._near[1]
+
+    def match(self, filters):
+        """Bitmap of the live rows matching a Car Browser ``st.session_state.filters`` dict.
+
+        Empty multiselects mean "any"; seating "8+" matches eight seats or more.
+        """
+        with self._lock:
+            result = self.live.dense().copy()
+            if "price_range" in filters:
+                self._apply_range(result, "price", *filters["price_range"])
+            if "year_range" in filters:
+                self._apply_range(result, "year", *filters["year_range"])
+            for key, column in FACETS.items():
+                if filters.get(key):
+                    result.intersection_update(self._facet_union(column, self._facet_keys(key, filters[key])))
+            if _query(filters):
+                result.intersection_update(self.text.match(_query(filters)))
+            if _origin(filters):
+                result.intersection_update(self.near(*_origin(filters)))
+            return result
+
+    def _rows_matching(self, key, selected, rows):
+        """Boolean array: which of ``rows`` pass one filter."""
+        if key == "query":
+            return self.text.match(_query({key: selected})).contains(rows)
+        if key == "near":
+            lat, lon, km = selected
+            return distance_km(self.numeric["lat"][rows], self.numeric["lon"][rows], lat, lon) <= km
+        if key in RANGES:
+            values = self.numeric[RANGES[key]][rows]
+            return (values >= selected[0]) & (values <= selected[1])
+        column = FACETS[key]
+        keys = self._facet_keys(key, selected)
+        if column in self.codes:
+            wanted = np.zeros(len(self.categories[column]), dtype=bool)
+            wanted[[self._index[column][k] for k in keys if k in self._index[column]]] = True
+            return wanted[self.codes[column][rows]]
+        return np.isin(self.numeric[column][rows], keys)
+
+    def refine(self, previous, previous_filters, filters):
+        """Matches for ``filters``, given ``previous`` (the matches for filters they narrow).
+
+        Only the filters that changed are evaluated, and only against the
+        previous matches: row by row when those are few, as bitmap ANDs
+        otherwise.
+        """
+        changed = [
+            key for key in (*RANGES, *FACETS)
+            if _normalized(filters.get(key)) != _normalized(previous_filters.get(key))
+        ]
+        if _query(filters) != _query(previous_filters):
+            changed.append("query")
+        if _origin(filters) != _origin(previous_filters):
+            changed.append("near")
+        selected = {**filters, "near": _origin(filters)}
+        with self._lock:
+            if not changed:
+                return previous
+            if previous.count() * 64 < len(self):
+                rows = previous.to_indices()
+                keep = np.ones(len(rows), dtype=bool)
+                for key in changed:
+                    keep &= self._rows_matching(key, selected[key], rows)
+                return Bitmap.from_indices(rows[keep], len(self))
+            result = previous.dense().copy()
+            for key in changed:
+                if key == "query":
+                    result.intersection_update(self.text.match(_query(filters)))
+                elif key == "near":
+                    result.intersection_update(self.near(*_origin(filters)))
+                elif key in RANGES:
+                    self._apply_range(result, RANGES[key], *filters[key])
+                else:
+                    result.intersection_update(self._facet_union(FACETS[key], self._facet_keys(key, filters[key])))
+            return result
+
+    def _constraints(self, filters):
+        """One bitmap per active filter, keyed like ``filters``."""
+        constraints = {}
+        for key, name in (("price_range", "price"), ("year_range", "year")):
+            if key in filters:
+                constraints[key] = self.live.dense().copy()
+                self._apply_range(constraints[key], name, *filters[key])
+        for key, column in FACETS.items():
+            if filters.get(key):
+                constraints[key] = self._facet_union(column, self._facet_keys(key, filters[key]))
+        if _query(filters):
+            constraints["query"] = self.text.match(_query(filters))
+        if _origin(filters):
+            constraints["near"] = self.near(*_origin(filters))
+        return constraints
+
+    def _option_counts(self, key, column, others):
+        counts = {}
+        for value, bitmap in self.facets[column].items():
+            n = others.intersection_count(bitmap)
+            if n:
+                counts[value] = n
+        if key == "make":
+            named = set(BROWSER_MAKES)
+            counts["Others"] = sum(n for make, n in counts.items() if make not in named)
+        elif key == "seating_capacity":
+            counts = {
+                **{str(seats): n for seats, n in counts.items() if seats < 8},
+                "8+": sum(n for seats, n in counts.items() if seats >= 8),
+            }
+        return counts
+
+    def facet_counts(self, filters):
+        """How many listings each filter option would match, given the other active filters.
+
+        Multiselect keys map option label -> count. Range keys, and "near"
+        when a location is set, map to (listings in the selected range,
+        listings available in any range).
+        """
+        with self._lock:
+            constraints = self._constraints(filters)
+            counts = {}
+            for key in ("price_range", "year_range", *FACETS, *(["near"] if "near" in constraints else [])):
+                others = self.live.dense().copy()
+                for other, bitmap in constraints.items():
+                    if other != key:
+                        others.intersection_update(bitmap)
+                if key in FACETS:
+                    counts[key] = self._option_counts(key, FACETS[key], others)
+                else:
+                    available = others.count()
+                    if key in constraints:
+                        others.intersection_update(constraints[key])
+                    counts[key] = (others.count(), available)
+            return counts
+
+    def suggest(self, query, limit=8):
+        """Type-ahead for the search box: up to ``limit`` ((make, model, variant), listings) pairs."""
+        with self._lock:
+            return self.text.suggest(query, self.live.dense(), limit)
+
+    def top_k(self, matches, sort_by="price_low_to_high", k=20, count=None, bounds=None):
+        """Row ids of the first ``k`` matches in ``sort_by`` order."""
+        with self._lock:
+            count = matches.count() if count is None else count
+            return ResultSet(self, matches, count, sort_by, bounds).indices(0, k)
+
+    def rows(self, indices):
+        """Decode the given rows into a DataFrame for display."""
+        with self._lock:
+            data = {}
+            for name in COLUMNS:
+                if name in self.codes:
+                    data[name] = np.asarray(self.categories[name], dtype=object)[self.codes[name][indices]]
+                else:
+                    data[name] = self.numeric[name][indices]
+            return pd.DataFrame(data)
+
+    def search(self, filters, sort_by="price_low_to_high", matches=None):
+        """Return a ResultSet of the listings matching ``filters``, in ``sort_by`` order.
+
+        Pass ``matches`` when the filters were already evaluated (see
+        FilterCache). "nearest" sorts by distance from the filters'
+        location, or by price when none is set.
+        """
+        with self._lock:
+            if matches is None:
+                matches = self.match(filters)
+            if sort_by == "nearest" and _origin(filters):
+                lat, lon, _ = _origin(filters)
+                rows = matches.to_indices()
+                distances = distance_km(self.numeric["lat"][rows], self.numeric["lon"][rows], lat, lon)
+                return ResultSet(self, matches, len(rows), ranked=rows[np.argsort(distances, kind="stable")])
+            column = SORTS.get(sort_by, SORTS["price_low_to_high"])[0]
+            return ResultSet(self, matches, matches.count(), sort_by, filters.get(f"{column}_range"))
+
+    def lookup(self, keys):
+        """Row id of the live listing for each key, or -1."""
+        with self._lock:
+            values = self.key_index.values
+            # Among equal keys the newest row sorts last, and only it can be live
+            positions = np.searchsorted(values, keys, side="right") - 1
+            found = positions >= 0
+            found[found] = values[positions[found]] == keys[found]
+            rows = np.full(len(keys), -1, dtype=np.int64)
+            rows[found] = self.key_index.order[positions[found]]
+            rows[found] = np.where(self.live.contains(rows[found]), rows[found], -1)
+            return rows
+
+    def apply_changes(self, removed=(), added=None, keys=None):
+        """Remove and add listings as one step, so no query sees half of an update."""
+        with self._lock:
+            if len(removed):
+                self.remove(removed)
+            if added is not None and len(added):
+                return self.add(added, keys)
+            return np.empty(0, dtype=np.int64)
+
+    def add(self, frame, keys=None):
+        """Append listings from ``frame``, updating every index in place; return their row ids."""
+        with self._lock:
+            start = len(self)
+            size = start + len(frame)
+            ids = np.arange(start, size)
+            keys = listing_keys(frame) if keys is None else keys
+            self.keys = np.concatenate((self.keys, keys))
+            self.key_index.add(ids, keys)
+            for name in CATEGORICAL:
+                values = frame[name].astype(str)
+                for value in pd.unique(values):
+                    if value not in self._index[name]:
+                        self._index[name][value] = len(self.categories[name])
+                        self.categories[name].append(value)
+                codes = pd.Categorical(values, categories=self.categories[name]).codes.astype(np.int32)
+                self.codes[name] = np.concatenate((self.codes[name], codes))
+            for name, dtype in NUMERIC.items():
+                self.numeric[name] = np.concatenate((self.numeric[name], frame[name].to_numpy(dtype=dtype)))
+            self.text.add(ids, *self._name_codes(start))
+            self.grid.add(ids, self.numeric["lat"][start:], self.numeric["lon"][start:])
+
+            self.live.resize(size)
+            self.live.add(ids)
+            for column, bitmaps in self.facets.items():
+                values = self._column(column)[start:]
+                for bitmap in bitmaps.values():
+                    bitmap.resize(size)
+                for value in np.unique(values):
+                    key = self._key(column, value)
+                    bitmap = bitmaps.get(key, Bitmap(size))
+                    was_sparse = bitmap.sparse or key not in bitmaps
+                    bitmap.add(ids[values == value])
+                    bitmaps[key] = bitmap.compress() if was_sparse else bitmap
+            for name, bitmaps in self.ranges.items():
+                values = self.numeric[name][start:]
+                self.sorted[name].add(ids, values)
+                for bound, bitmap in bitmaps.items():
+                    bitmap.resize(size)
+                    below = ids[values < bound]
+                    if len(below):
+                        was_sparse = bitmap.sparse
+                        bitmap.add(below)
+                        bitmaps[bound] = bitmap.compress() if was_sparse else bitmap
+            self.version += 1
+            return ids
+
+    def remove(self, ids):
+        """Drop listings by row id. Their slots stay in the columns but never match again."""
+        with self._lock:
+            self.live.discard(ids)
+            self.version += 1
+
+
+class ResultSet:
+    """The listings matching one filter state, in sort order, materialised as pages are read.
+
+    Rows come off the column's precomputed sort permutation: each read
+    walks it a block further, keeping the rows in the match bitmap, so a
+    query never sorts and reading page ``n`` only scans as far as page
+    ``n`` needs. When matches are rare enough that the walk would cover
+    most of the permutation, they are sorted directly instead. The
+    permutation is captured up front, so later catalog changes don't
+    shift a result set already being paged through.
+    """
+
+    def __init__(self, catalog, matches, count, sort_by="price_low_to_high", bounds=None, ranked=None):
+        column, self.descending = SORTS.get(sort_by, SORTS["price_low_to_high"])
+        self.catalog = catalog
+        self.matches = matches
+        self.count = count
+        self.version = catalog.version
+        index = catalog.sorted[column]
+        self._order = index.order
+        self._scanned = 0
+        if bounds is not None and count:
+            self._scanned = index.offset(bounds[1] if self.descending else bounds[0], self.descending)
+        if ranked is not None:
+            # Already in order (e.g. by distance), nothing left to scan
+            self._found = ranked
+            self._scanned = len(self._order)
+        elif not count:
+            self._found = np.empty(0, dtype=np.int64)
+        elif count * 64 < len(self._order):
+            rows = matches.to_indices()
+            order = np.argsort(catalog.numeric[column][rows], kind="stable")
+            self._found = rows[order[::-1] if self.descending else order]
+            self._scanned = len(self._order)
+        else:
+            self._found = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return self.count
+
+    def _fill(self, wanted):
+        wanted = min(wanted, self.count)
+        found = [self._found]
+        have = len(self._found)
+        size = len(self._order)
+        while have < wanted and self._scanned < size:
+            block = int(2 * (wanted - have) * size / self.count) + 64
+            if self.descending:
+                ids = self._order[max(size - self._scanned - block, 0):size - self._scanned][::-1]
+            else:
+                ids = self._order[self._scanned:self._scanned + block]
+            hits = ids[self.matches.contains(ids)]
+            found.append(hits)
+            have += len(hits)
+            self._scanned += block
+        self._found = np.concatenate(found)
+
+    def indices(self, start, stop):
+        """Row ids of the matches at sorted positions [start, stop)."""
+        if len(self._found) < stop:
+            self._fill(stop)
+        return self._found[start:stop]
+
+    def page(self, number, size):
+        """DataFrame of page ``number`` (from 0) with ``size`` rows per page."""
+        return self.catalog.rows(self.indices(number * size, (number + 1) * size))
+
+    def page_count(self, size):
+        return max((self.count + size - 1) // size, 1)
+
+
+def _normalized(value):
+    """A filter value in comparable form; an empty multiselect is the same as none."""
+    if not value:
+        return None
+    if isinstance(value, list):
+        return frozenset(value)
+    return tuple(value)
+
+
+def _query(filters):
+    """The free-text search in ``filters``, in comparable form ("" for none)."""
+    return " ".join(tokens(filters.get("query") or ""))
+
+
+def _origin(filters):
+    """(lat, lon, km) for the filters' "within N km of" location, or None if unset or unknown."""
+    place = geocode(filters.get("location") or "")
+    if place is None:
+        return None
+    return place[1], place[2], float(filters.get("radius_km") or DEFAULT_RADIUS_KM)
+
+
+def is_refinement(filters, previous):
+    """True when every listing matching ``filters`` also matches ``previous``."""
+    # Fuzzy matching makes a longer query no narrower; only adding one is
+    if _query(previous) and _query(filters) != _query(previous):
+        return False
+    if _origin(previous):
+        origin = _origin(filters)
+        if origin is None or origin[:2] != _origin(previous)[:2] or origin[2] > _origin(previous)[2]:
+            return False
+    for key in RANGES:
+        if key not in filters:
+            if key in previous:
+                return False
+        elif key in previous:
+            low, high = filters[key]
+            if low < previous[key][0] or high > previous[key][1]:
+                return False
+    for key in FACETS:
+        if previous.get(key) and not (filters.get(key) and set(filters[key]) <= set(previous[key])):
+            return False
+    return True
+
+
+class FilterCache:
+    """One session's last evaluated filters and their matches.
+
+    Repeating the same filters (e.g. only the sort order changed) reuses
+    the matches. Narrowing them evaluates just the delta against the last
+    matches (Catalog.refine). Anything else, or a catalog that changed in
+    between, is a full evaluation. Outcomes and timings go to the metrics
+    registry under the ``car_browser`` route.
+    """
+
+    def __init__(self):
+        self.filters = None
+        self.matches = None
+        self.catalog = None
+        self.version = None
+
+    def match(self, catalog, filters):
+        started = time.perf_counter()
+        outcome = "full"
+        # A swapped-in snapshot is a different catalog, whatever its version
+        if self.matches is not None and self.catalog is catalog and self.version == catalog.version:
+            if _query(filters) == _query(self.filters) and _origin(filters) == _origin(self.filters) and all(
+                _normalized(filters.get(key)) == _normalized(self.filters.get(key)) for key in (*RANGES, *FACETS)
+            ):
+                outcome = "exact"
+            elif is_refinement(filters, self.filters):
+                outcome = "refined"
+        if outcome == "exact":
+            matches = self.matches
+        elif outcome == "refined":
+            matches = catalog.refine(self.matches, self.filters, filters)
+        else:
+            matches = catalog.match(filters)
+        telemetry.registry.increment(f"filter_{outcome}", "car_browser")
+        telemetry.registry.observe("filter_time", "car_browser", time.perf_counter() - started)
+        self.filters = {key: (list(value) if isinstance(value, list) else value) for key, value in filters.items()}
+        self.matches = matches
+        self.catalog = catalog
+        self.version = catalog.version
+        return matches
+
+
+def synthetic_listings(rows, seed=0):
+    """Generate ``rows`` plausible used-car listings from CATALOG_MODELS."""
+    rng = np.random.default_rng(seed)
+    models = pd.DataFrame(CATALOG_MODELS)
+    pick = rng.integers(len(models), size=rows)
+
+    def choose(options):
+        counts = options.map(len).to_numpy()[pick]
+        offsets = (rng.random(rows) * counts).astype(np.int64)
+        flat = np.asarray([value for values in options for value in values], dtype=object)
+        starts = np.concatenate(([0], np.cumsum(options.map(len).to_numpy())[:-1]))
+        return flat[starts[pick] + offsets]
+
+    low = models["price_lakh"].map(lambda r: r[0]).to_numpy()[pick]
+    high = models["price_lakh"].map(lambda r: r[1]).to_numpy()[pick]
+    year = rng.integers(2015, 2025, size=rows)
+    new_price = (low + (high - low) * rng.random(rows)) * 100000
+    # Roughly 12% a year of depreciation, with some spread between listings
+    age = 2024 - year
+    price = new_price * (0.88 ** age) * rng.uniform(0.9, 1.1, size=rows)
+    # Listings cluster around cities, the metros listed first most of all; a few have no location
+    weights = np.where(np.arange(len(CITIES)) < 8, 6.0, np.where(np.arange(len(CITIES)) < 30, 2.0, 1.0))
+    city = rng.choice(len(CITIES), size=rows, p=weights / weights.sum())
+    located = rng.random(rows) >= 0.02
+    city_lat = np.array([c[2] for c in CITIES])[city] + rng.normal(0, 0.08, size=rows)
+    city_lon = np.array([c[3] for c in CITIES])[city] + rng.normal(0, 0.08, size=rows)
+    return pd.DataFrame({
+        "make": models["make"].to_numpy()[pick],
+        "model": models["model"].to_numpy()[pick],
+        "variant": choose(models["variants"]),
+        "price": (np.round(price / 1000) * 1000).astype(np.int32),
+        "year": year.astype(np.int16),
+        "body_type": models["body_type"].to_numpy()[pick],
+        "fuel_type": choose(models["fuel_types"]),
+        "transmission": choose(models["transmissions"]),
+        "seating": models["seating"].to_numpy()[pick].astype(np.int8),
+        "city": np.where(located, np.array([c[0] for c in CITIES], dtype=object)[city], "Unknown"),
+        "lat": np.where(located, city_lat, np.nan).astype(np.float32),
+        "lon": np.where(located, city_lon, np.nan).astype(np.float32),
+    })
+
+
+def _column_hash(values):
+    if values.dtype.kind in "iuf":
+        return pd.util.hash_array(values)
+    # Hash each distinct string once; categorical columns have only a few hundred
+    codes, uniques = pd.factorize(values)
+    return pd.util.hash_array(np.asarray(uniques, dtype=object))[codes]
+
+
+def listing_keys(frame):
+    """A uint64 key per listing: its VIN when the feed has one, else a fingerprint of every column."""
+    keys = np.zeros(len(frame), dtype=np.uint64)
+    for name in COLUMNS:
+        values = frame[name].to_numpy(dtype=NUMERIC[name]) if name in NUMERIC else frame[name].astype(str).to_numpy()
+        keys = (keys * np.uint64(1000003)) ^ _column_hash(values)
+    if "vin" in frame:
+        vin = frame["vin"].fillna("").astype(str).str.strip().str.upper()
+        has_vin = (vin != "").to_numpy()
+        if has_vin.any():
+            keys = np.where(has_vin, pd.util.hash_array(("vin:" + vin).to_numpy(dtype=object)), keys)
+    return keys
+
+
+def load_catalog():
+    """Build the catalog from the feeds in CATALOG_PATH, or from synthetic listings.
+
+    CATALOG_PATH takes one or more CSV/JSONL/Parquet feeds separated by
+    ``os.pathsep``; they are streamed in order, so later ones can update or
+    delete listings from earlier ones.
+    """
+    path = os.getenv("CATALOG_PATH")
+    if path:
+        # Imported here because the ingest module builds on this one
+        from utils.ingest import ingest
+
+        catalog = Catalog.empty()
+        for feed in path.split(os.pathsep):
+            ingest(catalog, feed)
+        return catalog
+    return Catalog.from_frame(synthetic_listings(int(os.getenv("CATALOG_SYNTHETIC_ROWS", "200000"))))
+
+
+def get_catalog():
+    """Return the process-wide catalog, loading it on first use.
+
+    With CATALOG_SNAPSHOT_DIR set, every process on the host maps the same
+    published snapshot instead, and moves to a newer one once it appears.
+    """
+    global _catalog
+    if os.getenv("CATALOG_SNAPSHOT_DIR"):
+        # Imported here because the snapshot module builds on this one
+        from utils import catalog_snapshot
+
+        catalog = catalog_snapshot.current()
+        if catalog is not None:
+            return catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_catalog()
+    return _catalog
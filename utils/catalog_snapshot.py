@@ -0,0 +1,234 @@
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from utils.bitmap import Bitmap, SortedIndex
+from utils.catalog import CATEGORICAL, NUMERIC, Catalog, load_catalog
+from utils.fileio import env_float, take_file_lock, write_atomic
+from utils.geo import GridIndex
+from utils.text_index import TextIndex
+
+POINTER = "CURRENT"
+LOCK = "publish.lock"
+COLUMNS_FILE = "columns.bin"
+DICTIONARY_FILE = "dictionary.json"
+MAGIC = b"CATSNAP1"
+# Bumped when the catalog's columns or indexes change; older snapshots are not loaded
+FORMAT = 2
+# Arrays start on cache-line boundaries in the columns file
+ALIGN = 64
+
+_lock = threading.Lock()
+_cached = None
+_cached_stamp = None
+
+
+def snapshot_dir():
+    """The shared snapshot directory, or None when each process loads its own catalog."""
+    return os.getenv("CATALOG_SNAPSHOT_DIR") or None
+
+
+def _bitmap_layout(bitmaps, name, arrays):
+    """Pack a dict of bitmaps into two arrays; return [key, word start, word stop, positions start] per bitmap.
+
+    Positions start is None for dense bitmaps.
+    """
+    layout, words, positions = [], [], []
+    word_at = position_at = 0
+    for key, bitmap in bitmaps.items():
+        layout.append([key, word_at, word_at + len(bitmap.words), position_at if bitmap.sparse else None])
+        words.append(bitmap.words)
+        word_at += len(bitmap.words)
+        if bitmap.sparse:
+            positions.append(bitmap.positions)
+            position_at += len(bitmap.positions)
+    arrays[f"{name}.words"] = np.concatenate(words) if words else np.empty(0, dtype=np.uint64)
+    arrays[f"{name}.positions"] = np.concatenate(positions) if positions else np.empty(0, dtype=np.uint32)
+    return layout
+
+
+def _bitmaps(layout, name, array, size):
+    words, positions = array(f"{name}.words"), array(f"{name}.positions")
+    bitmaps = {}
+    for key, start, stop, position in layout:
+        sparse = None if position is None else positions[position:position + stop - start]
+        bitmaps[key] = Bitmap(size, words[start:stop], sparse)
+    return bitmaps
+
+
+def write(catalog, path):
+    """Write ``catalog`` and all its indexes to the directory ``path``.
+
+    Every array goes into one flat ``columns.bin``; ``dictionary.json``
+    holds the category values and where each array sits in the file.
+    """
+    os.makedirs(path, exist_ok=True)
+    with catalog._lock:
+        arrays = {"keys": catalog.keys, "key_index.order": catalog.key_index.order, "key_index.values": catalog.key_index.values}
+        arrays.update({f"codes.{name}": codes for name, codes in catalog.codes.items()})
+        arrays.update({f"numeric.{name}": values for name, values in catalog.numeric.items()})
+        for name, index in catalog.sorted.items():
+            arrays[f"sorted.{name}.order"], arrays[f"sorted.{name}.values"] = index.order, index.values
+        arrays["grid.order"], arrays["grid.values"] = catalog.grid.index.order, catalog.grid.index.values
+        dictionary = {
+            "format": FORMAT,
+            "rows": len(catalog),
+            "version": catalog.version,
+            "created_at": time.time(),
+            "categories": catalog.categories,
+            "live": _bitmap_layout({"live": catalog.live}, "live", arrays),
+            "facets": {column: _bitmap_layout(bitmaps, f"facets.{column}", arrays) for column, bitmaps in catalog.facets.items()},
+            "ranges": {name: _bitmap_layout(bitmaps, f"ranges.{name}", arrays) for name, bitmaps in catalog.ranges.items()},
+            "text": {"names": catalog.text.names, "rows": _bitmap_layout(dict(enumerate(catalog.text.rows)), "text", arrays)},
+            "arrays": {},
+        }
+        with open(os.path.join(path, COLUMNS_FILE), "wb") as f:
+            f.write(MAGIC)
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                f.write(b"\0" * (-f.tell() % ALIGN))
+                dictionary["arrays"][name] = [f.tell(), array.dtype.str, len(array)]
+                f.write(array.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+    write_atomic(os.path.join(path, DICTIONARY_FILE), json.dumps(dictionary, ensure_ascii=False))
+
+
+def load(path):
+    """Map the snapshot at ``path`` into a Catalog without copying or parsing its columns.
+
+    The file is mapped copy-on-write: pages are shared with every other
+    process mapping the same snapshot, and a process that later adds or
+    removes listings only gets private copies of the pages it touches.
+    """
+    with open(os.path.join(path, DICTIONARY_FILE), encoding="utf-8") as f:
+        dictionary = json.load(f)
+    if dictionary.get("format") != FORMAT:
+        raise ValueError(f"{path} is an older catalog snapshot; publish a new one")
+    with open(os.path.join(path, COLUMNS_FILE), "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a catalog snapshot")
+    if hasattr(mmap, "MADV_WILLNEED"):
+        # Start reading a cold file in the background; pages still map lazily
+        buffer.madvise(mmap.MADV_WILLNEED)
+
+    def array(name):
+        offset, dtype, length = dictionary["arrays"][name]
+        return np.frombuffer(buffer, dtype=dtype, count=length, offset=offset)
+
+    size = dictionary["rows"]
+    indexes = {
+        "key_index": SortedIndex.from_sorted(array("key_index.order"), array("key_index.values")),
+        "live": _bitmaps(dictionary["live"], "live", array, size)["live"],
+        "facets": {column: _bitmaps(layout, f"facets.{column}", array, size) for column, layout in dictionary["facets"].items()},
+        "sorted": {name: SortedIndex.from_sorted(array(f"sorted.{name}.order"), array(f"sorted.{name}.values")) for name in dictionary["ranges"]},
+        "ranges": {name: _bitmaps(layout, f"ranges.{name}", array, size) for name, layout in dictionary["ranges"].items()},
+        "grid": GridIndex(SortedIndex.from_sorted(array("grid.order"), array("grid.values"))),
+        "text": TextIndex(size, dictionary["text"]["names"], _bitmaps(dictionary["text"]["rows"], "text", array, size).values()),
+    }
+    catalog = Catalog(
+        {name: array(f"codes.{name}") for name in CATEGORICAL},
+        dictionary["categories"],
+        {name: array(f"numeric.{name}") for name in NUMERIC},
+        array("keys"),
+        indexes,
+    )
+    catalog.version = dictionary["version"]
+    return catalog
+
+
+def _prune(directory, keep):
+    # Processes still mapping a removed snapshot keep reading it until they swap
+    names = sorted(n for n in os.listdir(directory) if n.startswith("snapshot-"))
+    for name in names[:-keep]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def _current_name(directory):
+    try:
+        with open(os.path.join(directory, POINTER), encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def publish(catalog=None):
+    """Write a snapshot of ``catalog`` (default: a fresh load_catalog()) and swap CURRENT to it.
+
+    Returns the snapshot name, or None if another process is publishing.
+    Readers pick the new snapshot up on their next get_catalog() call.
+    """
+    directory = snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    lock_path = os.path.join(directory, LOCK)
+    if not take_file_lock(lock_path, env_float("CATALOG_SNAPSHOT_LOCK_TIMEOUT", 600)):
+        return None
+    try:
+        catalog = load_catalog() if catalog is None else catalog
+        previous = _current_name(directory)
+        number = int(previous.rsplit("-", 1)[1]) + 1 if previous else 1
+        name = f"snapshot-{number:08d}"
+        write(catalog, os.path.join(directory, name))
+        write_atomic(os.path.join(directory, POINTER), name)
+        _prune(directory, int(env_float("CATALOG_KEEP_SNAPSHOTS", 2)))
+        return name
+    finally:
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+
+def current():
+    """Return the catalog mapped from the published snapshot, publishing one if there is none yet.
+
+    The snapshot is re-mapped only when the CURRENT pointer changes, so
+    this is one stat() call on the hot path. Returns None if no snapshot
+    could be published in time.
+    """
+    global _cached, _cached_stamp
+    directory = snapshot_dir()
+    pointer = os.path.join(directory, POINTER)
+    deadline = time.time() + env_float("CATALOG_SNAPSHOT_LOCK_TIMEOUT", 600)
+    while True:
+        try:
+            stat = os.stat(pointer)
+            break
+        except FileNotFoundError:
+            pass
+        # First process on the host builds and publishes; the others wait for it
+        if publish() is None:
+            if time.time() > deadline:
+                return _cached
+            time.sleep(0.1)
+    # The pointer is replaced, never rewritten, so a new inode means a new snapshot
+    stamp = (pointer, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if stamp == _cached_stamp:
+            return _cached
+        try:
+            catalog = load(os.path.join(directory, _current_name(directory)))
+        except OSError:
+            # A concurrent swap or a half-deleted snapshot; keep serving what we had
+            return _cached
+        except ValueError:
+            catalog = None
+        if catalog is not None:
+            _cached, _cached_stamp = catalog, stamp
+            return catalog
+    # Written by an older version of the app: one process replaces it, the others keep what they had
+    if publish() is not None:
+        return current()
+    return _cached
+
+
+if __name__ == "__main__":
+    # Republish after the feeds in CATALOG_PATH change: python -m utils.catalog_snapshot
+    started = time.perf_counter()
+    print(f"published {publish()} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,183 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Yearly depreciation by condition, before the AI adjusts it
+BASE_RATES = {
+    "Excellent": 0.12,
+    "Good": 0.15,
+    "Fair": 0.18,
+    "Poor": 0.25,
+}
+CONDITIONS = list(BASE_RATES)
+HORIZON = 5
+# Year the predictor values cars in; age is counted from the model year
+CURRENT_YEAR = 2024
+# Mileage above this per year of age adds HIGH_MILEAGE_RATE per 10,000 km, up to MAX_MILEAGE_RATE
+TYPICAL_KM_PER_YEAR = 12000
+HIGH_MILEAGE_RATE = 0.01
+MAX_MILEAGE_RATE = 0.05
+
+# Monte Carlo paths per car, and the value percentiles reported from them
+PATHS = 10000
+PERCENTILES = (10, 50, 90)
+# Spread of a car's own yearly rate around its condition's base rate
+RATE_SPREAD = 0.03
+# Spread of the km driven in a year
+KM_SPREAD = 4000
+# Spread of the used-car market's yearly move, on a log scale
+MARKET_VOLATILITY = 0.04
+# Chance per year of a market shock (a new generation, a policy change) and the value it takes off
+SHOCK_PROBABILITY = 0.05
+SHOCK_SIZE = 0.10
+
+_RATES = np.array([BASE_RATES[c] for c in CONDITIONS])
+
+
+def condition_codes(condition):
+    """Position of each condition in CONDITIONS; raises ValueError for unknown ones.
+
+    Integer arrays are taken as positions already, which skips the string handling.
+    """
+    condition = np.asarray(condition)
+    if condition.dtype.kind in "iu":
+        if condition.size and (condition.min() < 0 or condition.max() >= len(CONDITIONS)):
+            raise ValueError(f"Condition codes must be 0-{len(CONDITIONS) - 1}")
+        return np.atleast_1d(condition)
+    # A fleet repeats a handful of spellings; normalize each once
+    codes, values = pd.factorize(np.atleast_1d(condition.astype(object)), use_na_sentinel=False)
+    values = pd.Series(values, dtype=object).astype(str).str.strip().str.title()
+    known = pd.Index(CONDITIONS).get_indexer(values)
+    if (known < 0).any():
+        unknown = sorted(values[known < 0])
+        raise ValueError(f"Unknown condition {', '.join(unknown)}; expected one of {', '.join(CONDITIONS)}")
+    return known[codes]
+
+
+def _premium(excess):
+    """Yearly rate added for ``excess`` km over the typical mileage."""
+    return np.minimum(excess / 10000 * HIGH_MILEAGE_RATE, MAX_MILEAGE_RATE)
+
+
+def yearly_rates(condition, age=0, mileage=None):
+    """Depreciation rate per year for each car: its condition's base rate plus a high-mileage premium.
+
+    ``age`` is in years and ``mileage`` in km; a missing (NaN) mileage adds nothing.
+    """
+    rates = _RATES[condition_codes(condition)]
+    if mileage is None:
+        return rates
+    mileage = np.asarray(mileage, dtype=np.float64)
+    expected = TYPICAL_KM_PER_YEAR * np.maximum(np.asarray(age, dtype=np.float64), 1)
+    excess = np.nan_to_num(np.maximum(mileage - expected, 0))
+    return rates + _premium(excess)
+
+
+def project_values(price, condition, age=0, mileage=None, horizon=HORIZON, rates=None):
+    """Cars x years matrix of projected values; column 0 is ``price``, column i is i years on.
+
+    All arguments may be arrays (one entry per car) or scalars. With an
+    array ``horizon`` the matrix runs to the longest one and each car's
+    values past its own horizon are NaN. ``rates`` (e.g. from
+    utils.residual_model) replaces the condition and mileage rates.
+    """
+    rates = yearly_rates(condition, age, mileage) if rates is None else np.asarray(rates, dtype=np.float64)
+    price, rates = np.broadcast_arrays(np.atleast_1d(np.asarray(price, dtype=np.float64)), np.atleast_1d(rates))
+    horizon = np.asarray(horizon)
+    years = np.arange(int(horizon.max()) + 1)
+    # (1 - r)^t as exp(t * log(1 - r)): one multiply and exp per cell
+    values = np.exp(np.log1p(-rates)[:, None] * years) * price[:, None]
+    if horizon.ndim:
+        values[years > horizon[:, None]] = np.nan
+    return values
+
+
+def fleet_values(frame, horizon=HORIZON, model=None):
+    """Value every car in ``frame`` and return the projection as a DataFrame (columns ``year_0``..).
+
+    ``frame`` needs price and condition columns, plus optionally age (or
+    the model year as ``year``), mileage and a per-car ``horizon``. With a
+    fitted ``model`` (utils.residual_model) its rates replace the base
+    rates, using whichever of its segment columns ``frame`` has.
+    """
+    if "age" in frame:
+        age = frame["age"].to_numpy(dtype=np.float64)
+    elif "year" in frame:
+        age = CURRENT_YEAR - frame["year"].to_numpy(dtype=np.float64)
+    else:
+        age = 0
+    mileage = frame["mileage"].to_numpy(dtype=np.float64) if "mileage" in frame else None
+    horizon = frame["horizon"].to_numpy() if "horizon" in frame else horizon
+    rates = None if model is None else model.rates(frame, age, mileage)
+    values = project_values(frame["price"].to_numpy(dtype=np.float64), frame["condition"].to_numpy(), age, mileage, horizon, rates)
+    return pd.DataFrame(values, index=frame.index, columns=[f"year_{i}" for i in range(values.shape[1])])
+
+
+def simulate_values(price, condition, age=0, mileage=None, horizon=HORIZON, paths=PATHS, seed=None, rate=None):
+    """Paths x years matrix of simulated values for one car; column 0 is ``price``.
+
+    Each path draws the car's own yearly rate around its expected rate
+    (``rate``, one for every year or one per year of ``horizon``, else its
+    condition's base rate and mileage premium), the km
+    driven each year (driving more than typical raises the premium) and
+    the market's move each year, with occasional shocks. ``seed`` is
+    anything np.random.default_rng accepts.
+    """
+    rng = np.random.default_rng(seed)
+    years = np.arange(1, horizon + 1)
+    if rate is None:
+        rate = yearly_rates(condition, age, mileage)[0]
+    rate = rate + RATE_SPREAD * rng.standard_normal((paths, 1))
+    # Without a reading, assume the car has done typical mileage so far
+    start = TYPICAL_KM_PER_YEAR * max(age, 1) if mileage is None or np.isnan(mileage) else mileage
+    driven = start + np.cumsum(np.maximum(TYPICAL_KM_PER_YEAR + KM_SPREAD * rng.standard_normal((paths, horizon)), 0), axis=1)
+    excess = np.maximum(driven - TYPICAL_KM_PER_YEAR * np.maximum(age + years, 1), 0)
+    # The expected rate already prices in today's mileage; only the change from here is added
+    rate = np.clip(rate + _premium(excess) - _premium(max(start - TYPICAL_KM_PER_YEAR * max(age, 1), 0)), 0, 0.9)
+    market = MARKET_VOLATILITY * rng.standard_normal((paths, horizon))
+    market += np.log1p(-SHOCK_SIZE) * (rng.random((paths, horizon)) < SHOCK_PROBABILITY)
+    values = np.empty((paths, horizon + 1))
+    values[:, 0] = price
+    values[:, 1:] = price * np.exp(np.cumsum(np.log1p(-rate) + market, axis=1))
+    return values
+
+
+def _per_car(rates, cars):
+    return np.broadcast_to(rates, (cars,) + rates.shape[1:])
+
+
+def _bands(price, codes, age, mileage, rates, seeds, horizon, paths):
+    return np.stack([
+        np.percentile(simulate_values(*car, horizon=horizon, paths=paths, seed=seed, rate=rate), PERCENTILES, axis=0)
+        for *car, rate, seed in zip(price, codes, age, mileage, rates, seeds)
+    ])
+
+
+def value_bands(price, condition, age=0, mileage=None, horizon=HORIZON, paths=PATHS, seed=None, workers=None, rates=None):
+    """Cars x PERCENTILES x years array: each car's P10, P50 and P90 value in each year.
+
+    Every car gets its own random stream spawned from ``seed``, so a
+    seeded run gives the same bands whether or not ``workers`` > 1 splits
+    the cars across a process pool. ``rates`` is as for project_values(),
+    or cars x ``horizon`` for rates that change as the cars age.
+    """
+    price = np.atleast_1d(np.asarray(price, dtype=np.float64))
+    cars = len(price)
+    age = np.broadcast_to(np.asarray(age, dtype=np.float64), cars)
+    mileage = np.broadcast_to(np.asarray(np.nan if mileage is None else mileage, dtype=np.float64), cars)
+    codes = np.broadcast_to(condition_codes(condition), cars)
+    columns = [
+        price,
+        codes,
+        age,
+        mileage,
+        _per_car(yearly_rates(codes, age, mileage) if rates is None else np.asarray(rates, dtype=np.float64), cars),
+        np.array(np.random.SeedSequence(seed).spawn(cars), dtype=object),
+    ]
+    if not workers or workers < 2 or cars < 2:
+        return _bands(*columns, horizon, paths)
+    chunks = np.array_split(np.arange(cars), min(workers, cars))
+    with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+        parts = [pool.submit(_bands, *(column[chunk] for column in columns), horizon, paths) for chunk in chunks]
+        return np.concatenate([part.result() for part in parts])
@@ -0,0 +1,71 @@
+import contextlib
+import os
+import threading
+import time
+
+
+def env_int(name, default):
+    """``name`` from the environment as an int; ``default`` when it is unset or not a number."""
+    return _env_number(name, default, int)
+
+
+def env_float(name, default):
+    """``name`` from the environment as a float; ``default`` when it is unset or not a number."""
+    return _env_number(name, default, float)
+
+
+def _env_number(name, default, parse):
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return parse(value)
+    except ValueError:
+        # A mistyped setting shouldn't take the app down with it
+        return default
+
+
+@contextlib.contextmanager
+def atomic_open(path, mode="w"):
+    """Open a temporary file beside ``path`` and move it over ``path`` once written and synced to disk.
+
+    Readers see either the old file or the whole new one. If the block
+    raises, the temporary file is removed and ``path`` is left alone.
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, mode, encoding=None if "b" in mode else "utf-8") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp)
+        raise
+
+
+def write_atomic(path, text):
+    with atomic_open(path) as f:
+        f.write(text)
+
+
+def take_file_lock(path, timeout):
+    """Create the lock file at ``path``; False if another process holds it.
+
+    A lock older than ``timeout`` seconds was left behind by a crashed
+    process and is cleared.
+    """
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - os.stat(path).st_mtime < timeout:
+                return False
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return take_file_lock(path, timeout)
+    with os.fdopen(fd, "w") as f:
+        f.write(str(os.getpid()))
+    return True
@@ -0,0 +1,202 @@
+import collections
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.catalog import NUMERIC
+from utils.depreciation import CONDITIONS, CURRENT_YEAR, HORIZON, TYPICAL_KM_PER_YEAR, fleet_values, value_bands
+from utils.fileio import env_float, env_int
+from utils.ingest import normalize, read_feed
+from utils.residual_model import get_model
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "fleet")
+FORMATS = ("csv", "parquet")
+# Inventory header -> column, on top of the feed aliases
+FLEET_ALIASES = {
+    "km_driven": "mileage", "kms_driven": "mileage", "odometer": "mileage", "kilometers": "mileage",
+    "car_condition": "condition",
+}
+DEFAULT_CONDITION = "Good"
+# Monte Carlo paths per car for the likely range; fewer than the single-car page, as a fleet has many cars
+PATHS = 1000
+# Cars driven this much a year, or losing value this fast, are flagged
+OUTLIER_KM_PER_YEAR = 2 * TYPICAL_KM_PER_YEAR
+OUTLIER_RATE = 0.22
+# Flagged cars kept for the AI to explain, fastest-depreciating first
+NARRATIVE_ROWS = 10
+TEXT_COLUMNS = ("vin", "make", "model", "variant", "fuel_type", "transmission", "city", "condition", "flags")
+
+
+def output_dir():
+    return os.getenv("FLEET_OUTPUT_DIR", DEFAULT_DIR)
+
+
+def output_path(fmt="csv"):
+    """A new file to write a valuation to, clearing out ones older than FLEET_OUTPUT_TTL seconds."""
+    directory = output_dir()
+    os.makedirs(directory, exist_ok=True)
+    cutoff = time.time() - env_float("FLEET_OUTPUT_TTL", 24 * 3600)
+    for name in os.listdir(directory):
+        try:
+            if os.stat(os.path.join(directory, name)).st_mtime < cutoff:
+                os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+    return os.path.join(directory, f"fleet-{uuid.uuid4().hex}.{fmt}")
+
+
+def value_chunk(chunk, first_row=1, horizon=HORIZON, paths=0, seed=None):
+    """Normalize one raw inventory chunk and value its cars; returns (valued, rejected rows).
+
+    ``row`` in the result is the car's 1-based row in the input. With
+    ``paths`` each car also gets its simulated P10-P90 value at the horizon.
+    """
+    chunk = chunk.rename(columns=lambda c: FLEET_ALIASES.get(str(c).strip().lower(), c))
+    chunk["row"] = np.arange(first_row, first_row + len(chunk))
+    frame, rejected = normalize(chunk, extra=("row", "mileage", "condition"))
+    # Plain float64, so blank or unreadable mileage is NaN rather than pd.NA
+    mileage = pd.to_numeric(frame["mileage"].astype("string").str.replace(r"[^\d.]", "", regex=True), errors="coerce")
+    frame["mileage"] = mileage.astype(np.float64)
+    condition = frame["condition"].astype("string").str.strip().str.title()
+    frame["condition"] = condition.where(condition.isin(CONDITIONS)).fillna(DEFAULT_CONDITION).astype(object)
+    frame["age"] = (CURRENT_YEAR - frame["year"].astype(np.float64)).clip(lower=0)
+
+    values = fleet_values(frame, horizon, get_model())
+    rates = 1 - values["year_1"] / values["year_0"]
+    valued = frame[[
+        "row", "vin", "make", "model", "variant", "year", "fuel_type", "transmission", "city", "condition", "mileage", "price",
+    ]].copy()
+    valued["yearly_rate"] = rates.round(4)
+    for year in range(1, horizon + 1):
+        valued[f"value_year_{year}"] = values[f"year_{year}"].round().astype(np.int64)
+    if paths and len(frame):
+        bands = value_bands(
+            frame["price"].to_numpy(), frame["condition"].to_numpy(), frame["age"].to_numpy(), frame["mileage"].to_numpy(),
+            horizon, paths, seed, rates=rates.to_numpy(),
+        )
+        valued[f"value_year_{horizon}_p10"] = bands[:, 0, -1].round().astype(np.int64)
+        valued[f"value_year_{horizon}_p90"] = bands[:, -1, -1].round().astype(np.int64)
+
+    # NaN compares false, so a car without a mileage is never flagged for it
+    km_per_year = frame["mileage"].to_numpy() / frame["age"].clip(lower=1).to_numpy()
+    flags = pd.Series("", index=valued.index, dtype=object)
+    for label, mask in (
+        ("high mileage", km_per_year > OUTLIER_KM_PER_YEAR),
+        ("fast depreciation", rates.to_numpy(dtype=np.float64) > OUTLIER_RATE),
+    ):
+        flags = flags.mask(mask, flags + ", " + label)
+    valued["flags"] = flags.str.removeprefix(", ")
+    return valued, rejected
+
+
+def _parquet_schema(horizon, paths):
+    """Arrow schema of value_chunk()'s output, so a chunk without a text value still matches the file."""
+    import pyarrow as pa
+
+    def field(name):
+        if name in TEXT_COLUMNS:
+            return pa.field(name, pa.string())
+        if name in NUMERIC:
+            return pa.field(name, pa.from_numpy_dtype(np.dtype(NUMERIC[name])))
+        return pa.field(name, pa.float64() if name in ("mileage", "yearly_rate") else pa.int64())
+
+    names = ["row", "vin", "make", "model", "variant", "year", "fuel_type", "transmission", "city", "condition", "mileage", "price", "yearly_rate"]
+    names += [f"value_year_{year}" for year in range(1, horizon + 1)]
+    if paths:
+        names += [f"value_year_{horizon}_p10", f"value_year_{horizon}_p90"]
+    return pa.schema([field(name) for name in names + ["flags"]])
+
+
+def _in_order(tasks, workers):
+    """Run ``tasks`` ((args, tag) pairs) through value_chunk and yield (result, tag) in input order.
+
+    With ``workers`` > 1 they run in a process pool, at most ``workers`` + 1
+    at a time, so only that many chunks are in memory however long the file.
+    """
+    if not workers or workers < 2:
+        for args, tag in tasks:
+            yield value_chunk(*args), tag
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for args, tag in tasks:
+            pending.append((pool.submit(value_chunk, *args), tag))
+            if len(pending) > workers:
+                future, tag = pending.popleft()
+                yield future.result(), tag
+        while pending:
+            future, tag = pending.popleft()
+            yield future.result(), tag
+
+
+def value_fleet(source, out, fmt="csv", horizon=HORIZON, paths=0, workers=None, chunk_rows=None, seed=None, progress=None):
+    """Value every car in an inventory file and write them to ``out`` as they are done.
+
+    ``source`` is a path or binary file object (CSV, JSONL or Parquet, as
+    for utils.ingest.read_feed) with make, model, year and price columns,
+    plus optionally mileage, condition, fuel_type, transmission, city and
+    vin. It is read FLEET_CHUNK_ROWS rows at a time and the chunks are
+    valued across ``workers`` processes (FLEET_WORKERS, default every CPU),
+    so memory stays bounded by the chunks in flight. ``progress`` is called
+    with the running stats after each chunk; ``stats["fraction"]`` is the
+    share of the input read so far.
+
+    Returns (stats, outliers) where outliers are the NARRATIVE_ROWS
+    fastest-depreciating flagged cars.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format {fmt}; expected one of {', '.join(FORMATS)}")
+    chunk_rows = chunk_rows or env_int("FLEET_CHUNK_ROWS", 20000)
+    workers = env_int("FLEET_WORKERS", os.cpu_count() or 1) if workers is None else workers
+    handle = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    size = handle.seek(0, os.SEEK_END) or 1
+    handle.seek(0)
+    stats = {"rows": 0, "valued": 0, "rejected": 0, "flagged": 0, "fraction": 0.0, "seconds": 0.0}
+    outliers = None
+    writer = None
+    started = time.perf_counter()
+
+    def tasks():
+        first_row = 1
+        for index, chunk in enumerate(read_feed(handle, chunk_rows)):
+            chunk_seed = None if seed is None else [seed, index]
+            yield (chunk, first_row, horizon, paths, chunk_seed), (len(chunk), handle.tell())
+            first_row += len(chunk)
+
+    try:
+        for (valued, rejected), (rows, position) in _in_order(tasks(), workers):
+            # A chunk with no valid rows has nothing to write, and no column types to write it with
+            if len(valued) and fmt == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                schema = _parquet_schema(horizon, paths)
+                writer = writer or pq.ParquetWriter(out, schema)
+                writer.write_table(pa.Table.from_pandas(valued, schema=schema, preserve_index=False))
+            elif len(valued):
+                valued.to_csv(out, mode="a" if writer else "w", header=not writer, index=False)
+                writer = True
+            flagged = valued[valued["flags"] != ""]
+            outliers = flagged if outliers is None else pd.concat([outliers, flagged])
+            outliers = outliers.nlargest(NARRATIVE_ROWS, "yearly_rate")
+            stats["rows"] += rows
+            stats["valued"] += len(valued)
+            stats["rejected"] += rejected
+            stats["flagged"] += len(flagged)
+            stats["fraction"] = min(position / size, 1.0)
+            stats["seconds"] = time.perf_counter() - started
+            if progress:
+                progress(stats)
+    finally:
+        if fmt == "parquet" and writer is not None:
+            writer.close()
+        if handle is not source:
+            handle.close()
+    if writer is None:
+        raise ValueError("None of the file's rows could be valued" if stats["rows"] else "The file has no rows")
+    stats["fraction"] = 1.0
+    return stats, outliers.reset_index(drop=True)
@@ -1,3 +1,7 @@
+import time
+import streamlit as st
+
+
 def colorize_markdown(md):
     """Colorize markdown text with emoji indicators.
     
@@ -10,4 +14,30 @@ def colorize_markdown(md):
     md = md.replace("🟢", '<span style="color:#34d399;font-weight:700;">🟢</span>')
     md = md.replace("🟡", '<span style="color:#fbbf24;font-weight:700;">🟡</span>')
     md = md.replace("🔴", '<span style="color:#f87171;font-weight:700;">🔴</span>')
-    return md 
\ No newline at end of file
+    return md
+
+
+def render_stream(chunks, placeholder=None, interval=0.05):
+    """Draw colorized markdown while it streams in and return the full text.
+    
+    Args:
+        chunks (iterable): Text fragments, e.g. from ``groq_chat_stream``
+        placeholder: Streamlit element to draw into; a new ``st.empty()`` by default
+        interval (float): Minimum seconds between redraws
+        
+    Returns:
+        str: The complete streamed text
+    """
+    if placeholder is None:
+        placeholder = st.empty()
+    parts = []
+    last_draw = 0.0
+    for chunk in chunks:
+        parts.append(chunk)
+        now = time.monotonic()
+        if now - last_draw >= interval:
+            placeholder.markdown(colorize_markdown("".join(parts)) + " ▌", unsafe_allow_html=True)
+            last_draw = now
+    text = "".join(parts)
+    placeholder.markdown(colorize_markdown(text), unsafe_allow_html=True)
+    return text
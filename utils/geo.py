@@ -0,0 +1,234 @@
+import difflib
+import functools
+import re
+
+import numpy as np
+
+from utils.bitmap import SortedIndex
+
+EARTH_RADIUS_KM = 6371.0
+# Spatial grid cells are this many degrees on a side (about 28 km north-south)
+CELL_DEGREES = 0.25
+_CELLS_PER_ROW = int(360 / CELL_DEGREES)
+
+# Offline gazetteer: (city, state, latitude, longitude, pincode prefixes).
+# A pincode resolves to the city with the longest matching prefix; the
+# three-digit prefixes are India Post sorting districts.
+CITIES = [
+    ("Mumbai", "Maharashtra", 19.0760, 72.8777, ("400", "401")),
+    ("Delhi", "Delhi", 28.6139, 77.2090, ("110",)),
+    ("Bangalore", "Karnataka", 12.9716, 77.5946, ("560", "561", "562")),
+    ("Hyderabad", "Telangana", 17.3850, 78.4867, ("500", "501")),
+    ("Chennai", "Tamil Nadu", 13.0827, 80.2707, ("600", "601", "602", "603")),
+    ("Kolkata", "West Bengal", 22.5726, 88.3639, ("700", "711", "712", "743")),
+    ("Pune", "Maharashtra", 18.5204, 73.8567, ("411", "412")),
+    ("Ahmedabad", "Gujarat", 23.0225, 72.5714, ("380", "382")),
+    ("Gandhinagar", "Gujarat", 23.2156, 72.6369, ("38200", "38201", "38202", "38203")),
+    ("Jaipur", "Rajasthan", 26.9124, 75.7873, ("302", "303")),
+    ("Surat", "Gujarat", 21.1702, 72.8311, ("394", "395")),
+    ("Lucknow", "Uttar Pradesh", 26.8467, 80.9462, ("226", "227")),
+    ("Kanpur", "Uttar Pradesh", 26.4499, 80.3319, ("208", "209")),
+    ("Nagpur", "Maharashtra", 21.1458, 79.0882, ("440", "441")),
+    ("Indore", "Madhya Pradesh", 22.7196, 75.8577, ("452", "453")),
+    ("Bhopal", "Madhya Pradesh", 23.2599, 77.4126, ("462", "463")),
+    ("Thane", "Maharashtra", 19.2183, 72.9781, ("4006", "421")),
+    ("Navi Mumbai", "Maharashtra", 19.0330, 73.0297, ("4007",)),
+    ("Patna", "Bihar", 25.5941, 85.1376, ("800", "801")),
+    ("Vadodara", "Gujarat", 22.3072, 73.1812, ("390", "391")),
+    ("Ghaziabad", "Uttar Pradesh", 28.6692, 77.4538, ("201",)),
+    ("Noida", "Uttar Pradesh", 28.5355, 77.3910, ("2013",)),
+    ("Gurgaon", "Haryana", 28.4595, 77.0266, ("122",)),
+    ("Faridabad", "Haryana", 28.4089, 77.3178, ("121",)),
+    ("Ludhiana", "Punjab", 30.9010, 75.8573, ("141",)),
+    ("Agra", "Uttar Pradesh", 27.1767, 78.0081, ("282", "283")),
+    ("Nashik", "Maharashtra", 19.9975, 73.7898, ("422",)),
+    ("Meerut", "Uttar Pradesh", 28.9845, 77.7064, ("250",)),
+    ("Rajkot", "Gujarat", 22.3039, 70.8022, ("360",)),
+    ("Varanasi", "Uttar Pradesh", 25.3176, 82.9739, ("221",)),
+    ("Srinagar", "Jammu and Kashmir", 34.0837, 74.7973, ("190",)),
+    ("Aurangabad", "Maharashtra", 19.8762, 75.3433, ("431",)),
+    ("Amritsar", "Punjab", 31.6340, 74.8723, ("143",)),
+    ("Prayagraj", "Uttar Pradesh", 25.4358, 81.8463, ("211", "212")),
+    ("Ranchi", "Jharkhand", 23.3441, 85.3096, ("834", "835")),
+    ("Coimbatore", "Tamil Nadu", 11.0168, 76.9558, ("641", "642")),
+    ("Tiruppur", "Tamil Nadu", 11.1085, 77.3411, ("6416",)),
+    ("Jabalpur", "Madhya Pradesh", 23.1815, 79.9864, ("482", "483")),
+    ("Gwalior", "Madhya Pradesh", 26.2183, 78.1828, ("474", "475")),
+    ("Vijayawada", "Andhra Pradesh", 16.5062, 80.6480, ("520", "521")),
+    ("Jodhpur", "Rajasthan", 26.2389, 73.0243, ("342",)),
+    ("Madurai", "Tamil Nadu", 9.9252, 78.1198, ("625",)),
+    ("Raipur", "Chhattisgarh", 21.2514, 81.6296, ("492", "493")),
+    ("Kota", "Rajasthan", 25.2138, 75.8648, ("324",)),
+    ("Guwahati", "Assam", 26.1445, 91.7362, ("781",)),
+    ("Chandigarh", "Chandigarh", 30.7333, 76.7794, ("160",)),
+    ("Thiruvananthapuram", "Kerala", 8.5241, 76.9366, ("695",)),
+    ("Kochi", "Kerala", 9.9312, 76.2673, ("682", "683")),
+    ("Kozhikode", "Kerala", 11.2588, 75.7804, ("673",)),
+    ("Thrissur", "Kerala", 10.5276, 76.2144, ("680",)),
+    ("Mysore", "Karnataka", 12.2958, 76.6394, ("570", "571")),
+    ("Mangalore", "Karnataka", 12.9141, 74.8560, ("575",)),
+    ("Hubli", "Karnataka", 15.3647, 75.1240, ("580",)),
+    ("Belgaum", "Karnataka", 15.8497, 74.4977, ("590",)),
+    ("Bhubaneswar", "Odisha", 20.2961, 85.8245, ("751", "752")),
+    ("Cuttack", "Odisha", 20.4625, 85.8830, ("753",)),
+    ("Visakhapatnam", "Andhra Pradesh", 17.6868, 83.2185, ("530", "531")),
+    ("Guntur", "Andhra Pradesh", 16.3067, 80.4365, ("522",)),
+    ("Nellore", "Andhra Pradesh", 14.4426, 79.9865, ("524",)),
+    ("Tirupati", "Andhra Pradesh", 13.6288, 79.4192, ("517",)),
+    ("Warangal", "Telangana", 17.9689, 79.5941, ("506",)),
+    ("Dehradun", "Uttarakhand", 30.3165, 78.0322, ("248",)),
+    ("Haridwar", "Uttarakhand", 29.9457, 78.1642, ("249",)),
+    ("Tiruchirappalli", "Tamil Nadu", 10.7905, 78.7047, ("620", "621")),
+    ("Salem", "Tamil Nadu", 11.6643, 78.1460, ("636",)),
+    ("Vellore", "Tamil Nadu", 12.9165, 79.1325, ("632",)),
+    ("Erode", "Tamil Nadu", 11.3410, 77.7172, ("638",)),
+    ("Hosur", "Tamil Nadu", 12.7409, 77.8253, ("635",)),
+    ("Puducherry", "Puducherry", 11.9416, 79.8083, ("605",)),
+    ("Goa", "Goa", 15.4909, 73.8278, ("403",)),
+    ("Jammu", "Jammu and Kashmir", 32.7266, 74.8570, ("180", "181")),
+    ("Udaipur", "Rajasthan", 24.5854, 73.7125, ("313",)),
+    ("Ajmer", "Rajasthan", 26.4499, 74.6399, ("305",)),
+    ("Bikaner", "Rajasthan", 28.0229, 73.3119, ("334",)),
+    ("Jalandhar", "Punjab", 31.3260, 75.5762, ("144",)),
+    ("Patiala", "Punjab", 30.3398, 76.3869, ("147",)),
+    ("Bathinda", "Punjab", 30.2110, 74.9455, ("151",)),
+    ("Shimla", "Himachal Pradesh", 31.1048, 77.1734, ("171",)),
+    ("Aligarh", "Uttar Pradesh", 27.8974, 78.0880, ("202",)),
+    ("Bareilly", "Uttar Pradesh", 28.3670, 79.4304, ("243",)),
+    ("Moradabad", "Uttar Pradesh", 28.8386, 78.7733, ("244",)),
+    ("Gorakhpur", "Uttar Pradesh", 26.7606, 83.3732, ("273",)),
+    ("Jhansi", "Uttar Pradesh", 25.4484, 78.5685, ("284",)),
+    ("Kolhapur", "Maharashtra", 16.7050, 74.2433, ("416",)),
+    ("Solapur", "Maharashtra", 17.6599, 75.9064, ("413",)),
+    ("Sonipat", "Haryana", 28.9931, 77.0151, ("131",)),
+    ("Karnal", "Haryana", 29.6857, 76.9905, ("1320",)),
+    ("Panipat", "Haryana", 29.3909, 76.9635, ("1321",)),
+    ("Rohtak", "Haryana", 28.8955, 76.6066, ("124",)),
+    ("Hisar", "Haryana", 29.1492, 75.7217, ("125",)),
+    ("Dhanbad", "Jharkhand", 23.7957, 86.4304, ("826", "828")),
+    ("Jamshedpur", "Jharkhand", 22.8046, 86.2029, ("831", "832")),
+    ("Gaya", "Bihar", 24.7914, 85.0002, ("823",)),
+    ("Muzaffarpur", "Bihar", 26.1209, 85.3647, ("842",)),
+    ("Bhagalpur", "Bihar", 25.2425, 86.9842, ("812",)),
+    ("Durgapur", "West Bengal", 23.5204, 87.3119, ("713",)),
+    ("Siliguri", "West Bengal", 26.7271, 88.3953, ("734",)),
+    ("Bilaspur", "Chhattisgarh", 22.0797, 82.1409, ("495",)),
+    ("Anand", "Gujarat", 22.5645, 72.9289, ("388",)),
+    ("Bhavnagar", "Gujarat", 21.7645, 72.1519, ("364",)),
+    ("Jamnagar", "Gujarat", 22.4707, 70.0577, ("361",)),
+    ("Davangere", "Karnataka", 14.4644, 75.9218, ("577",)),
+    ("Bellary", "Karnataka", 15.1394, 76.9214, ("583",)),
+    ("Gulbarga", "Karnataka", 17.3297, 76.8343, ("585",)),
+    ("Rourkela", "Odisha", 22.2604, 84.8536, ("769",)),
+    ("Sambalpur", "Odisha", 21.4669, 83.9812, ("768",)),
+    ("Imphal", "Manipur", 24.8170, 93.9368, ("795",)),
+    ("Shillong", "Meghalaya", 25.5788, 91.8933, ("793",)),
+    ("Agartala", "Tripura", 23.8315, 91.2868, ("799",)),
+    ("Aizawl", "Mizoram", 23.7271, 92.7176, ("796",)),
+    ("Gangtok", "Sikkim", 27.3389, 88.6065, ("737",)),
+    ("Itanagar", "Arunachal Pradesh", 27.0844, 93.6053, ("791",)),
+    ("Kohima", "Nagaland", 25.6751, 94.1086, ("797",)),
+    ("Port Blair", "Andaman and Nicobar Islands", 11.6234, 92.7265, ("744",)),
+    ("Leh", "Ladakh", 34.1526, 77.5771, ("194",)),
+]
+CITY_ALIASES = {
+    "bengaluru": "Bangalore", "bombay": "Mumbai", "new delhi": "Delhi", "ncr": "Delhi", "gurugram": "Gurgaon",
+    "madras": "Chennai", "calcutta": "Kolkata", "trivandrum": "Thiruvananthapuram", "cochin": "Kochi",
+    "ernakulam": "Kochi", "mysuru": "Mysore", "mangaluru": "Mangalore", "vizag": "Visakhapatnam",
+    "allahabad": "Prayagraj", "baroda": "Vadodara", "poona": "Pune", "panaji": "Goa", "panjim": "Goa",
+    "belagavi": "Belgaum", "hubballi": "Hubli", "kalaburagi": "Gulbarga", "calicut": "Kozhikode",
+    "trichy": "Tiruchirappalli", "pondicherry": "Puducherry", "ballari": "Bellary", "secunderabad": "Hyderabad",
+    "greater noida": "Noida", "mohali": "Chandigarh", "panchkula": "Chandigarh", "howrah": "Kolkata",
+}
+
+_BY_NAME = {city[0].lower(): city for city in CITIES}
+_PINCODE = re.compile(r"\b(\d{6})\b")
+
+
+def _by_pincode(pincode):
+    for length in range(len(pincode), 2, -1):
+        for city in CITIES:
+            if pincode[:length] in city[4]:
+                return city
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def geocode(text):
+    """(city, latitude, longitude) for a free-text place, or None if it isn't known.
+
+    Understands pincodes ("560034"), city names and common alternatives
+    anywhere in the text ("Koramangala, Bengaluru"), and near misses
+    ("Banglore").
+    """
+    text = str(text or "").strip().lower()
+    if not text:
+        return None
+    pincode = _PINCODE.search(text)
+    city = _by_pincode(pincode.group(1)) if pincode else None
+    if city is None:
+        words = re.findall(r"[a-z]+", text)
+        # Longest names first, so "navi mumbai" wins over "mumbai"
+        for size in (3, 2, 1):
+            for start in range(len(words) - size + 1):
+                phrase = " ".join(words[start:start + size])
+                name = CITY_ALIASES.get(phrase, phrase).lower()
+                if name in _BY_NAME:
+                    city = _BY_NAME[name]
+                    break
+            if city is not None:
+                break
+    if city is None:
+        close = difflib.get_close_matches(text, list(_BY_NAME) + list(CITY_ALIASES), n=1, cutoff=0.8)
+        if close:
+            city = _BY_NAME[CITY_ALIASES.get(close[0], close[0]).lower()]
+    return (city[0], city[2], city[3]) if city else None
+
+
+def distance_km(lat, lon, origin_lat, origin_lon):
+    """Great-circle distance in km from the origin to each (lat, lon)."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    origin_lat, origin_lon = np.radians(origin_lat), np.radians(origin_lon)
+    a = np.sin((lat - origin_lat) / 2) ** 2 + np.cos(lat) * np.cos(origin_lat) * np.sin((lon - origin_lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def cells(lat, lon):
+    """Grid cell number for each point; -1 where the location is unknown."""
+    row = np.floor((np.asarray(lat, dtype=np.float64) + 90) / CELL_DEGREES)
+    column = np.floor((np.asarray(lon, dtype=np.float64) + 180) / CELL_DEGREES)
+    cell = row * _CELLS_PER_ROW + column
+    return np.where(np.isnan(cell), -1, cell).astype(np.int32)
+
+
+class GridIndex:
+    """Row ids bucketed into fixed lat/lon grid cells, for radius queries.
+
+    Rows are kept sorted by cell number, and cells are numbered row by
+    row, so the cells a circle's bounding box covers in one grid row are
+    a single slice of the index. Those slices hold every row within the
+    radius, plus some just outside it that a distance check removes.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    @classmethod
+    def from_points(cls, lat, lon):
+        return cls(SortedIndex(cells(lat, lon)))
+
+    def add(self, ids, lat, lon):
+        self.index.add(ids, cells(lat, lon))
+
+    def candidates(self, lat, lon, km):
+        """Row ids in the grid cells that overlap the circle of ``km`` around (lat, lon)."""
+        dlat = np.degrees(km / EARTH_RADIUS_KM)
+        dlon = dlat / max(np.cos(np.radians(min(abs(lat) + dlat, 89.9))), 1e-6)
+        first_row, last_row = (int(np.floor((value + 90) / CELL_DEGREES)) for value in (lat - dlat, lat + dlat))
+        first_column = max(int(np.floor((lon - dlon + 180) / CELL_DEGREES)), 0)
+        last_column = min(int(np.floor((lon + dlon + 180) / CELL_DEGREES)), _CELLS_PER_ROW - 1)
+        slices = [
+            self.index.between(row * _CELLS_PER_ROW + first_column, row * _CELLS_PER_ROW + last_column)
+            for row in range(max(first_row, 0), last_row + 1)
+        ]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
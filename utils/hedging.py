@@ -0,0 +1,127 @@
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+_END = object()
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="groq-hedge")
+
+
+class HedgeSkipped(Exception):
+    """No capacity was free for a duplicate request."""
+
+
+class HedgePolicy:
+    """Decide when to send a duplicate request and keep count of how it went.
+
+    The hedge delay is the ``percentile`` of recently observed first-chunk
+    latencies. Each request earns ``max_ratio`` of a hedge credit and every
+    hedge spends one, so duplicates never exceed that share of traffic.
+    """
+
+    def __init__(self, percentile=90.0, max_ratio=0.1, min_delay=0.2, min_samples=20, window=500):
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._latencies = collections.deque(maxlen=window)
+        self._credits = 0.0
+        self._lock = threading.Lock()
+        self.counters = collections.Counter()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def record(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def delay(self):
+        """Seconds to wait before hedging, or None until enough samples exist."""
+        with self._lock:
+            self.counters["requests"] += 1
+            self._credits = min(10.0, self._credits + self.max_ratio)
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+            index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+            return max(self.min_delay, ordered[index])
+
+    def allow(self):
+        with self._lock:
+            if self._credits < 1.0:
+                self.counters["over_budget"] += 1
+                return False
+            self._credits -= 1.0
+            return True
+
+    def stats(self):
+        with self._lock:
+            fired = self.counters["fired"]
+            return {
+                **self.counters,
+                "fire_rate": fired / self.counters["requests"] if self.counters["requests"] else 0.0,
+                "win_rate": self.counters["won"] / fired if fired else 0.0,
+            }
+
+
+def _advance(chunks):
+    return next(chunks, _END)
+
+
+def _discard(future, chunks):
+    """Close a losing attempt once it stops executing, releasing its connection."""
+    future.add_done_callback(lambda _: chunks.close())
+
+
+def race(primary, open_hedge, policy, won=None):
+    """Yield text from ``primary``, hedging with ``open_hedge()`` if it is slow.
+
+    Whichever attempt produces its first chunk first wins and is read to the
+    end; the other is closed. ``open_hedge`` may raise HedgeSkipped when no
+    capacity is free, in which case the primary simply carries on. ``won``
+    is called with True if the hedge won, False if the primary did.
+    """
+    started = time.monotonic()
+    delay = policy.delay()
+    if delay is None:
+        first = _advance(primary)
+        policy.record(time.monotonic() - started)
+        winner = primary
+    else:
+        attempts = {_pool.submit(_advance, primary): primary}
+        done, _ = wait(attempts, timeout=delay)
+        if not done and policy.allow():
+            try:
+                hedge = open_hedge()
+            except HedgeSkipped:
+                policy.count("skipped")
+            else:
+                policy.count("fired")
+                attempts[_pool.submit(_advance, hedge)] = hedge
+        pending = set(attempts)
+        error = None
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and winner is None:
+                    winner = attempts[future]
+                    first = future.result()
+                elif future.exception() is not None and error is None:
+                    error = future.exception()
+        for future, chunks in attempts.items():
+            if chunks is not winner:
+                _discard(future, chunks)
+        if winner is None:
+            raise error
+        policy.record(time.monotonic() - started)
+        if winner is not primary:
+            policy.count("won")
+    if won is not None:
+        won(winner is not primary)
+    if first is _END:
+        return
+    yield first
+    yield from winner
@@ -0,0 +1,232 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.catalog import COLUMNS, NUMERIC, listing_keys
+from utils.geo import geocode
+from utils.sample_data import CATALOG_MODELS
+
+# Feed header -> catalog column
+COLUMN_ALIASES = {
+    "brand": "make", "manufacturer": "make",
+    "model_name": "model",
+    "trim": "variant", "version": "variant",
+    "asking_price": "price", "price_inr": "price", "ex_showroom_price": "price",
+    "model_year": "year", "mfg_year": "year", "registration_year": "year",
+    "body": "body_type", "body_style": "body_type", "segment": "body_type",
+    "fuel": "fuel_type",
+    "gearbox": "transmission", "transmission_type": "transmission",
+    "seats": "seating", "seating_capacity": "seating",
+    "op": "action", "operation": "action",
+    "location": "city", "city_name": "city", "dealer_city": "city",
+    "pin": "pincode", "pin_code": "pincode", "postal_code": "pincode", "zip": "pincode",
+    "latitude": "lat", "longitude": "lon", "lng": "lon", "long": "lon",
+}
+MAKE_ALIASES = {
+    "maruti": "Maruti Suzuki", "maruti-suzuki": "Maruti Suzuki", "suzuki": "Maruti Suzuki",
+    "vw": "Volkswagen", "mahindra & mahindra": "Mahindra", "m&m": "Mahindra",
+    "mg motor": "MG", "morris garages": "MG", "tata motors": "Tata", "citroën": "Citroen",
+    "mercedes": "Mercedes-Benz", "mercedes benz": "Mercedes-Benz",
+}
+FUEL_ALIASES = {
+    "petrol": "Petrol", "gasoline": "Petrol", "diesel": "Diesel", "cng": "CNG", "petrol+cng": "CNG",
+    "electric": "Electric", "ev": "Electric", "hybrid": "Hybrid", "strong hybrid": "Hybrid", "mild hybrid": "Hybrid",
+}
+TRANSMISSION_ALIASES = {
+    "manual": "Manual", "mt": "Manual", "automatic": "Automatic", "at": "Automatic", "amt": "Automatic",
+    "tc": "Automatic", "torque converter": "Automatic", "cvt": "CVT", "ivt": "CVT", "dct": "DCT", "dsg": "DCT",
+}
+BODY_ALIASES = {
+    "sedan": "Sedan", "suv": "SUV", "compact suv": "SUV", "muv": "MPV", "mpv": "MPV", "hatchback": "Hatchback",
+    "hatch": "Hatchback", "crossover": "Crossover", "coupe": "Coupe", "convertible": "Convertible",
+}
+DELETE_ACTIONS = {"delete", "remove", "sold", "d"}
+
+# Canonical spellings and defaults from the known models
+_MAKES = {m["make"].lower(): m["make"] for m in CATALOG_MODELS}
+_MODELS = {f"{m['make']}|{m['model'].lower()}": m["model"] for m in CATALOG_MODELS}
+_MODEL_BODY = {f"{m['make']}|{m['model']}": m["body_type"] for m in CATALOG_MODELS}
+_MODEL_SEATING = {f"{m['make']}|{m['model']}": m["seating"] for m in CATALOG_MODELS}
+
+
+def _clean(series):
+    return series.astype("string").str.strip().str.replace(r"\s+", " ", regex=True)
+
+
+def _per_value(series, fn):
+    """Apply ``fn`` (Series -> Series) to each distinct value of ``series`` once.
+
+    Feed columns repeat a few hundred values across millions of rows, so
+    this keeps the string handling off the per-row path.
+    """
+    codes, uniques = pd.factorize(series)
+    mapped = fn(pd.Series(uniques, dtype=object)).to_numpy()
+    if mapped.dtype.kind in "iub":
+        mapped = mapped.astype(float)
+    return pd.Series(pd.api.extensions.take(mapped, codes, allow_fill=True), index=series.index)
+
+
+def _canonical_make(values):
+    cleaned = _clean(values)
+    lower = cleaned.str.lower()
+    return lower.map(MAKE_ALIASES).fillna(lower.map(_MAKES)).fillna(cleaned.str.title()).astype(object)
+
+
+def parse_price(series):
+    """Rupee amounts from feed prices: "16,50,000", "₹16.5 lakh", "1.2 Cr", "Rs. 850000/-".
+
+    Unparseable prices come back as NaN.
+    """
+    text = series.astype("string").str.lower().str.replace(r"₹|rs\.?|inr|/-|,|\s", "", regex=True)
+    unit = np.select(
+        [text.str.contains(r"(?:cr|crore|crores)$", na=False), text.str.contains(r"(?:l|lac|lacs|lakh|lakhs)$", na=False)],
+        [1e7, 1e5],
+        1.0,
+    )
+    number = pd.to_numeric(text.str.replace(r"[a-z]+$", "", regex=True), errors="coerce")
+    return (number.astype(float) * unit).round()
+
+
+def normalize(chunk, extra=(), deletes=False):
+    """Map a raw feed chunk onto catalog columns (plus ``vin`` and ``action``).
+
+    Columns named in ``extra`` are carried over as they are (NaN where the
+    chunk lacks them). Returns (frame, rejected) where rejected counts rows
+    without a usable make, model, price or year. With ``deletes``, delete
+    rows that carry a VIN are kept whatever else they lack.
+    """
+    chunk = chunk.rename(columns=lambda c: COLUMN_ALIASES.get(str(c).strip().lower(), str(c).strip().lower()))
+    if chunk.columns.duplicated().any():
+        # A feed may carry both an alias and the catalog name; take the first value present
+        chunk = pd.DataFrame({
+            name: chunk.loc[:, chunk.columns == name].bfill(axis=1).iloc[:, 0]
+            for name in dict.fromkeys(chunk.columns)
+        })
+    rows = len(chunk)
+    frame = pd.DataFrame(index=chunk.index)
+    missing = pd.Series(np.nan, index=chunk.index, dtype=object)
+
+    def column(name, fn):
+        return _per_value(chunk[name], fn) if name in chunk else missing
+
+    frame["make"] = column("make", _canonical_make)
+    model = column("model", lambda v: _clean(v).astype(object))
+    known_model = _per_value(frame["make"] + "|" + model.str.lower(), lambda v: v.map(_MODELS))
+    # where() rather than fillna(): an all-missing object column must stay object, not be downcast
+    frame["model"] = known_model.where(known_model.notna(), model)
+    frame["variant"] = column("variant", lambda v: _clean(v).astype(object)).fillna("")
+    frame["price"] = column("price", parse_price)
+    frame["year"] = column("year", lambda v: pd.to_numeric(v, errors="coerce"))
+
+    known = frame["make"] + "|" + frame["model"]
+    for name, aliases, default in (
+        ("body_type", BODY_ALIASES, lambda: _per_value(known, lambda v: v.map(_MODEL_BODY))),
+        ("fuel_type", FUEL_ALIASES, None),
+        ("transmission", TRANSMISSION_ALIASES, None),
+    ):
+        value = column(name, lambda v: _clean(v).str.lower().map(aliases).astype(object))
+        if default is not None:
+            value = value.where(value.notna(), default())
+        frame[name] = value.fillna("Unknown")
+    seating = column("seating", lambda v: pd.to_numeric(v, errors="coerce")).astype(float)
+    frame["seating"] = seating.fillna(_per_value(known, lambda v: v.map(_MODEL_SEATING))).fillna(5)
+
+    # Location from the city and/or pincode, against the offline gazetteer; explicit coordinates win
+    place_text = column("city", lambda v: _clean(v).astype(object)).fillna("") + " " + column("pincode", lambda v: _clean(v).astype(object)).fillna("")
+    place = _per_value(place_text, lambda v: v.map(geocode))
+    frame["city"] = place.str[0].fillna("Unknown")
+    for name, at in (("lat", 1), ("lon", 2)):
+        frame[name] = column(name, lambda v: pd.to_numeric(v, errors="coerce")).astype(float).fillna(place.str[at].astype(float))
+
+    frame["vin"] = chunk["vin"].fillna("").astype(str).str.strip().str.upper() if "vin" in chunk else ""
+    frame["action"] = column("action", lambda v: _clean(v).str.lower().astype(object)).fillna("upsert")
+    for name in extra:
+        frame[name] = chunk[name] if name in chunk else missing
+
+    valid = (
+        frame["make"].notna() & frame["model"].notna() & (frame["model"] != "")
+        & (frame["price"] > 0) & frame["year"].between(1980, 2100)
+    )
+    valid = valid.fillna(False)
+    if deletes:
+        # A delete only needs to name the listing
+        valid |= frame["action"].isin(DELETE_ACTIONS) & (frame["vin"] != "")
+    frame = frame[valid.to_numpy(dtype=bool)]
+    for name, dtype in NUMERIC.items():
+        values = frame[name].astype(np.float64)
+        # Only delete rows can lack a price or year, and they are never stored
+        frame[name] = (values if np.dtype(dtype).kind == "f" else values.fillna(0)).astype(dtype)
+    return frame.reset_index(drop=True), rows - len(frame)
+
+
+def read_feed(path, chunk_rows=None):
+    """Yield raw DataFrame chunks from a CSV, JSONL or Parquet feed (optionally gzipped).
+
+    ``path`` may also be a binary file object with a ``name`` (e.g. an upload).
+    """
+    chunk_rows = chunk_rows or int(os.getenv("INGEST_CHUNK_ROWS", "100000"))
+    name = str(getattr(path, "name", path)).lower()
+    # Only paths get their compression from the name; file objects need it spelled out
+    compression = "gzip" if name.endswith(".gz") else "infer"
+    name = name.removesuffix(".gz")
+    if name.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    elif name.endswith((".jsonl", ".ndjson", ".json")):
+        yield from pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=False, compression=compression)
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows, dtype=str, skipinitialspace=True, compression=compression)
+
+
+def apply_chunk(catalog, frame, stats):
+    """Apply one normalized chunk to the catalog as inserts, updates and deletes."""
+    keys = listing_keys(frame)
+    # Within a chunk the last row for a listing wins
+    last = ~pd.Series(keys).duplicated(keep="last").to_numpy()
+    stats["duplicates"] += int((~last).sum())
+    frame, keys = frame[last].reset_index(drop=True), keys[last]
+
+    existing = catalog.lookup(keys)
+    deletes = frame["action"].isin(DELETE_ACTIONS).to_numpy()
+    upserts = ~deletes
+    unchanged = np.zeros(len(frame), dtype=bool)
+    known = upserts & (existing >= 0)
+    if known.any():
+        current = catalog.rows(existing[known])
+        incoming = frame.loc[known, list(COLUMNS)].reset_index(drop=True)
+        current = current[list(COLUMNS)]
+        # Unknown locations are NaN on both sides and still count as unchanged
+        unchanged[known] = (current.eq(incoming) | (current.isna() & incoming.isna())).all(axis=1).to_numpy()
+    changed = known & ~unchanged
+    added = upserts & ~unchanged
+
+    removed = existing[(deletes | changed) & (existing >= 0)]
+    catalog.apply_changes(removed, frame.loc[added, list(COLUMNS) + ["vin"]], keys[added])
+    stats["deleted"] += int((deletes & (existing >= 0)).sum())
+    stats["updated"] += int(changed.sum())
+    stats["inserted"] += int((added & (existing < 0)).sum())
+    stats["duplicates"] += int(unchanged.sum())
+
+
+def ingest(catalog, path, chunk_rows=None):
+    """Stream the feed at ``path`` into ``catalog``; return counts and timing.
+
+    Memory stays bounded by the chunk size (INGEST_CHUNK_ROWS) plus the
+    catalog itself. Listings are matched on VIN, or on a fingerprint of all
+    their columns when the feed has none, so re-sent rows are skipped,
+    changed ones replace the old row and ``action=delete`` rows remove it.
+    """
+    stats = {"rows": 0, "inserted": 0, "updated": 0, "deleted": 0, "duplicates": 0, "rejected": 0}
+    started = time.perf_counter()
+    for chunk in read_feed(path, chunk_rows):
+        frame, rejected = normalize(chunk, deletes=True)
+        stats["rows"] += len(chunk)
+        stats["rejected"] += rejected
+        if len(frame):
+            apply_chunk(catalog, frame, stats)
+    stats["seconds"] = time.perf_counter() - started
+    return stats
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils.ai import groq_chat_completion
+from utils.fileio import env_float, take_file_lock, write_atomic
+from utils.sample_data import INSIGHTS_SAMPLE
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "insights")
+POINTER = "CURRENT"
+LOCK = "refresh.lock"
+
+_lock = threading.Lock()
+# Notified whenever this process's background refresh ends
+_finished = threading.Condition(_lock)
+_cached = None
+_cached_stamp = None
+_refreshing = False
+_last_error = None
+_last_attempt = 0.0
+_refresher_started = False
+
+
+def snapshot_dir():
+    return os.getenv("INSIGHTS_SNAPSHOT_DIR", DEFAULT_DIR)
+
+
+def build_prompt(data):
+    """The market analysis request for ``data``."""
+    return [
+        {"role": "system", "content": (
+            "You are an expert automotive market analyst for India. "
+            "Based on the following market data, provide: "
+            "1. Market Overview: Current trends and their implications "
+            "2. Segment Analysis: Performance of different price segments "
+            "3. Model Insights: Key factors driving model popularity "
+            "4. Future Outlook: Predictions for the next 6-12 months "
+            "5. Recommendations: Strategic insights for buyers "
+            "Format your response as a markdown report with clear sections. "
+            "Use color indicators: 🟢 for positive, 🟡 for neutral, 🔴 for negative."
+        )},
+        {"role": "user", "content": str(data)}
+    ]
+
+
+def input_hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def current():
+    """Return the published snapshot dict, or None before the first one exists.
+
+    The snapshot is re-read only when the CURRENT pointer changes, so this is
+    one stat() call on the hot path.
+    """
+    global _cached, _cached_stamp
+    pointer = os.path.join(snapshot_dir(), POINTER)
+    try:
+        stat = os.stat(pointer)
+    except FileNotFoundError:
+        return None
+    stamp = (pointer, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if stamp == _cached_stamp:
+            return _cached
+    try:
+        with open(pointer, encoding="utf-8") as f:
+            name = f.read().strip()
+        with open(os.path.join(snapshot_dir(), name), encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        # A concurrent swap or a half-deleted file; keep serving what we had
+        return _cached
+    with _lock:
+        _cached, _cached_stamp = snapshot, stamp
+    return snapshot
+
+
+def is_stale(snapshot, data=INSIGHTS_SAMPLE):
+    """True when the input changed or the snapshot is older than INSIGHTS_MAX_AGE seconds."""
+    if snapshot is None or snapshot["input_hash"] != input_hash(data):
+        return True
+    return time.time() - snapshot["created_at"] > env_float("INSIGHTS_MAX_AGE", 6 * 3600)
+
+
+def _prune(directory, keep):
+    names = sorted(n for n in os.listdir(directory) if n.startswith("snapshot-") and n.endswith(".json"))
+    for name in names[:-keep]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def refresh(data=INSIGHTS_SAMPLE):
+    """Generate a new snapshot and publish it; return it, or None if another process is refreshing.
+
+    Only one process refreshes at a time (a lock file in the snapshot
+    directory). The new snapshot is written in full before the CURRENT
+    pointer is swapped to it, so readers always see a complete one.
+    """
+    directory = snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    lock_path = os.path.join(directory, LOCK)
+    if not take_file_lock(lock_path, env_float("INSIGHTS_LOCK_TIMEOUT", 600)):
+        return None
+    try:
+        previous = current()
+        digest = input_hash(data)
+        started = time.time()
+        analysis = groq_chat_completion(build_prompt(data), page="ai_insights", use_cache=False, session="insights-refresher")
+        version = (previous["version"] + 1) if previous else 1
+        snapshot = {
+            "version": version,
+            "input_hash": digest,
+            "created_at": time.time(),
+            "generation_seconds": time.time() - started,
+            "analysis": analysis,
+        }
+        name = f"snapshot-{version:08d}.json"
+        write_atomic(os.path.join(directory, name), json.dumps(snapshot, ensure_ascii=False))
+        write_atomic(os.path.join(directory, POINTER), name)
+        _prune(directory, int(env_float("INSIGHTS_KEEP_SNAPSHOTS", 5)))
+        return snapshot
+    finally:
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+
+def _refresh_in_background(data):
+    global _refreshing, _last_error
+    try:
+        refresh(data)
+        _last_error = None
+    except Exception as e:
+        _last_error = e
+    finally:
+        with _lock:
+            _refreshing = False
+            _finished.notify_all()
+
+
+def ensure_fresh(data=INSIGHTS_SAMPLE):
+    """Start a background refresh if the snapshot is stale and none is running.
+
+    Failed refreshes are retried after INSIGHTS_RETRY_SECONDS; the last good
+    snapshot keeps being served meanwhile.
+    """
+    global _refreshing, _last_attempt
+    if not is_stale(current(), data):
+        return
+    with _lock:
+        if _refreshing:
+            return
+        if _last_error is not None and time.time() - _last_attempt < env_float("INSIGHTS_RETRY_SECONDS", 300):
+            return
+        _refreshing = True
+        _last_attempt = time.time()
+    threading.Thread(target=_refresh_in_background, args=(data,), name="insights-refresh", daemon=True).start()
+
+
+def wait(timeout):
+    """Wait up to ``timeout`` seconds for this process's running refresh, if any, then return current()."""
+    with _finished:
+        _finished.wait_for(lambda: not _refreshing, timeout)
+    return current()
+
+
+def status():
+    """Return (refreshing, last_error) for this process."""
+    with _lock:
+        return _refreshing, _last_error
+
+
+def _refresh_loop(data):
+    while True:
+        ensure_fresh(data)
+        time.sleep(env_float("INSIGHTS_CHECK_INTERVAL", 60))
+
+
+def start_refresher(data=INSIGHTS_SAMPLE):
+    """Keep the snapshot fresh from a daemon thread, once per process."""
+    global _refresher_started
+    with _lock:
+        if _refresher_started:
+            return
+        _refresher_started = True
+    threading.Thread(target=_refresh_loop, args=(data,), name="insights-refresher", daemon=True).start()
@@ -0,0 +1,216 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from utils.ai import groq_chat_stream
+from utils.fileio import env_int
+from utils.formatting import render_stream
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+class JobLimitReached(RuntimeError):
+    """The session already has as many jobs running as it may."""
+
+
+class Job:
+    """One LLM request running on the shared worker pool.
+
+    ``text`` grows as chunks arrive so a page can show partial output while
+    the job is still running.
+    """
+
+    def __init__(self, job_id, session, page, messages, use_cache=True):
+        self.id = job_id
+        self.session = session
+        self.page = page
+        self.messages = messages
+        self.use_cache = use_cache
+        self.status = QUEUED
+        self.text = ""
+        self.error = None
+        self.created_at = time.monotonic()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.finished = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+
+class JobQueue:
+    """Run LLM jobs on a worker pool shared by every session in the process.
+
+    Each session may have at most ``per_session`` active jobs. Finished jobs
+    are kept for ``keep_seconds`` so a page can pick up the result on its
+    next rerun.
+    """
+
+    def __init__(self, max_workers=8, per_session=2, keep_seconds=600.0):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-job")
+        self.per_session = per_session
+        self.keep_seconds = keep_seconds
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if not job.active and now - job.finished_at > self.keep_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, session, page, messages, use_cache=True):
+        """Queue ``messages`` for ``page`` and return the new job right away."""
+        with self._lock:
+            self._prune(time.monotonic())
+            active = sum(
+                1 for job in self._jobs.values()
+                if job.session == session and job.active and not job.cancel_event.is_set()
+            )
+            if active >= self.per_session:
+                raise JobLimitReached(f"Only {self.per_session} AI requests can run at once; please wait for one to finish")
+            job = Job(f"job-{next(self._ids)}", session, page, messages, use_cache)
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        stream = groq_chat_stream(job.messages, page=job.page, use_cache=job.use_cache, session=job.session)
+        try:
+            for chunk in stream:
+                if job.cancel_event.is_set():
+                    stream.close()
+                    self._finish(job, CANCELLED)
+                    return
+                job.text += chunk
+        except Exception as e:
+            job.error = e
+            self._finish(job, FAILED)
+            return
+        self._finish(job, DONE)
+
+    def _finish(self, job, status):
+        job.finished_at = time.monotonic()
+        job.status = status
+        job.finished.set()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None and job.active:
+            job.cancel_event.set()
+
+    def stats(self):
+        with self._lock:
+            by_status = {}
+            for job in self._jobs.values():
+                by_status[job.status] = by_status.get(job.status, 0) + 1
+            return by_status
+
+
+def get_queue():
+    """Return the process-wide job queue, created on first use.
+
+    Sized by LLM_JOB_WORKERS and LLM_JOBS_PER_SESSION.
+    """
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(
+                    max_workers=env_int("LLM_JOB_WORKERS", 8),
+                    per_session=env_int("LLM_JOBS_PER_SESSION", 2)
+                )
+    return _queue
+
+
+def _session():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else threading.current_thread().name
+
+
+def submit_job(page, messages, use_cache=True):
+    """Start an LLM job for ``page`` in this session, replacing any earlier one.
+
+    Pass ``use_cache=False`` for replies that shouldn't be stored or shared
+    with other sessions. Raises JobLimitReached when the session is already at its job cap.
+    """
+    previous = st.session_state.jobs.get(page)
+    if previous:
+        get_queue().cancel(previous)
+    job = get_queue().submit(_session(), page, messages, use_cache)
+    st.session_state.jobs[page] = job.id
+    return job
+
+
+def cancel_jobs(keep=()):
+    """Cancel this session's jobs, except those for the pages in ``keep``."""
+    for page, job_id in list(st.session_state.jobs.items()):
+        if page not in keep:
+            get_queue().cancel(job_id)
+            del st.session_state.jobs[page]
+
+
+def _follow(job, interval, deadline=None):
+    """Yield the text ``job`` adds until it finishes or time.monotonic() passes ``deadline``.
+
+    Yields "" every ``interval`` seconds while the job is quiet.
+    """
+    sent = 0
+    while True:
+        finished = job.finished.wait(interval)
+        text = job.text
+        yield text[sent:]
+        sent = len(text)
+        if finished or (deadline is not None and time.monotonic() >= deadline):
+            return
+
+
+def await_job(page, interval=0.3, follow=2.0):
+    """Show the page's job output so far and return the full text once it is done.
+
+    A running job's text is streamed into the page for at most ``follow``
+    seconds; if it is still running then, the script reruns and picks it
+    up again. Each run therefore ends within ``follow`` seconds, so
+    navigation and other widgets are handled while a job runs. A failed
+    job re-raises its error; a cancelled or unknown job returns None.
+    """
+    job_id = st.session_state.jobs.get(page)
+    job = get_queue().get(job_id) if job_id else None
+    if job is None or job.status == CANCELLED:
+        st.session_state.jobs.pop(page, None)
+        return None
+    if job.active:
+        deadline = time.monotonic() + follow
+        placeholder = st.empty()
+        placeholder.info("Waiting for the AI to respond...")
+        while not job.text and time.monotonic() < deadline and not job.finished.wait(interval):
+            placeholder.info("Waiting for the AI to respond...")
+        if job.text:
+            render_stream(_follow(job, interval, deadline), placeholder)
+        if not job.finished.is_set():
+            st.rerun()
+    del st.session_state.jobs[page]
+    if job.status == FAILED:
+        raise job.error
+    if job.status == CANCELLED:
+        return None
+    return job.text
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "llm_cache.sqlite3")
+
+# Seconds a response stays valid, by page. Override with LLM_CACHE_TTL_<PAGE>; 0 disables caching for that page.
+PAGE_TTLS = {
+    "policy_scanner": 7 * 24 * 3600,
+    "fine_print_analyzer": 7 * 24 * 3600,
+    "financial_advisor": 24 * 3600,
+    "depreciation_predictor": 24 * 3600,
+    "model_comparison": 24 * 3600,
+    "car_browser": 6 * 3600,
+    "ai_insights": 6 * 3600,
+}
+DEFAULT_TTL = 3600
+
+_local = threading.local()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    page TEXT,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def enabled():
+    """Return False when the cache is bypassed with LLM_CACHE_DISABLED=1."""
+    return os.getenv("LLM_CACHE_DISABLED", "").lower() not in ("1", "true", "yes")
+
+
+def page_ttl(page):
+    """Return the time-to-live in seconds for responses produced by ``page``."""
+    override = os.getenv(f"LLM_CACHE_TTL_{(page or 'default').upper()}")
+    if override:
+        return float(override)
+    return PAGE_TTLS.get(page, DEFAULT_TTL)
+
+
+def make_key(params):
+    """Hash the request parameters that determine a completion.
+
+    Message content is whitespace-normalized so trivially different prompts
+    (trailing newlines, double spaces) share an entry.
+    """
+    normalized = {
+        "messages": [
+            {"role": m["role"], "content": " ".join(str(m["content"]).split())}
+            for m in params["messages"]
+        ],
+        "model": params.get("model"),
+        "temperature": params.get("temperature"),
+        "max_tokens": params.get("max_tokens"),
+        "top_p": params.get("top_p"),
+    }
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _connect():
+    path = os.getenv("LLM_CACHE_PATH", DEFAULT_PATH)
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == path:
+        return conn
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # One connection per thread; WAL lets several Streamlit processes read while one writes
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    _local.conn = conn
+    _local.path = path
+    return conn
+
+
+def _bump(conn, name, amount=1):
+    conn.execute(
+        "INSERT INTO counters (name, value) VALUES (?, ?) "
+        "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+        (name, amount)
+    )
+
+
+def get(key):
+    """Return the cached response for ``key``, or None on a miss or expiry."""
+    now = time.time()
+    try:
+        conn = _connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] > now:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                _bump(conn, "hits")
+                value = row[0]
+            else:
+                if row is not None:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    _bump(conn, "expired")
+                _bump(conn, "misses")
+                value = None
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+    except sqlite3.Error:
+        # A broken or locked cache should never take a page down
+        return None
+
+
+def put(key, value, page=None):
+    """Store a response and evict least recently used entries above the size cap."""
+    ttl = page_ttl(page)
+    if ttl <= 0:
+        return
+    now = time.time()
+    size = len(value.encode("utf-8"))
+    max_bytes = int(os.getenv("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    try:
+        conn = _connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, page, value, size, created_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, page, value, size, now, now + ttl, now)
+            )
+            _bump(conn, "stores")
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > max_bytes:
+                _evict(conn, total - int(max_bytes * 0.9))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    except sqlite3.Error:
+        pass
+
+
+def _evict(conn, excess):
+    freed = 0
+    evicted = 0
+    rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+    for key, size in rows:
+        if freed >= excess:
+            break
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        freed += size
+        evicted += 1
+    _bump(conn, "evictions", evicted)
+
+
+def stats():
+    """Return hit/miss counters and the current size of the shared cache."""
+    try:
+        conn = _connect()
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+    except sqlite3.Error:
+        return {}
+    lookups = counters.get("hits", 0) + counters.get("misses", 0)
+    return {
+        "hits": counters.get("hits", 0),
+        "misses": counters.get("misses", 0),
+        "hit_rate": counters.get("hits", 0) / lookups if lookups else 0.0,
+        "stores": counters.get("stores", 0),
+        "evictions": counters.get("evictions", 0),
+        "expired": counters.get("expired", 0),
+        "entries": entries,
+        "bytes": size,
+    }
+
+
+def clear():
+    """Remove every cached response and reset the counters."""
+    conn = _connect()
+    conn.execute("DELETE FROM entries")
+    conn.execute("DELETE FROM counters")
@@ -0,0 +1,285 @@
+import argparse
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.depreciation import BASE_RATES, CONDITIONS, CURRENT_YEAR, TYPICAL_KM_PER_YEAR
+from utils.fileio import write_atomic
+from utils.ingest import MAKE_ALIASES, normalize, parse_price, read_feed
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "residual_model.json")
+FORMAT = 1
+# Columns whose values each get their own effect on the yearly rate
+SEGMENTS = ("make", "model", "fuel_type", "transmission", "city", "condition")
+# Values with fewer historical listings than this get no effect of their own
+MIN_LISTINGS = 20
+# Ridge penalty on the effects: pulls values with little data towards the average
+RIDGE = 10.0
+MIN_RATE, MAX_RATE = 0.01, 0.6
+# History header -> column, on top of the feed aliases in utils.ingest
+HISTORY_ALIASES = {
+    "original_price": "new_price", "ex_showroom_price": "new_price", "new_car_price": "new_price",
+    "sold_year": "sale_year", "listing_year": "sale_year", "listed_year": "sale_year",
+    "km_driven": "mileage", "kms_driven": "mileage", "odometer": "mileage", "kilometers": "mileage",
+    "car_condition": "condition",
+}
+HISTORY_COLUMNS = ("new_price", "sale_year", "mileage", "condition")
+
+_MAKE_KEYS = {alias: make.lower() for alias, make in MAKE_ALIASES.items()}
+
+_lock = threading.Lock()
+_model = None
+_loaded = False
+
+
+def model_path():
+    return os.getenv("RESIDUAL_MODEL_PATH", DEFAULT_PATH)
+
+
+def _value_key(value):
+    return str(value).strip().lower()
+
+
+def _make_key(value):
+    key = _value_key(value)
+    return _MAKE_KEYS.get(key, key)
+
+
+def model_key(make, model):
+    """The key a make and model are looked up by: "maruti suzuki|swift"."""
+    return f"{_make_key(make)}|{_value_key(model)}"
+
+
+def _segment_keys(frame):
+    """{segment: (codes, keys)} for the segment columns ``frame`` has.
+
+    ``keys`` lists the distinct lower-case values and ``codes`` points each
+    row at one (-1 where missing). Models are keyed "make|model". Working
+    on the distinct values keeps string handling off the per-row path.
+    """
+    segments = {}
+    if "make" in frame:
+        make_codes, makes = pd.factorize(frame["make"])
+        make_keys = [_make_key(make) for make in makes]
+        segments["make"] = (make_codes, make_keys)
+        if "model" in frame:
+            model_codes, models = pd.factorize(frame["model"])
+            known = (make_codes >= 0) & (model_codes >= 0)
+            pairs, inverse = np.unique(make_codes[known].astype(np.int64) * len(models) + model_codes[known], return_inverse=True)
+            codes = np.full(len(frame), -1, dtype=np.int64)
+            codes[known] = inverse
+            segments["model"] = (codes, [f"{make_keys[pair // len(models)]}|{_value_key(models[pair % len(models)])}" for pair in pairs])
+    for column in SEGMENTS[2:]:
+        if column in frame:
+            codes, values = pd.factorize(frame[column])
+            segments[column] = (codes, [_value_key(value) for value in values])
+    return segments
+
+
+def _km_per_year(mileage, age):
+    """Yearly mileage over the typical, in 10,000 km; 0 where unknown."""
+    return np.nan_to_num((mileage / np.maximum(age, 1) - TYPICAL_KM_PER_YEAR) / 10000)
+
+
+def load_history(path):
+    """Read a historical listings file (CSV, JSONL or Parquet) into the columns train() uses.
+
+    Besides the feed columns (make, model, price as sold, year, fuel_type,
+    transmission, city or pincode) each row needs the new car's
+    ``new_price``, and optionally the ``sale_year`` (default CURRENT_YEAR),
+    ``mileage`` and ``condition``. Returns (history, rejected rows).
+    """
+    frames, rejected = [], 0
+    for chunk in read_feed(path):
+        chunk = chunk.rename(columns=lambda c: HISTORY_ALIASES.get(str(c).strip().lower(), c))
+        frame, dropped = normalize(chunk, extra=HISTORY_COLUMNS)
+        frames.append(frame)
+        rejected += dropped
+    history = pd.concat(frames, ignore_index=True)
+    history["new_price"] = parse_price(history["new_price"])
+    history["sale_year"] = pd.to_numeric(history["sale_year"], errors="coerce").fillna(CURRENT_YEAR)
+    history["mileage"] = pd.to_numeric(history["mileage"].astype("string").str.replace(r"[^\d.]", "", regex=True), errors="coerce")
+    condition = history["condition"].astype("string").str.strip().str.title()
+    history["condition"] = condition.where(condition.isin(CONDITIONS))
+    return history, rejected
+
+
+def train(history, ridge=RIDGE, min_listings=MIN_LISTINGS):
+    """Fit yearly depreciation rates to ``history`` (see load_history()) and return the artifact dict.
+
+    Each usable listing (a year old or more, sold for 5-120% of new)
+    gives its yearly log value retention, log(price / new_price) / age.
+    That is fitted by ridge regression on one effect per segment value
+    plus slopes for age and yearly mileage. The normal equations are
+    accumulated with bincount, so millions of listings fit in seconds.
+    """
+    age = (history["sale_year"] - history["year"]).to_numpy(dtype=np.float64)
+    ratio = (history["price"] / history["new_price"]).to_numpy(dtype=np.float64)
+    usable = (age >= 1) & (ratio >= 0.05) & (ratio <= 1.2)
+    history, age, ratio = history[usable], age[usable], ratio[usable]
+    rows = len(history)
+    if not rows:
+        raise ValueError("No usable listings: rows need a price, new_price and a model year at least a year before the sale")
+    target = np.log(ratio) / age
+    age_mean = float(age.mean())
+
+    # Each slot is one non-zero per row of the design matrix: (column, value)
+    slots = [(np.zeros(rows, dtype=np.int64), np.ones(rows))]
+    columns, layout = 1, {}
+    for segment, (codes, keys) in _segment_keys(history).items():
+        counts = {}
+        for key, count in zip(keys, np.bincount(codes[codes >= 0], minlength=len(keys))):
+            counts[key] = counts.get(key, 0) + count
+        kept = sorted(key for key, count in counts.items() if count >= min_listings and key not in ("", "unknown", "nan"))
+        if not kept:
+            continue
+        positions = {key: columns + i for i, key in enumerate(kept)}
+        # The extra -1 entry catches rows with no value
+        at = np.array([positions.get(key, -1) for key in keys] + [-1])[codes]
+        slots.append((np.maximum(at, 0), (at >= 0).astype(np.float64)))
+        layout[segment] = (columns, kept)
+        columns += len(kept)
+    numeric = {"age": age - age_mean, "km_per_year": _km_per_year(history["mileage"].to_numpy(dtype=np.float64), age)}
+    for offset, values in enumerate(numeric.values()):
+        slots.append((np.full(rows, columns + offset), values))
+    columns += len(numeric)
+
+    gram = np.zeros(columns * columns)
+    moments = np.zeros(columns)
+    for at, value in slots:
+        moments += np.bincount(at, weights=value * target, minlength=columns)
+        for other_at, other_value in slots:
+            gram += np.bincount(at * columns + other_at, weights=value * other_value, minlength=columns * columns)
+    penalty = np.full(columns, ridge)
+    # Neither the intercept nor the slopes are shrunk, except a slope with no data
+    # (e.g. no mileage in the history), which would leave the equations singular
+    penalty[0] = 0
+    penalty[-len(numeric):] = [0 if values.any() else ridge for values in numeric.values()]
+    coefficients = np.linalg.solve(gram.reshape(columns, columns) + np.diag(penalty), moments)
+
+    effects = {segment: dict(zip(kept, coefficients[start:start + len(kept)].round(6).tolist())) for segment, (start, kept) in layout.items()}
+    condition_source = "fitted"
+    if "condition" not in effects:
+        # Without conditions in the history, keep the predictor's base rates relative to a "Good" car
+        effects["condition"] = {c.lower(): round(math.log1p(-r) - math.log1p(-BASE_RATES["Good"]), 6) for c, r in BASE_RATES.items()}
+        condition_source = "base rates"
+    fitted = np.zeros(rows)
+    for at, value in slots:
+        fitted += coefficients[at] * value
+    base = np.log1p(-pd.Series(history["condition"]).map(BASE_RATES).fillna(BASE_RATES["Good"]).to_numpy(dtype=np.float64))
+    return {
+        "format": FORMAT,
+        "trained_at": time.time(),
+        "listings": rows,
+        "intercept": round(float(coefficients[0]), 6),
+        "age_mean": round(age_mean, 6),
+        "slopes": dict(zip(numeric, coefficients[-len(numeric):].round(6).tolist())),
+        "effects": effects,
+        "condition_source": condition_source,
+        # Yearly log retention error, and that of the fixed base rates
+        "fit": {"rmse": round(float(np.sqrt(np.mean((fitted - target) ** 2))), 6),
+                "base_rates_rmse": round(float(np.sqrt(np.mean((base - target) ** 2))), 6)},
+    }
+
+
+def save(artifact, path=None):
+    path = path or model_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_atomic(path, json.dumps(artifact, ensure_ascii=False, separators=(",", ":")))
+
+
+def load(path=None):
+    with open(path or model_path(), encoding="utf-8") as f:
+        artifact = json.load(f)
+    if artifact.get("format") != FORMAT:
+        raise ValueError(f"{path or model_path()} is not a residual model this version can read; retrain it")
+    return ResidualModel(artifact)
+
+
+def get_model():
+    """The trained model, loaded once per process, or None if there is none (base rates apply)."""
+    global _model, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                try:
+                    _model = load()
+                except (OSError, ValueError):
+                    _model = None
+                _loaded = True
+    return _model
+
+
+class ResidualModel:
+    """Yearly depreciation rates from a trained artifact (see train()).
+
+    A car's yearly log value retention is the intercept, plus the effect
+    of each of its segment values the history had enough listings of,
+    plus the age and yearly mileage slopes; unseen values add nothing.
+    """
+
+    def __init__(self, artifact):
+        self.artifact = artifact
+        self.intercept = artifact["intercept"]
+        self.age_mean = artifact["age_mean"]
+        self.age_slope = artifact["slopes"]["age"]
+        self.km_slope = artifact["slopes"]["km_per_year"]
+        self.effects = {segment: artifact["effects"].get(segment, {}) for segment in SEGMENTS}
+
+    def rate(self, make="", model="", fuel_type="", transmission="", city="", condition="", age=1, mileage=None):
+        """Yearly depreciation rate for one car. ``city`` is a gazetteer name (utils.geo)."""
+        effects = self.effects
+        retention = (
+            self.intercept
+            + effects["make"].get(_make_key(make), 0)
+            + effects["model"].get(model_key(make, model), 0)
+            + effects["fuel_type"].get(_value_key(fuel_type), 0)
+            + effects["transmission"].get(_value_key(transmission), 0)
+            + effects["city"].get(_value_key(city), 0)
+            + effects["condition"].get(_value_key(condition), 0)
+            + self.age_slope * (max(age, 1) - self.age_mean)
+        )
+        if mileage is not None and mileage == mileage:
+            retention += self.km_slope * (mileage / max(age, 1) - TYPICAL_KM_PER_YEAR) / 10000
+        return min(max(1 - math.exp(retention), MIN_RATE), MAX_RATE)
+
+    def rates(self, frame, age=1, mileage=None):
+        """Yearly depreciation rate for every car in ``frame``, from whichever segment columns it has."""
+        return np.clip(1 - np.exp(self.retentions(frame, age, mileage)), MIN_RATE, MAX_RATE)
+
+    def retentions(self, frame, age=1, mileage=None):
+        """Yearly log value retention for every car in ``frame``, before rates() limits it to MIN_RATE-MAX_RATE."""
+        age = np.broadcast_to(np.asarray(age, dtype=np.float64), len(frame))
+        retention = self.intercept + self.age_slope * (np.maximum(age, 1) - self.age_mean)
+        for segment, (codes, keys) in _segment_keys(frame).items():
+            effects = self.effects[segment]
+            retention = retention + np.array([effects.get(key, 0) for key in keys] + [0.0])[codes]
+        if mileage is not None:
+            retention = retention + self.km_slope * _km_per_year(np.asarray(mileage, dtype=np.float64), age)
+        return retention
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the Depreciation Predictor's residual-value model to historical listings")
+    parser.add_argument("history", help="CSV, JSONL or Parquet file of past listings with new_price")
+    parser.add_argument("--out", default=None, help=f"Artifact path (default RESIDUAL_MODEL_PATH or {DEFAULT_PATH})")
+    parser.add_argument("--ridge", type=float, default=RIDGE)
+    parser.add_argument("--min-listings", type=int, default=MIN_LISTINGS)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    history, rejected = load_history(args.history)
+    artifact = train(history, args.ridge, args.min_listings)
+    save(artifact, args.out)
+    print(f"fitted {artifact['listings']:,} listings ({rejected:,} rejected) in {time.perf_counter() - started:.1f}s; "
+          f"yearly log retention RMSE {artifact['fit']['rmse']:.4f} vs {artifact['fit']['base_rates_rmse']:.4f} "
+          f"with base rates; wrote {args.out or model_path()}")
+
+
+if __name__ == "__main__":
+    # python -m utils.residual_model history.csv
+    main()
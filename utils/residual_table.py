@@ -0,0 +1,274 @@
+import hashlib
+import json
+import math
+import mmap
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import depreciation
+from utils.depreciation import CONDITIONS, HORIZON, TYPICAL_KM_PER_YEAR, yearly_rates
+from utils.fileio import atomic_open
+from utils.residual_model import MAX_RATE, MIN_RATE, get_model, model_key
+from utils.sample_data import CATALOG_MODELS
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "residual_table.bin")
+MAGIC = b"RVTABLE1"
+FORMAT = 2
+ALIGN = 64
+# "" is any fuel: no fuel effect of its own
+FUELS = ("", "Petrol", "Diesel", "CNG", "Electric", "Hybrid")
+# Grid axes as (start, step, points); lookups between points interpolate, beyond them clamp.
+# Mileage is km per year of age, which both the high-mileage premium and the fitted model are linear in
+AGES = (0, 1, 21)
+KM_PER_YEAR = (0, 3000, 14)
+
+_lock = threading.Lock()
+_cached = None
+_cached_stamp = None
+
+
+def table_path():
+    return os.getenv("RESIDUAL_TABLE_PATH", DEFAULT_PATH)
+
+
+def _axis(axis):
+    start, step, points = axis
+    return start + step * np.arange(points, dtype=np.float64)
+
+
+def _position(axis, x):
+    """(grid index, fraction of the way to the next point) of ``x`` on ``axis``."""
+    start, step, points = axis
+    at = (x - start) / step
+    if at <= 0:
+        return 0, 0.0
+    if at >= points - 1:
+        return points - 2, 1.0
+    i = int(at)
+    return i, at - i
+
+
+def _source(model):
+    """What the table's values are computed from; a table built from another source is stale."""
+    if model is None:
+        return {"kind": "base rates"}
+    return {"kind": "residual model", "trained_at": model.artifact["trained_at"]}
+
+
+def _fingerprint(model):
+    """Hash of everything that goes into the shared grid, so an unchanged grid is reused.
+
+    A make's or model's own effect only moves its offset, never the grid.
+    """
+    shared = {
+        "format": FORMAT, "fuels": FUELS, "conditions": CONDITIONS, "ages": AGES, "km_per_year": KM_PER_YEAR,
+        "constants": [getattr(depreciation, name) for name in ("TYPICAL_KM_PER_YEAR", "HIGH_MILEAGE_RATE", "MAX_MILEAGE_RATE")],
+    }
+    if model is None:
+        shared["rates"] = depreciation.BASE_RATES
+    else:
+        artifact = model.artifact
+        shared.update({name: artifact[name] for name in ("intercept", "age_mean", "slopes")})
+        shared.update({segment: artifact["effects"].get(segment, {}) for segment in ("fuel_type", "condition")})
+    return hashlib.sha1(json.dumps(shared, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _retentions(model):
+    """FUELS x CONDITIONS x AGES x KM_PER_YEAR array: yearly log value retention before any make or model effect.
+
+    The fitted model is linear in age and km per year, so interpolating
+    it is exact; the base rates' high-mileage premium is piecewise linear.
+    """
+    ages, km_per_year = _axis(AGES), _axis(KM_PER_YEAR)
+    shape = (len(FUELS), len(CONDITIONS), len(ages), len(km_per_year))
+    grid = np.stack(np.meshgrid(np.arange(len(FUELS)), np.arange(len(CONDITIONS)), ages, km_per_year, indexing="ij"), -1).reshape(-1, 4)
+    grid[:, 3] *= np.maximum(grid[:, 2], 1)
+    if model is None:
+        # The base rates don't vary by make, model or fuel
+        retention = np.log1p(-yearly_rates(grid[:, 1].astype(np.int64), grid[:, 2], grid[:, 3]))
+    else:
+        frame = pd.DataFrame({
+            "fuel_type": np.array(FUELS, dtype=object)[grid[:, 0].astype(np.int64)],
+            "condition": np.array(CONDITIONS, dtype=object)[grid[:, 1].astype(np.int64)],
+        })
+        retention = model.retentions(frame, grid[:, 2], grid[:, 3])
+    return retention.astype(np.float32).reshape(shape)
+
+
+def _offsets(keys, model):
+    """Each model's make and model effects, added to the grid's retention at lookup."""
+    if model is None:
+        return np.zeros(len(keys), dtype=np.float32)
+    makes, models = model.effects["make"], model.effects["model"]
+    return np.array([makes.get(key.split("|", 1)[0], 0) + models.get(key, 0) for key in keys], dtype=np.float32)
+
+
+def build(model=None, previous=None):
+    """Build the table for ``model`` (None: the base rates), reusing the ``previous`` grid if its inputs haven't changed.
+
+    Covers the catalog's common models plus every model the residual
+    model has an effect for. Returns (table, whether the grid was recomputed).
+    """
+    keys = sorted({model_key(m["make"], m["model"]) for m in CATALOG_MODELS} | set(model.effects["model"] if model else ()))
+    fingerprint = _fingerprint(model)
+    reuse = previous is not None and previous.header["fingerprint"] == fingerprint
+    values = previous.values if reuse else _retentions(model)
+    header = {
+        "format": FORMAT, "built_at": time.time(), "source": _source(model), "keys": keys, "fingerprint": fingerprint,
+        "fuels": FUELS, "conditions": CONDITIONS, "ages": AGES, "km_per_year": KM_PER_YEAR,
+        "rate_limits": None if model is None else [MIN_RATE, MAX_RATE],
+    }
+    return ResidualTable(header, values, _offsets(keys, model)), not reuse
+
+
+def write(table, path=None):
+    """Write ``table`` to one binary file: magic, header length, JSON header, then the aligned float32 grid and offsets."""
+    path = path or table_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    header = json.dumps(table.header, ensure_ascii=False).encode("utf-8")
+    with atomic_open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        f.write(b"\0" * (-f.tell() % ALIGN))
+        f.write(np.ascontiguousarray(table.values, dtype="<f4").tobytes())
+        f.write(np.ascontiguousarray(table.offsets, dtype="<f4").tobytes())
+
+
+def load(path=None):
+    """Map the table at ``path``; lookups read only the few values they need."""
+    path = path or table_path()
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a residual-value table")
+    length = int.from_bytes(buffer[len(MAGIC):len(MAGIC) + 4], "little")
+    start = len(MAGIC) + 4
+    header = json.loads(buffer[start:start + length].decode("utf-8"))
+    if header.get("format") != FORMAT:
+        raise ValueError(f"{path} is from another version of the app; rebuild it")
+    offset = start + length + (-(start + length) % ALIGN)
+    shape = (len(header["fuels"]), len(header["conditions"]), header["ages"][2], header["km_per_year"][2])
+    values = np.frombuffer(buffer, dtype="<f4", count=int(np.prod(shape)), offset=offset).reshape(shape)
+    offsets = np.frombuffer(buffer, dtype="<f4", count=len(header["keys"]), offset=offset + values.nbytes)
+    return ResidualTable(header, values, offsets)
+
+
+def get_table():
+    """The table for the current depreciation model, rebuilt incrementally when that model changes.
+
+    The file is re-mapped only when it changes on disk, so this is one
+    stat() call on the hot path. Returns None if it can't be built.
+    """
+    global _cached, _cached_stamp
+    path = table_path()
+    model = get_model()
+    with _lock:
+        try:
+            stat = os.stat(path)
+            stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+        table = _cached
+        if stamp is not None and stamp != _cached_stamp:
+            try:
+                table = load(path)
+            except (OSError, ValueError):
+                table = None
+        if table is None or table.header["source"] != _source(model):
+            try:
+                table, _ = build(model, table)
+                write(table, path)
+                stat = os.stat(path)
+                stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                return _cached
+        _cached, _cached_stamp = table, stamp
+        return table
+
+
+class ResidualTable:
+    """Precomputed share of the new price a car keeps, by model, fuel, condition, age and mileage.
+
+    ``values`` holds the yearly log value retention, fuels x conditions x
+    ages x km per year, shared by every model; ``offsets`` holds each
+    model's own effect on it. A lookup is a few dict hits, a bilinear
+    interpolation between the four grid points around the car, the
+    model's offset, and the rate limits applied before compounding.
+    """
+
+    def __init__(self, header, values, offsets):
+        self.header = header
+        self.values = values
+        self.offsets = offsets
+        self.keys = header["keys"]
+        self._rows = {key: i for i, key in enumerate(self.keys)}
+        self._offsets = offsets.tolist()
+        low, high = header["rate_limits"] or (0, None)
+        # Limits on the rate, as limits on the log retention
+        self._bounds = (-math.inf if high is None else math.log1p(-high), math.log1p(-low))
+        self._fuels = {fuel.lower(): i for i, fuel in enumerate(header["fuels"])}
+        self._conditions = {condition.lower(): i for i, condition in enumerate(header["conditions"])}
+        self._ages = tuple(header["ages"])
+        self._km_per_year = tuple(header["km_per_year"])
+        # Flat view for lookups: indexing it is much cheaper than slicing the array
+        flat = np.ascontiguousarray(values, dtype=np.float32)
+        self._flat = memoryview(flat).cast("B").cast("f")
+        self._strides = [stride // flat.itemsize for stride in flat.strides]
+
+    def __contains__(self, make_model):
+        return model_key(*make_model) in self._rows
+
+    def residual(self, make, model, fuel_type="", condition="Good", age=0, mileage=None):
+        """Share of the new price kept at ``age`` years and ``mileage`` km, or None for a model not in the table.
+
+        Without a mileage the car is taken to have done a typical amount.
+        """
+        row = self._rows.get(model_key(make, model))
+        if row is None:
+            return None
+        fuel = self._fuels.get(str(fuel_type).strip().lower(), 0)
+        condition = self._conditions.get(str(condition).strip().lower(), self._conditions["good"])
+        km_per_year = TYPICAL_KM_PER_YEAR if mileage is None or mileage != mileage else mileage / max(age, 1)
+        i, along_age = _position(self._ages, age)
+        j, along_km = _position(self._km_per_year, km_per_year)
+        fuel_stride, condition_stride, age_stride, _ = self._strides
+        at = fuel * fuel_stride + condition * condition_stride + i * age_stride + j
+        flat = self._flat
+        a, b, c, d = flat[at], flat[at + 1], flat[at + age_stride], flat[at + age_stride + 1]
+        retention = (1 - along_age) * (a + (b - a) * along_km) + along_age * (c + (d - c) * along_km) + self._offsets[row]
+        low, high = self._bounds
+        return math.exp(min(max(retention, low), high) * age)
+
+    def curve(self, price, make, model, fuel_type="", condition="Good", age=0, mileage=None,
+              km_per_year=TYPICAL_KM_PER_YEAR, horizon=HORIZON):
+        """Projected values of a car worth ``price`` today, now and each year for ``horizon`` years.
+
+        Returns None for a model not in the table.
+        """
+        if mileage is None or mileage != mileage:
+            mileage = TYPICAL_KM_PER_YEAR * max(age, 1)
+        today = self.residual(make, model, fuel_type, condition, age, mileage)
+        if today is None:
+            return None
+        return [price] + [
+            price * self.residual(make, model, fuel_type, condition, age + year, mileage + km_per_year * year) / today
+            for year in range(1, horizon + 1)
+        ]
+
+
+if __name__ == "__main__":
+    # Rebuild after training a new residual model: python -m utils.residual_table
+    started = time.perf_counter()
+    try:
+        existing = load()
+    except (OSError, ValueError):
+        existing = None
+    table, computed = build(get_model(), existing)
+    write(table)
+    print(f"{len(table.keys):,} models, grid {'recomputed' if computed else 'reused'}, in {time.perf_counter() - started:.2f}s; "
+          f"{(table.values.nbytes + table.offsets.nbytes) / 1e6:.2f} MB written to {table_path()}")
@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+
+FAST_MODEL = "llama-3.1-8b-instant"
+QUALITY_MODEL = "llama-3.3-70b-versatile"
+
+# Overridable from a JSON file named by GROQ_ROUTING_RULES; keys not given keep these values
+DEFAULT_RULES = {
+    "models": {
+        "fast": {"model": FAST_MODEL, "max_tokens": 512},
+        "quality": {"model": QUALITY_MODEL, "max_tokens": 1024},
+    },
+    # "fast", "quality" or "auto" per page; unlisted pages are "auto"
+    "pages": {
+        "fine_print_analyzer": "quality",
+        "policy_scanner": "quality",
+        "model_comparison": "quality",
+        "financial_advisor": "quality",
+        "car_browser": "fast",
+        "ai_assistant": "auto",
+        "depreciation_predictor": "auto",
+        "ai_insights": "auto",
+    },
+    # In "auto", a request is cheap when the whole prompt is short and the
+    # latest user message has fewer than ``complex_keyword_limit`` complex terms
+    "fast_max_prompt_chars": 2000,
+    "complex_keyword_limit": 2,
+    "complex_keywords": [
+        "compare", "comparison", "versus", " vs ", "contract", "clause", "agreement",
+        "warranty", "insurance", "loan", "emi", "interest", "finance", "tax",
+        "depreciation", "resale", "negotiat", "legal", "terms", "calculate",
+    ],
+}
+POLICIES = ("auto", "latency", "quality")
+
+_rules = None
+_rules_source = None
+_lock = threading.Lock()
+
+
+def policy():
+    """Return the routing policy from GROQ_ROUTING_POLICY: auto (default), latency or quality.
+
+    ``quality`` sends everything to the large model, ``latency`` everything
+    except the pages pinned to "quality", and ``auto`` follows the page rules
+    and the prompt heuristic.
+    """
+    value = os.getenv("GROQ_ROUTING_POLICY", "auto").lower()
+    return value if value in POLICIES else "auto"
+
+
+def _merge(rules, overrides):
+    """Apply ``overrides`` to ``rules`` in place, nested dicts key by key."""
+    for name, value in overrides.items():
+        if isinstance(value, dict) and isinstance(rules.get(name), dict):
+            _merge(rules[name], value)
+        else:
+            rules[name] = value
+
+
+def rules():
+    """Return the routing rules, merged with GROQ_ROUTING_RULES if it is set."""
+    global _rules, _rules_source
+    source = os.getenv("GROQ_ROUTING_RULES") or None
+    with _lock:
+        if _rules is None or source != _rules_source:
+            merged = json.loads(json.dumps(DEFAULT_RULES))
+            if source:
+                with open(source, encoding="utf-8") as f:
+                    overrides = json.load(f)
+                _merge(merged, overrides)
+            _rules, _rules_source = merged, source
+        return _rules
+
+
+def _latest_user_text(messages):
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return str(message.get("content", ""))
+    return ""
+
+
+def classify(messages, page, routing_policy=None):
+    """Return "fast" or "quality" for a request from ``page``."""
+    routing_policy = routing_policy or policy()
+    if routing_policy == "quality":
+        return "quality"
+    config = rules()
+    pinned = config["pages"].get(page, "auto")
+    if pinned == "quality":
+        return "quality"
+    if pinned == "fast" or routing_policy == "latency":
+        return "fast"
+
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+    if prompt_chars > config["fast_max_prompt_chars"]:
+        return "quality"
+    text = _latest_user_text(messages).lower()
+    hits = sum(1 for keyword in config["complex_keywords"] if keyword in text)
+    return "quality" if hits >= config["complex_keyword_limit"] else "fast"
+
+
+def route(messages, page, routing_policy=None):
+    """Return ``(route_name, model, max_tokens)`` for a request."""
+    name = classify(messages, page, routing_policy)
+    target = rules()["models"][name]
+    return name, target["model"], target["max_tokens"]
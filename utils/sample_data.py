@@ -183,4 +183,66 @@ INSIGHTS_SAMPLE = {
         'premium': '15-20 lakhs',
         'luxury': '20+ lakhs'
     }
-} 
\ No newline at end of file
+}
+
+# Car Browser make options; "Others" covers every make not listed here
+BROWSER_MAKES = ["Maruti Suzuki", "Hyundai", "Tata", "Mahindra", "Toyota", "Honda", "Kia", "Volkswagen", "Skoda", "MG", "Others"]
+
+# Models the synthetic vehicle catalog is generated from (ex-showroom price range in lakhs)
+CATALOG_MODELS = [
+    {'make': 'Maruti Suzuki', 'model': 'Alto K10', 'body_type': 'Hatchback', 'seating': 4, 'price_lakh': (4.0, 5.9), 'fuel_types': ['Petrol', 'CNG'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['STD', 'LXi', 'VXi', 'VXi+']},
+    {'make': 'Maruti Suzuki', 'model': 'Swift', 'body_type': 'Hatchback', 'seating': 5, 'price_lakh': (6.5, 9.6), 'fuel_types': ['Petrol', 'CNG'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['LXi', 'VXi', 'ZXi', 'ZXi+']},
+    {'make': 'Maruti Suzuki', 'model': 'Baleno', 'body_type': 'Hatchback', 'seating': 5, 'price_lakh': (6.7, 9.9), 'fuel_types': ['Petrol', 'CNG'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['Sigma', 'Delta', 'Zeta', 'Alpha']},
+    {'make': 'Maruti Suzuki', 'model': 'Dzire', 'body_type': 'Sedan', 'seating': 5, 'price_lakh': (6.8, 10.1), 'fuel_types': ['Petrol', 'CNG'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['LXi', 'VXi', 'ZXi', 'ZXi+']},
+    {'make': 'Maruti Suzuki', 'model': 'Brezza', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (8.3, 14.1), 'fuel_types': ['Petrol', 'CNG'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['LXi', 'VXi', 'ZXi', 'ZXi+']},
+    {'make': 'Maruti Suzuki', 'model': 'Ertiga', 'body_type': 'MPV', 'seating': 7, 'price_lakh': (8.7, 13.0), 'fuel_types': ['Petrol', 'CNG'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['LXi', 'VXi', 'ZXi', 'ZXi+']},
+    {'make': 'Maruti Suzuki', 'model': 'Grand Vitara', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (10.9, 20.1), 'fuel_types': ['Petrol', 'Hybrid', 'CNG'], 'transmissions': ['Manual', 'Automatic', 'CVT'], 'variants': ['Sigma', 'Delta', 'Zeta+', 'Alpha+']},
+    {'make': 'Hyundai', 'model': 'Grand i10 Nios', 'body_type': 'Hatchback', 'seating': 5, 'price_lakh': (5.9, 8.6), 'fuel_types': ['Petrol', 'CNG'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['Era', 'Magna', 'Sportz', 'Asta']},
+    {'make': 'Hyundai', 'model': 'i20', 'body_type': 'Hatchback', 'seating': 5, 'price_lakh': (7.0, 11.2), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'CVT', 'DCT'], 'variants': ['Magna', 'Sportz', 'Asta', 'Asta (O)']},
+    {'make': 'Hyundai', 'model': 'Venue', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (7.9, 13.5), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'DCT'], 'variants': ['E', 'S', 'SX', 'SX(O)']},
+    {'make': 'Hyundai', 'model': 'Verna', 'body_type': 'Sedan', 'seating': 5, 'price_lakh': (11.0, 17.4), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'CVT', 'DCT'], 'variants': ['EX', 'S', 'SX', 'SX(O)']},
+    {'make': 'Hyundai', 'model': 'Creta', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (11.0, 20.2), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'Automatic', 'CVT', 'DCT'], 'variants': ['E', 'EX', 'S', 'SX', 'SX(O)']},
+    {'make': 'Hyundai', 'model': 'Alcazar', 'body_type': 'SUV', 'seating': 7, 'price_lakh': (16.8, 21.3), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'Automatic', 'DCT'], 'variants': ['Prestige', 'Platinum', 'Signature']},
+    {'make': 'Hyundai', 'model': 'Ioniq 5', 'body_type': 'Crossover', 'seating': 5, 'price_lakh': (45.0, 46.1), 'fuel_types': ['Electric'], 'transmissions': ['Automatic'], 'variants': ['RWD']},
+    {'make': 'Tata', 'model': 'Tiago', 'body_type': 'Hatchback', 'seating': 5, 'price_lakh': (5.6, 8.1), 'fuel_types': ['Petrol', 'CNG', 'Electric'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['XE', 'XM', 'XT', 'XZ+']},
+    {'make': 'Tata', 'model': 'Altroz', 'body_type': 'Hatchback', 'seating': 5, 'price_lakh': (6.6, 10.7), 'fuel_types': ['Petrol', 'Diesel', 'CNG'], 'transmissions': ['Manual', 'DCT'], 'variants': ['XE', 'XM+', 'XZ', 'XZ+']},
+    {'make': 'Tata', 'model': 'Punch', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (6.1, 10.2), 'fuel_types': ['Petrol', 'CNG', 'Electric'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['Pure', 'Adventure', 'Accomplished', 'Creative']},
+    {'make': 'Tata', 'model': 'Nexon', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (8.1, 15.5), 'fuel_types': ['Petrol', 'Diesel', 'Electric'], 'transmissions': ['Manual', 'Automatic', 'DCT'], 'variants': ['Smart', 'Pure', 'Creative', 'Fearless']},
+    {'make': 'Tata', 'model': 'Harrier', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (15.5, 26.4), 'fuel_types': ['Diesel'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['Smart', 'Pure', 'Adventure', 'Fearless']},
+    {'make': 'Tata', 'model': 'Safari', 'body_type': 'SUV', 'seating': 7, 'price_lakh': (16.2, 27.3), 'fuel_types': ['Diesel'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['Smart', 'Pure', 'Adventure', 'Accomplished']},
+    {'make': 'Mahindra', 'model': 'XUV 3XO', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (7.5, 15.5), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['MX1', 'MX3', 'AX5', 'AX7L']},
+    {'make': 'Mahindra', 'model': 'Thar', 'body_type': 'SUV', 'seating': 4, 'price_lakh': (11.4, 17.6), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['AX(O)', 'LX']},
+    {'make': 'Mahindra', 'model': 'Scorpio-N', 'body_type': 'SUV', 'seating': 7, 'price_lakh': (13.9, 24.5), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['Z2', 'Z4', 'Z6', 'Z8', 'Z8L']},
+    {'make': 'Mahindra', 'model': 'XUV700', 'body_type': 'SUV', 'seating': 7, 'price_lakh': (13.99, 26.99), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['MX', 'AX3', 'AX5', 'AX7', 'AX7L']},
+    {'make': 'Mahindra', 'model': 'Bolero Neo', 'body_type': 'SUV', 'seating': 7, 'price_lakh': (9.9, 12.2), 'fuel_types': ['Diesel'], 'transmissions': ['Manual'], 'variants': ['N4', 'N8', 'N10', 'N10(O)']},
+    {'make': 'Toyota', 'model': 'Glanza', 'body_type': 'Hatchback', 'seating': 5, 'price_lakh': (6.9, 10.0), 'fuel_types': ['Petrol', 'CNG'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['E', 'S', 'G', 'V']},
+    {'make': 'Toyota', 'model': 'Urban Cruiser Hyryder', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (11.1, 20.2), 'fuel_types': ['Petrol', 'Hybrid', 'CNG'], 'transmissions': ['Manual', 'Automatic', 'CVT'], 'variants': ['E', 'S', 'G', 'V']},
+    {'make': 'Toyota', 'model': 'Innova Crysta', 'body_type': 'MPV', 'seating': 7, 'price_lakh': (19.9, 26.5), 'fuel_types': ['Diesel'], 'transmissions': ['Manual'], 'variants': ['GX', 'VX', 'ZX']},
+    {'make': 'Toyota', 'model': 'Innova Hycross', 'body_type': 'MPV', 'seating': 8, 'price_lakh': (19.8, 31.3), 'fuel_types': ['Petrol', 'Hybrid'], 'transmissions': ['CVT', 'Automatic'], 'variants': ['G', 'GX', 'VX', 'ZX', 'ZX(O)']},
+    {'make': 'Toyota', 'model': 'Fortuner', 'body_type': 'SUV', 'seating': 7, 'price_lakh': (33.4, 51.4), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['4x2', '4x4', 'Legender', 'GR-S']},
+    {'make': 'Honda', 'model': 'Amaze', 'body_type': 'Sedan', 'seating': 5, 'price_lakh': (7.2, 9.9), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'CVT'], 'variants': ['E', 'S', 'VX']},
+    {'make': 'Honda', 'model': 'City', 'body_type': 'Sedan', 'seating': 5, 'price_lakh': (11.8, 16.4), 'fuel_types': ['Petrol', 'Hybrid'], 'transmissions': ['Manual', 'CVT'], 'variants': ['SV', 'V', 'VX', 'ZX']},
+    {'make': 'Honda', 'model': 'Elevate', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (11.7, 16.5), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'CVT'], 'variants': ['SV', 'V', 'VX', 'ZX']},
+    {'make': 'Kia', 'model': 'Sonet', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (8.0, 15.7), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'Automatic', 'DCT'], 'variants': ['HTE', 'HTK', 'HTX', 'GTX+']},
+    {'make': 'Kia', 'model': 'Seltos', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (10.9, 20.4), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'Automatic', 'CVT', 'DCT'], 'variants': ['HTE', 'HTK', 'HTX', 'GTX+', 'X-Line']},
+    {'make': 'Kia', 'model': 'Carens', 'body_type': 'MPV', 'seating': 7, 'price_lakh': (10.5, 19.7), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'Automatic', 'DCT'], 'variants': ['Premium', 'Prestige', 'Luxury', 'Luxury Plus']},
+    {'make': 'Kia', 'model': 'EV6', 'body_type': 'Crossover', 'seating': 5, 'price_lakh': (60.9, 65.9), 'fuel_types': ['Electric'], 'transmissions': ['Automatic'], 'variants': ['GT Line', 'GT Line AWD']},
+    {'make': 'Volkswagen', 'model': 'Virtus', 'body_type': 'Sedan', 'seating': 5, 'price_lakh': (11.6, 19.4), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'Automatic', 'DCT'], 'variants': ['Comfortline', 'Highline', 'Topline', 'GT Plus']},
+    {'make': 'Volkswagen', 'model': 'Taigun', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (11.7, 19.7), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'Automatic', 'DCT'], 'variants': ['Comfortline', 'Highline', 'Topline', 'GT Plus']},
+    {'make': 'Skoda', 'model': 'Slavia', 'body_type': 'Sedan', 'seating': 5, 'price_lakh': (11.5, 19.1), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'Automatic', 'DCT'], 'variants': ['Active', 'Ambition', 'Style']},
+    {'make': 'Skoda', 'model': 'Kushaq', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (11.9, 20.5), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'Automatic', 'DCT'], 'variants': ['Active', 'Ambition', 'Style', 'Monte Carlo']},
+    {'make': 'Skoda', 'model': 'Octavia', 'body_type': 'Sedan', 'seating': 5, 'price_lakh': (27.4, 30.5), 'fuel_types': ['Petrol'], 'transmissions': ['Automatic'], 'variants': ['Style', 'L&K']},
+    {'make': 'MG', 'model': 'Comet EV', 'body_type': 'Hatchback', 'seating': 4, 'price_lakh': (7.0, 9.7), 'fuel_types': ['Electric'], 'transmissions': ['Automatic'], 'variants': ['Executive', 'Excite', 'Exclusive']},
+    {'make': 'MG', 'model': 'Astor', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (10.0, 18.4), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'CVT', 'Automatic'], 'variants': ['Sprint', 'Shine', 'Select', 'Sharp Pro', 'Savvy Pro']},
+    {'make': 'MG', 'model': 'Hector', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (13.99, 22.2), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Manual', 'CVT'], 'variants': ['Style', 'Shine Pro', 'Select Pro', 'Smart Pro', 'Sharp Pro']},
+    {'make': 'MG', 'model': 'ZS EV', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (18.98, 25.4), 'fuel_types': ['Electric'], 'transmissions': ['Automatic'], 'variants': ['Executive', 'Excite Pro', 'Exclusive Plus', 'Essence']},
+    {'make': 'Renault', 'model': 'Kwid', 'body_type': 'Hatchback', 'seating': 5, 'price_lakh': (4.7, 6.5), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['RXE', 'RXL', 'RXT', 'Climber']},
+    {'make': 'Renault', 'model': 'Triber', 'body_type': 'MPV', 'seating': 7, 'price_lakh': (6.0, 8.97), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['RXE', 'RXL', 'RXT', 'RXZ']},
+    {'make': 'Nissan', 'model': 'Magnite', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (6.0, 11.3), 'fuel_types': ['Petrol'], 'transmissions': ['Manual', 'CVT', 'Automatic'], 'variants': ['XE', 'XL', 'XV', 'XV Premium']},
+    {'make': 'Jeep', 'model': 'Compass', 'body_type': 'SUV', 'seating': 5, 'price_lakh': (18.99, 32.4), 'fuel_types': ['Diesel'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['Sport', 'Longitude', 'Limited', 'Model S']},
+    {'make': 'Citroen', 'model': 'C3', 'body_type': 'Hatchback', 'seating': 5, 'price_lakh': (6.2, 9.0), 'fuel_types': ['Petrol', 'Electric'], 'transmissions': ['Manual', 'Automatic'], 'variants': ['Live', 'Feel', 'Shine']},
+    {'make': 'BMW', 'model': 'Z4', 'body_type': 'Convertible', 'seating': 2, 'price_lakh': (89.3, 90.0), 'fuel_types': ['Petrol'], 'transmissions': ['Automatic'], 'variants': ['M40i']},
+    {'make': 'BMW', 'model': '2 Series Gran Coupe', 'body_type': 'Coupe', 'seating': 5, 'price_lakh': (43.9, 46.9), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Automatic'], 'variants': ['220i M Sport', '220d M Sport']},
+    {'make': 'Mercedes-Benz', 'model': 'C-Class', 'body_type': 'Sedan', 'seating': 5, 'price_lakh': (61.0, 69.0), 'fuel_types': ['Petrol', 'Diesel'], 'transmissions': ['Automatic'], 'variants': ['C 200', 'C 220d', 'C 300d']},
+    {'make': 'Force', 'model': 'Urbania', 'body_type': 'MPV', 'seating': 10, 'price_lakh': (28.9, 31.5), 'fuel_types': ['Diesel'], 'transmissions': ['Manual'], 'variants': ['3350WB', '3615WB', '4400WB']},
+]
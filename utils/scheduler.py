@@ -0,0 +1,200 @@
+import collections
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+# Lower runs first. Interactive chat goes ahead of the long report pages.
+PAGE_PRIORITIES = {
+    "ai_assistant": 0,
+    "policy_scanner": 1,
+    "financial_advisor": 1,
+    "depreciation_predictor": 1,
+    "car_browser": 1,
+    "fine_print_analyzer": 2,
+    "model_comparison": 2,
+    "ai_insights": 2,
+}
+DEFAULT_PRIORITY = 1
+
+
+class TokenBucket:
+    """Continuously refilling budget of ``per_minute`` units."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount, now):
+        """Seconds until ``amount`` units are available (0 if they are now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Ticket:
+    """A request waiting for, or holding, scheduler capacity."""
+
+    def __init__(self, seq, page, session, tokens):
+        self.seq = seq
+        self.page = page
+        self.session = session
+        self.priority = PAGE_PRIORITIES.get(page, DEFAULT_PRIORITY)
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+        self.granted_at = None
+
+    @property
+    def wait(self):
+        return (self.granted_at or time.monotonic()) - self.enqueued_at
+
+
+class RequestScheduler:
+    """Admit LLM requests within request-rate and token-rate budgets.
+
+    Waiting requests are ordered by page priority, then by each session's
+    virtual time so one busy session cannot crowd out the others, then by
+    arrival. Priorities age by one level every ``aging_seconds`` so report
+    pages still make progress under a steady stream of chat messages.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, max_concurrent, aging_seconds=30.0):
+        self._cond = threading.Condition()
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrent = max_concurrent
+        self.aging_seconds = aging_seconds
+        self._seq = itertools.count()
+        self._waiting = []
+        self._running = 0
+        self._paused_until = 0.0
+        self._vtime = {}
+        self._floor = 0
+        self._waits = collections.deque(maxlen=1000)
+        self._counters = collections.Counter()
+
+    def _rank(self, ticket, now):
+        aged = int((now - ticket.enqueued_at) / self.aging_seconds)
+        return (ticket.priority - aged, self._vtime.get(ticket.session, 0), ticket.seq)
+
+    def _delay(self, ticket, now):
+        """Seconds until ``ticket`` may run, or None to wait for a release."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._running >= self.max_concurrent:
+            return None
+        return max(self._requests.delay(1, now), self._tokens.delay(ticket.tokens, now))
+
+    def _grant(self, ticket, now):
+        self._waiting.remove(ticket)
+        self._requests.take(1)
+        self._tokens.take(ticket.tokens)
+        self._running += 1
+        self._floor = self._vtime.get(ticket.session, 0)
+        self._vtime[ticket.session] = self._floor + 1
+        ticket.granted_at = now
+        self._waits.append(ticket.wait)
+        self._counters["granted"] += 1
+        self._cond.notify_all()
+
+    def _enqueue(self, page, session, tokens):
+        ticket = Ticket(next(self._seq), page, session, tokens)
+        # A session returning after a quiet spell starts level with the others instead of ahead of them
+        self._vtime[session] = max(self._vtime.get(session, 0), self._floor)
+        if len(self._vtime) > 1000:
+            active = {t.session for t in self._waiting} | {session}
+            self._vtime = {s: v for s, v in self._vtime.items() if s in active or v > self._floor}
+        self._waiting.append(ticket)
+        return ticket
+
+    def acquire(self, page, session, tokens, timeout=None):
+        """Block until the request may be sent and return its ticket."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            ticket = self._enqueue(page, session, tokens)
+            try:
+                while True:
+                    now = time.monotonic()
+                    head = min(self._waiting, key=lambda t: self._rank(t, now))
+                    delay = self._delay(ticket, now) if head is ticket else None
+                    if delay == 0:
+                        self._grant(ticket, now)
+                        return ticket
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._counters["timed_out"] += 1
+                            raise TimeoutError("Timed out waiting for Groq capacity")
+                        delay = remaining if delay is None else min(delay, remaining)
+                    self._cond.wait(delay)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    self._cond.notify_all()
+                raise
+
+    def try_acquire(self, page, session, tokens):
+        """Grant a ticket only if capacity is free right now and nobody is queued."""
+        with self._cond:
+            if self._waiting:
+                return None
+            now = time.monotonic()
+            ticket = self._enqueue(page, session, tokens)
+            if self._delay(ticket, now) == 0:
+                self._grant(ticket, now)
+                return ticket
+            self._waiting.remove(ticket)
+            return None
+
+    def release(self, ticket, used_tokens=None):
+        """Return a slot, refunding any over-estimate of the tokens used."""
+        with self._cond:
+            self._running -= 1
+            if used_tokens is not None and used_tokens < ticket.tokens:
+                self._tokens.give(ticket.tokens - used_tokens)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, page, session, tokens, timeout=None):
+        ticket = self.acquire(page, session, tokens, timeout)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def pause(self, seconds):
+        """Hold every queued request for ``seconds``, e.g. from a retry-after header."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._counters["throttled"] += 1
+            self._cond.notify_all()
+
+    def stats(self):
+        """Return queue depth, running requests and recent wait times."""
+        with self._cond:
+            waits = sorted(self._waits)
+            by_priority = collections.Counter(t.priority for t in self._waiting)
+            return {
+                "queue_depth": len(self._waiting),
+                "queue_by_priority": dict(by_priority),
+                "running": self._running,
+                "paused_for": max(0.0, self._paused_until - time.monotonic()),
+                "wait_p50": waits[len(waits) // 2] if waits else 0.0,
+                "wait_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                "wait_max": waits[-1] if waits else 0.0,
+                **self._counters,
+            }
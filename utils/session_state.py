@@ -6,6 +6,10 @@ def initialize_session_state():
     # Main navigation
     if 'user_choice' not in st.session_state:
         st.session_state.user_choice = None
+
+    # Background LLM jobs, page -> job id
+    if 'jobs' not in st.session_state:
+        st.session_state.jobs = {}
     
     # Policy Scanner
     if 'policy_scan_result' not in st.session_state:
@@ -0,0 +1,86 @@
+import threading
+import time
+
+
+class Flight:
+    """One in-flight request whose output is shared with every waiter.
+
+    The leader publishes text chunks as they arrive; followers replay the
+    chunks seen so far and then tail new ones, so streaming callers keep
+    streaming even when they did not make the request themselves.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self.followers = 0
+
+    def publish(self, chunk):
+        with self._cond:
+            self._chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            self._done = True
+            self._error = error
+            self._cond.notify_all()
+
+    def follow(self, timeout):
+        """Yield the leader's chunks, re-raising its error if it failed."""
+        deadline = time.monotonic() + timeout
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self._chunks) and not self._done:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for an identical in-flight request")
+                    self._cond.wait(remaining)
+                pending = self._chunks[index:]
+                index = len(self._chunks)
+                done, error = self._done, self._error
+            yield from pending
+            if done and index >= len(self._chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key onto one leader."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def join(self, key):
+        """Return ``(flight, is_leader)`` for ``key``."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                return flight, False
+            flight = Flight()
+            self._flights[key] = flight
+            return flight, True
+
+    def forget(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def abandon(self, key, flight):
+        """Drop ``flight`` if nobody follows it; return False if someone does."""
+        with self._lock:
+            if flight.followers:
+                return False
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            return True
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
@@ -0,0 +1,126 @@
+import bisect
+import collections
+import json
+import math
+import os
+import threading
+import time
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "llm_calls.jsonl")
+
+# Bucket bounds grow by 5% from 10 µs (catalog filters) to ~20 minutes, so percentiles are within 5%
+_BOUNDS = [0.00001 * 1.05 ** i for i in range(int(math.log(1200 / 0.00001) / math.log(1.05)) + 1)]
+
+
+class Histogram:
+    """Log-bucketed histogram of durations in seconds."""
+
+    def __init__(self):
+        self.counts = [0] * (len(_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the ``pct`` percentile."""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * pct / 100)
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.max, _BOUNDS[i] if i < len(_BOUNDS) else self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class MetricsRegistry:
+    """In-process counters and histograms, labelled by route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = collections.defaultdict(Histogram)
+        self._counters = collections.Counter()
+
+    def observe(self, name, route, value):
+        with self._lock:
+            self._histograms[(name, route)].observe(value)
+
+    def increment(self, name, route, amount=1):
+        with self._lock:
+            self._counters[(name, route)] += amount
+
+    def snapshot(self):
+        """Return ``{route: {metric: value or histogram summary}}``."""
+        with self._lock:
+            routes = collections.defaultdict(dict)
+            for (name, route), histogram in self._histograms.items():
+                routes[route][name] = histogram.summary()
+            for (name, route), value in self._counters.items():
+                routes[route][name] = value
+            return dict(routes)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+registry = MetricsRegistry()
+_log_lock = threading.Lock()
+
+
+def _log_path():
+    """JSONL destination from LLM_TELEMETRY_LOG; set it empty to turn the log off."""
+    return os.getenv("LLM_TELEMETRY_LOG", DEFAULT_LOG_PATH)
+
+
+def record_call(call):
+    """Add one LLM call to the metrics registry and the JSONL log.
+
+    ``call`` is a dict with the calling page plus whatever was measured:
+    cache status, queue_wait, ttft, latency, retries, token counts, errors.
+    """
+    route = call.get("page") or "unknown"
+    registry.increment("calls", route)
+    for name in ("latency", "ttft", "queue_wait"):
+        if call.get(name) is not None:
+            registry.observe(name, route, call[name])
+    if call.get("cache"):
+        registry.increment(f"cache_{call['cache']}", route)
+    for name in ("retries", "prompt_tokens", "completion_tokens"):
+        if call.get(name):
+            registry.increment(name, route, call[name])
+    for flag in ("coalesced", "hedged", "cancelled"):
+        if call.get(flag):
+            registry.increment(flag, route)
+    if call.get("error"):
+        registry.increment("errors", route)
+
+    path = _log_path()
+    if not path:
+        return
+    line = json.dumps({"ts": time.time(), **call}, ensure_ascii=False, default=str)
+    try:
+        with _log_lock:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except OSError:
+        pass
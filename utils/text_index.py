@@ -0,0 +1,220 @@
+import bisect
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from utils.bitmap import Bitmap
+
+_TOKEN = re.compile(r"[a-z0-9]+\+*")
+_PIECE = re.compile(r"[a-z]+|[0-9]+")
+# Dice similarity of two terms' trigrams needed for a fuzzy match
+MIN_SIMILARITY = 0.5
+
+
+def tokens(text):
+    """Lower-case search tokens: "SX(O)" -> ["sx", "o"], "ZXi+" -> ["zxi+"]."""
+    return _TOKEN.findall(str(text).lower())
+
+
+def _trigrams(term):
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edits(a, b, limit):
+    """Edit distance between ``a`` and ``b`` (adjacent swaps count once), or limit + 1 if above ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y))
+            if before is not None and j > 1 and x == b[j - 2] and a[i - 2] == y:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _typos(token):
+    """Edits allowed for a token to still match: short words have too many near neighbours."""
+    return 2 if len(token) >= 8 else 1 if len(token) >= 4 else 0
+
+
+def _group(codes):
+    """The distinct code tuples in parallel ``codes`` arrays, and the row offsets holding each."""
+    # Each column gets as many bits as its largest code needs; when they don't fit one int64, group the rows directly
+    widths = [max(int(column.max(initial=0)).bit_length(), 1) for column in codes]
+    if sum(widths) <= 63:
+        combined = np.zeros(len(codes[0]), dtype=np.int64)
+        for column, width in zip(codes, widths):
+            combined = (combined << width) | column.astype(np.int64)
+        distinct, inverse = np.unique(combined, return_inverse=True)
+        shifts = np.cumsum(widths[::-1])[::-1] - widths
+        tuples = [tuple(int(value >> int(shift)) & ((1 << width) - 1) for shift, width in zip(shifts, widths)) for value in distinct]
+    else:
+        distinct, inverse = np.unique(np.stack(codes, axis=1), axis=0, return_inverse=True)
+        tuples = [tuple(int(code) for code in row) for row in distinct]
+    inverse = inverse.reshape(-1)
+    order = np.argsort(inverse, kind="stable")
+    rows = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(distinct)))[:-1])
+    return tuples, rows
+
+
+class TextIndex:
+    """Fuzzy search over listing names (make, model and variant).
+
+    Search runs over the distinct names rather than the rows: ``names``
+    lists each (make, model, variant) once and ``rows`` holds a bitmap of
+    the rows carrying it. Every word of a name is a term, as are each
+    multi-word part written without spaces ("sxo" for "SX(O)") and the
+    letter and digit runs of a word ("xuv" and "700" for "XUV700"). A query
+    token finds terms it is a prefix of, for type-ahead, or terms sharing
+    trigrams with it that are similar enough or within a typo or two of
+    it ("hyrider", "crta"). A name matches
+    when every query token finds one of its terms. Terms are indexed on
+    first search, so loading a snapshot stays cheap.
+    """
+
+    def __init__(self, size, names=(), rows=()):
+        self.size = size
+        self.names = []
+        self.rows = []
+        self._ids = {}
+        # Sorted, for prefix lookups
+        self.terms = []
+        self._term_names = {}
+        self._term_trigrams = {}
+        self._trigram_terms = defaultdict(set)
+        # Names whose terms are in the term index so far
+        self._indexed = 0
+        self._last = None
+        for name, bitmap in zip(names, rows):
+            self._add_name(tuple(name), bitmap)
+
+    @classmethod
+    def from_codes(cls, size, codes, categories):
+        """Index rows by name, given the make, model and variant codes and category lists."""
+        index = cls(size)
+        index.add(np.arange(size), codes, categories)
+        return index
+
+    def _add_name(self, name, bitmap):
+        self._ids[name] = len(self.names)
+        self.names.append(name)
+        self.rows.append(bitmap)
+
+    def _index_terms(self):
+        new_terms = False
+        for name_id in range(self._indexed, len(self.names)):
+            terms = set()
+            for part in self.names[name_id]:
+                words = tokens(part)
+                terms.update(words)
+                if len(words) > 1:
+                    terms.add("".join(words))
+                for word in words:
+                    pieces = _PIECE.findall(word)
+                    if len(pieces) > 1:
+                        terms.update(pieces)
+            for term in terms:
+                if term not in self._term_names:
+                    self._term_names[term] = set()
+                    self.terms.append(term)
+                    new_terms = True
+                    grams = _trigrams(term)
+                    self._term_trigrams[term] = len(grams)
+                    for trigram in grams:
+                        self._trigram_terms[trigram].add(term)
+                self._term_names[term].add(name_id)
+        if new_terms:
+            self.terms.sort()
+        self._indexed = len(self.names)
+
+    def add(self, ids, codes, categories):
+        """Index new rows ``ids`` (the catalog's last ones); ``codes`` are their make, model and variant codes."""
+        if not len(ids):
+            return
+        self._last = None
+        self.size = int(ids[-1]) + 1
+        for bitmap in self.rows:
+            bitmap.resize(self.size)
+        for key, offsets in zip(*_group(codes)):
+            name = tuple(values[code] for values, code in zip(categories, key))
+            if name in self._ids:
+                bitmap = self.rows[self._ids[name]]
+                was_sparse = bitmap.sparse
+                bitmap.add(ids[offsets])
+                if was_sparse:
+                    self.rows[self._ids[name]] = bitmap.compress()
+            else:
+                self._add_name(name, Bitmap.from_indices(ids[offsets], self.size).compress())
+
+    def _terms_like(self, token):
+        """{term: similarity} for the terms ``token`` is a prefix of or close to."""
+        found = {}
+        at = bisect.bisect_left(self.terms, token)
+        while at < len(self.terms) and self.terms[at].startswith(token):
+            term = self.terms[at]
+            found[term] = 0.5 + 0.5 * len(token) / len(term)
+            at += 1
+        if len(token) >= 3:
+            grams = _trigrams(token)
+            shared = Counter(term for gram in grams for term in self._trigram_terms.get(gram, ()))
+            allowed = _typos(token)
+            for term, count in shared.items():
+                similarity = 2 * count / (len(grams) + self._term_trigrams[term])
+                if similarity < MIN_SIMILARITY and allowed:
+                    edits = _edits(token, term, allowed)
+                    if edits <= allowed:
+                        similarity = max(similarity, 1 - edits / max(len(token), len(term)))
+                if similarity >= MIN_SIMILARITY and similarity > found.get(term, 0):
+                    found[term] = similarity
+        return found
+
+    def scores(self, query):
+        """{name id: score} for the names matching every token of ``query``; higher is closer."""
+        if self._indexed < len(self.names):
+            self._index_terms()
+        scores = None
+        for token in tokens(query):
+            matched = {}
+            for term, similarity in self._terms_like(token).items():
+                for name_id in self._term_names[term]:
+                    matched[name_id] = max(matched.get(name_id, 0), similarity)
+            scores = matched if scores is None else {n: s + matched[n] for n, s in scores.items() if n in matched}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def match(self, query):
+        """Bitmap of the rows whose name matches ``query``. Don't modify it; the last one is reused."""
+        if self._last is not None and self._last[0] == query:
+            return self._last[1]
+        result = Bitmap(self.size)
+        for name_id in self.scores(query):
+            result.union_update(self.rows[name_id])
+        self._last = (query, result)
+        return result
+
+    def suggest(self, query, live, limit=8):
+        """Up to ``limit`` (name, live row count) pairs for type-ahead, best match first.
+
+        Only names scoring at least as well as the ``limit``-th best are
+        counted, so a one-letter prefix doesn't count the whole catalog.
+        """
+        scores = self.scores(query)
+        if not scores:
+            return []
+        cutoff = sorted(scores.values(), reverse=True)[min(limit, len(scores)) - 1]
+        ranked = []
+        for name_id, score in scores.items():
+            if score >= cutoff:
+                count = live.intersection_count(self.rows[name_id])
+                if count:
+                    ranked.append((-score, -count, self.names[name_id]))
+        return [(name, -count) for _, count, name in sorted(ranked)[:limit]]